@@ -8,6 +8,12 @@ from product.models import Category
 from .serializers import CategoryWithProductsSerializer
 
 from drf_yasg import openapi
+from config.pagination import InvalidCursor, PAGINATION_PARAMETERS, page_params, keyset_page
+from config.fields import InvalidFields, select_fields, columns, fields_parameter
+
+# 응답 필드 → 조회 컬럼 (ProductInCategorySerializer 필드가 기본, 상세 설명은 요청 시에만)
+PRODUCT_FIELDS = {name: (name,) for name in ("id", "name", "price", "image", "content")}
+LIST_FIELDS = ("id", "name", "price", "image")
 
 class CategoryProductByIdView(APIView):
     permission_classes = [AllowAny]
@@ -18,7 +24,9 @@ class CategoryProductByIdView(APIView):
         manual_parameters=[
             openapi.Parameter(
                 'category', openapi.IN_QUERY, description="카테고리 ID(아우터:1, 상의:2, 하의:3)", type=openapi.TYPE_INTEGER, required=True
-            )
+            ),
+            fields_parameter(PRODUCT_FIELDS, LIST_FIELDS, required=("id",)),
+            *PAGINATION_PARAMETERS,
         ],
         responses={200: CategoryWithProductsSerializer()}
     )
@@ -26,15 +34,24 @@ class CategoryProductByIdView(APIView):
         category_id = request.GET.get('category')
         if category_id is None:
             return Response({'status': 400, 'message': 'category 값이 필요합니다.'}, status=400)
+        try:
+            after, limit = page_params(request.GET)
+            fields = select_fields(request.GET, PRODUCT_FIELDS, LIST_FIELDS, required=("id",))
+        except (InvalidCursor, InvalidFields) as exc:
+            return Response({'status': 400, 'message': str(exc)}, status=400)
 
         try:
-            category = Category.objects.prefetch_related('product_set').get(id=category_id)
-        except Category.DoesNotExist:
+            category = Category.objects.get(id=category_id)
+        except (Category.DoesNotExist, ValueError):
             return Response({'status': 404, 'message': '해당 카테고리는 존재하지 않습니다.'}, status=404)
 
-        serializer = CategoryWithProductsSerializer(category)
+        # 카테고리 상품 전체 대신 id 순 keyset 페이지를 요청한 컬럼만 조회
+        products, next_cursor = keyset_page(
+            category.product_set.values(*columns(fields, PRODUCT_FIELDS)), after, limit
+        )
         return Response({
             'status': 200,
             'message': f'카테고리(ID={category_id}) 상품 리스트 조회 성공',
-            'data': serializer.data
+            'data': {'id': category.id, 'name': category.name, 'products': products},
+            'next': next_cursor,
         }, status=200)
@@ -3,6 +3,9 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Served by gunicorn with uvicorn workers when SERVER_MODE=asgi (see docker-compose.yml);
+set ASYNC_VIEWS=true so the I/O-heavy endpoints use the async views.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.0/howto/deployment/asgi/
 """
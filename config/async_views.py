@@ -0,0 +1,69 @@
+"""
+ASGI 배포용 async 뷰 기반 클래스
+
+DRF APIView 는 async 핸들러를 지원하지 않으므로, 외부 API 를 요청 안에서 기다리는 엔드포인트와
+조회 엔드포인트는 Django async View 로 따로 둔다.
+- 인증은 REST_FRAMEWORK 의 DEFAULT_AUTHENTICATION_CLASSES (JWT 헤더/쿠키) 를 그대로 사용
+- async 로 구현하지 않은 메서드(파일 업로드 등)는 sync_view 로 지정한 기존 DRF 뷰에 넘긴다
+- ASYNC_VIEWS=False (WSGI 배포) 이면 urls 에서 기존 DRF 뷰를 그대로 쓴다 (select_view)
+"""
+import json, logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions
+from rest_framework.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+
+def _authenticate(request):
+    for auth_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        result = auth_class().authenticate(request)
+        if result is not None:
+            return result[0]
+    return None
+
+
+class AsyncAPIView(View):
+    login_required = True
+    sync_view = None      # async 로 구현하지 않은 메서드를 처리할 DRF 뷰 클래스
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        view.cls = cls
+        return csrf_exempt(view)   # JWT 인증이라 CSRF 토큰 불필요 (DRF APIView 와 동일)
+
+    async def dispatch(self, request, *args, **kwargs):
+        method = request.method.lower()
+        handler = getattr(self, method, None)
+        if handler is None:
+            if self.sync_view and hasattr(self.sync_view, method):
+                return await sync_to_async(self.sync_view.as_view())(request, *args, **kwargs)
+            return JsonResponse({"detail": f'메서드 "{request.method}"는 허용되지 않습니다.'}, status=405)
+
+        try:
+            request.user = await sync_to_async(_authenticate)(request) or AnonymousUser()
+        except exceptions.AuthenticationFailed as exc:
+            return JsonResponse(exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}, status=401)
+        if self.login_required and not request.user.is_authenticated:
+            return JsonResponse({"detail": "자격 인증데이터(authentication credentials)가 제공되지 않았습니다."}, status=401)
+
+        return await handler(request, *args, **kwargs)
+
+    @staticmethod
+    def json_body(request) -> dict:
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return request.POST.dict()
+
+
+def select_view(sync_view, async_view):
+    """배포 방식(ASYNC_VIEWS)에 맞는 뷰"""
+    return async_view.as_view() if settings.ASYNC_VIEWS else sync_view.as_view()
@@ -0,0 +1,44 @@
+"""
+조회 API 응답 필드 선택 (?fields=name,price,image)
+
+뷰마다 "응답 필드 → 조회할 DB 컬럼" 표를 두고, 요청한 필드의 컬럼만 .only() / .values() 로 읽는다.
+목록은 화면에 쓰는 필드만 기본값으로 두고(상세 설명 같은 큰 컬럼 제외) 필요하면 fields 로 추가한다.
+"""
+from drf_yasg import openapi
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def select_fields(query_params, allowed, default, required=()) -> list[str]:
+    """
+    ?fields= → 응답 필드 목록 (allowed 순서, required 는 항상 포함), 없으면 default
+    allowed 에 없는 필드가 있으면 InvalidFields
+    """
+    raw = query_params.get("fields")
+    if not raw:
+        requested = set(default)
+    else:
+        requested = {name.strip() for name in raw.split(",") if name.strip()}
+        unknown = sorted(requested - set(allowed))
+        if unknown:
+            raise InvalidFields(f"알 수 없는 필드입니다: {', '.join(unknown)} (선택 가능: {', '.join(allowed)})")
+    requested |= set(required)
+    return [name for name in allowed if name in requested]
+
+
+def columns(fields, allowed) -> list[str]:
+    """응답 필드 → 조회할 DB 컬럼 (중복 제거)"""
+    return list(dict.fromkeys(column for name in fields for column in allowed[name]))
+
+
+def fields_parameter(allowed, default, required=()) -> openapi.Parameter:
+    always = f", {', '.join(required)} 는 항상 포함" if required else ""
+    return openapi.Parameter(
+        name="fields",
+        in_=openapi.IN_QUERY,
+        type=openapi.TYPE_STRING,
+        required=False,
+        description=f"응답 필드 (쉼표 구분, 선택 가능: {', '.join(allowed)}; 기본 {', '.join(default)}{always})",
+    )
@@ -0,0 +1,99 @@
+"""
+업로드 이미지 처리 파이프라인 (상품 / 갤러리 / 프로필)
+
+1) EXIF 회전 정보대로 바로 세우기
+2) 메타데이터(EXIF, GPS, ICC 등) 제거
+3) 원본은 최대 IMAGE_MAX_DIMENSION 으로 줄여 JPEG 로 재인코딩
+   (VTO 제공자 입력으로도 쓰이므로 호환성이 높은 JPEG 유지)
+4) IMAGE_VARIANT_WIDTHS 폭별 WebP 변형 생성 (목록·상세 화면 표시용)
+"""
+import io, uuid
+from PIL import Image, ImageOps, UnidentifiedImageError
+from django.conf import settings
+
+from config.storage import storage
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+class ProcessedImage:
+    def __init__(self, original: bytes, variants: dict, width: int, height: int):
+        self.original = original     # JPEG bytes
+        self.variants = variants     # {"thumbnail": WebP bytes, ...}
+        self.width = width
+        self.height = height
+
+
+def _open(data: bytes) -> Image.Image:
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as exc:
+        raise InvalidImage("이미지 파일이 올바르지 않습니다.") from exc
+
+    image = ImageOps.exif_transpose(image)
+    # 새 RGB 이미지로 옮기면 EXIF·ICC 등 메타데이터가 따라오지 않는다
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _resize(image: Image.Image, width: int) -> Image.Image:
+    if image.width <= width:
+        return image
+    height = round(image.height * width / image.width)
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "JPEG":
+        image.save(buf, "JPEG", quality=settings.IMAGE_JPEG_QUALITY, optimize=True, progressive=True)
+    else:
+        image.save(buf, "WEBP", quality=settings.IMAGE_WEBP_QUALITY, method=4)
+    return buf.getvalue()
+
+
+def process(data: bytes, variants: bool = True) -> ProcessedImage:
+    """이미지 바이트 → 정규화된 원본 + 폭별 변형 (이미지가 아니면 InvalidImage)"""
+    image = _open(data)
+    image.thumbnail((settings.IMAGE_MAX_DIMENSION, settings.IMAGE_MAX_DIMENSION), Image.Resampling.LANCZOS)
+
+    encoded = {}
+    if variants:
+        for name, width in settings.IMAGE_VARIANT_WIDTHS.items():
+            encoded[name] = _encode(_resize(image, width), "WEBP")
+    return ProcessedImage(_encode(image, "JPEG"), encoded, image.width, image.height)
+
+
+def store(prefix: str, processed: ProcessedImage) -> tuple[str, dict]:
+    """
+    원본과 변형을 같은 uuid 로 저장 → (원본 URL, {변형 이름: URL})
+    {prefix}{uuid}.jpg, {prefix}{uuid}_{변형}.webp
+    순서대로 올린다 (여러 장은 호출하는 쪽이 PRODUCT_UPLOAD_CONCURRENCY 로 병렬 처리하므로 스레드 수가 곱해지지 않도록)
+    """
+    name = uuid.uuid4()
+    url = storage.put(f"{prefix}{name}.jpg", processed.original, "jpg")
+    variants = {
+        variant: storage.put(f"{prefix}{name}_{variant}.webp", data, "webp")
+        for variant, data in processed.variants.items()
+    }
+    return url, variants
+
+
+def resize(data: bytes, width: int, fmt: str = "webp") -> bytes:
+    """임의 폭의 파생 이미지 (fmt: webp | jpeg)"""
+    image = _resize(_open(data), width)
+    return _encode(image, "JPEG" if fmt == "jpeg" else "WEBP")
+
+
+def pick(url: str, variants: dict | None, size: str | None) -> str:
+    """요청한 크기의 변형 URL (없으면 원본)"""
+    if size and variants:
+        return variants.get(size, url)
+    return url
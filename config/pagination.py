@@ -0,0 +1,72 @@
+"""
+keyset(커서) 페이지네이션
+
+기본 키(id) 오름차순으로 정렬하고 "마지막으로 받은 id 다음부터 limit 개"를 조회한다.
+OFFSET 과 달리 앞 페이지를 건너뛰며 읽지 않으므로 상품 수·페이지 위치와 관계없이 응답 비용이 일정하고,
+페이지를 넘기는 사이에 상품이 추가·삭제돼도 중복·누락이 없다.
+- ?limit=  페이지 크기 (기본 PAGINATION_DEFAULT_LIMIT, 최대 PAGINATION_MAX_LIMIT)
+- ?cursor= 이전 응답의 next (불투명 문자열), 없으면 첫 페이지
+응답의 next 가 null 이면 마지막 페이지.
+"""
+import base64
+from django.conf import settings
+from drf_yasg import openapi
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+PAGINATION_PARAMETERS = [
+    openapi.Parameter(
+        name="cursor",
+        in_=openapi.IN_QUERY,
+        type=openapi.TYPE_STRING,
+        required=False,
+        description="이전 응답의 next 값 (생략 시 첫 페이지)",
+    ),
+    openapi.Parameter(
+        name="limit",
+        in_=openapi.IN_QUERY,
+        type=openapi.TYPE_INTEGER,
+        required=False,
+        description=f"페이지 크기 (기본 {settings.PAGINATION_DEFAULT_LIMIT}, 최대 {settings.PAGINATION_MAX_LIMIT})",
+    ),
+]
+
+
+def encode_cursor(last_id) -> str:
+    return base64.urlsafe_b64encode(str(last_id).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        value = int(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor("cursor 값이 올바르지 않습니다.")
+    if value < 0:
+        raise InvalidCursor("cursor 값이 올바르지 않습니다.")
+    return value
+
+
+def page_params(query_params) -> tuple[int, int]:
+    """?cursor=&limit= → (이 id 다음부터, 페이지 크기), 잘못된 값이면 InvalidCursor"""
+    cursor = query_params.get("cursor")
+    after = decode_cursor(cursor) if cursor else 0
+    try:
+        limit = int(query_params.get("limit") or settings.PAGINATION_DEFAULT_LIMIT)
+    except ValueError:
+        raise InvalidCursor("limit 는 정수여야 합니다.")
+    if limit < 1:
+        raise InvalidCursor("limit 는 1 이상이어야 합니다.")
+    return after, min(limit, settings.PAGINATION_MAX_LIMIT)
+
+
+def keyset_page(queryset, after: int, limit: int) -> tuple[list, str | None]:
+    """id > after 인 행을 id 순으로 limit 개 → (행 목록, 다음 페이지 cursor | None)"""
+    rows = list(queryset.filter(id__gt=after).order_by("id")[:limit + 1])
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last["id"] if isinstance(last, dict) else last.id)
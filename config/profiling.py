@@ -0,0 +1,267 @@
+"""
+요청 단위 SQL·지연시간 프로파일링 (샘플링 미들웨어)
+
+- 모든 요청의 처리 시간을 재고, REQUEST_PROFILING_SLOW_MS 를 넘으면 config.profiling 로거로 남긴다.
+- REQUEST_PROFILING_SAMPLE_RATE 비율의 요청만 SQL 을 잰다: 쿼리 수, SQL 총 시간,
+  같은 SQL(파라미터 제외)이 반복된 횟수(N+1 의심), 응답 크기.
+- 측정값은 "메서드 URL이름" 별로 공용 캐시에 누적하므로 웹 프로세스가 여러 개여도 합산된다.
+  GET /api/v1/profiling/requests (관리자) 로 조회한다.
+
+SQL 은 모든 DB 커넥션에 붙인 execute_wrapper 1개가 contextvar 로 현재 요청의 측정 대상을 찾아 기록한다.
+contextvar 는 sync_to_async 로 넘어간 스레드에도 전달되므로 ASGI(async 뷰)에서도 같은 방식으로 잰다.
+샘플링되지 않은 요청의 비용은 contextvar 조회 1번과 시간 측정뿐이다.
+"""
+import time, random, logging, contextvars
+from collections import Counter
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.urls import URLResolver, get_resolver
+from rest_framework import status
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from drf_yasg.utils import swagger_auto_schema
+from drf_yasg import openapi
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "profile:"
+FIELDS = ("count", "queries", "sql_ms", "duplicates", "view_ms", "bytes")
+METHODS = ("GET", "POST", "PUT", "PATCH", "DELETE")
+SLOW_KEY = PREFIX + "slow"
+
+_current = contextvars.ContextVar("request_profile", default=None)
+
+
+class RequestProfile:
+    __slots__ = ("queries", "sql_ms", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.statements = Counter()
+
+    @property
+    def duplicates(self) -> int:
+        """같은 SQL 이 두 번째 이후로 실행된 횟수"""
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+
+def _record_query(execute, sql, params, many, context):
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries += 1
+        profile.sql_ms += (time.perf_counter() - start) * 1000
+        profile.statements[sql] += 1
+
+
+def _install(sender=None, connection=None, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def endpoint_name(request) -> str:
+    match = getattr(request, "resolver_match", None)
+    name = (match.url_name or match.route) if match else "unresolved"
+    return f"{request.method} {name}"
+
+
+class RequestProfilingMiddleware:
+    """MIDDLEWARE 맨 앞에 둬서 다른 미들웨어(인증 등)의 쿼리까지 포함한다."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING_SAMPLE_RATE and not settings.REQUEST_PROFILING_SLOW_MS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+        connection_created.connect(_install, dispatch_uid="config.profiling")
+        for connection in connections.all(initialized_only=True):
+            _install(connection=connection)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        profile, token = self._start()
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            if token:
+                _current.reset(token)
+        self._finish(request, response, profile, start)
+        return response
+
+    async def __acall__(self, request):
+        profile, token = self._start()
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if token:
+                _current.reset(token)
+        self._finish(request, response, profile, start)
+        return response
+
+    def _start(self):
+        if random.random() >= settings.REQUEST_PROFILING_SAMPLE_RATE:
+            return None, None
+        profile = RequestProfile()
+        return profile, _current.set(profile)
+
+    def _finish(self, request, response, profile, start):
+        view_ms = (time.perf_counter() - start) * 1000
+        try:
+            name = endpoint_name(request)
+            if profile is not None:
+                size = 0 if response.streaming else len(response.content)
+                record(name, profile, view_ms, size)
+            if settings.REQUEST_PROFILING_SLOW_MS and view_ms >= settings.REQUEST_PROFILING_SLOW_MS:
+                log_slow(name, request, response, profile, view_ms)
+        except Exception:
+            # 측정 실패가 응답을 막지 않도록
+            logger.warning("요청 프로파일 기록 실패", exc_info=True)
+
+
+def _key(name, field) -> str:
+    # 캐시 키에는 공백을 쓰지 않는다 (memcached 호환)
+    return f"{PREFIX}{name.replace(' ', ':')}:{field}"
+
+
+def _incr(key, amount):
+    if not cache.add(key, amount, timeout=None):
+        cache.incr(key, amount)
+
+
+def record(name, profile: RequestProfile, view_ms, size):
+    values = {
+        "count":      1,
+        "queries":    profile.queries,
+        "sql_ms":     round(profile.sql_ms),
+        "duplicates": profile.duplicates,
+        "view_ms":    round(view_ms),
+        "bytes":      size,
+    }
+    for field, value in values.items():
+        if value:
+            _incr(_key(name, field), value)
+    for field in ("view_ms", "queries"):
+        key = _key(name, f"max_{field}")
+        current = cache.get(key)
+        if current is None or values[field] > current:
+            cache.set(key, values[field], timeout=None)
+
+
+def log_slow(name, request, response, profile, view_ms):
+    entry = {
+        "endpoint":    name,
+        "path":        request.get_full_path(),
+        "status":      response.status_code,
+        "view_ms":     round(view_ms),
+        "at":          round(time.time()),
+    }
+    if profile is None:
+        logger.warning("느린 요청 %s (%s) %d: %.0fms", name, entry["path"], response.status_code, view_ms)
+    else:
+        top_sql, top_count = (profile.statements.most_common(1) or [("", 0)])[0]
+        entry.update(queries=profile.queries, sql_ms=round(profile.sql_ms), duplicates=profile.duplicates,
+                     top_sql=top_sql[:500], top_sql_count=top_count)
+        logger.warning(
+            "느린 요청 %s (%s) %d: %.0fms, 쿼리 %d건 (SQL %.0fms, 중복 %d건), 가장 많이 반복된 SQL %d회: %s",
+            name, entry["path"], response.status_code, view_ms,
+            profile.queries, profile.sql_ms, profile.duplicates, top_count, top_sql[:200],
+        )
+    slow = cache.get(SLOW_KEY) or []
+    cache.set(SLOW_KEY, [entry] + slow[:settings.REQUEST_PROFILING_SLOW_LOG_SIZE - 1], timeout=None)
+
+
+def _url_names(patterns=None, prefix=""):
+    """URLconf 의 모든 엔드포인트 이름 (이름이 없으면 route, endpoint_name 과 같은 규칙)"""
+    for pattern in get_resolver().url_patterns if patterns is None else patterns:
+        if isinstance(pattern, URLResolver):
+            yield from _url_names(pattern.url_patterns, prefix + str(pattern.pattern))
+        else:
+            yield pattern.name or prefix + str(pattern.pattern)
+
+
+def _keys():
+    names = [f"{method} {name}" for name in dict.fromkeys(_url_names()) for method in METHODS]
+    names += [f"{method} unresolved" for method in METHODS]
+    return names, [_key(n, f) for n in names for f in FIELDS + ("max_view_ms", "max_queries")]
+
+
+def report(sort="view_ms") -> list[dict]:
+    """엔드포인트별 집계, sort 합계 기준 내림차순"""
+    names, keys = _keys()
+    values = cache.get_many(keys)
+    rows = []
+    for name in names:
+        total = {f: values.get(_key(name, f), 0) for f in FIELDS}
+        count = total["count"]
+        if not count:
+            continue
+        rows.append({
+            "endpoint":       name,
+            "count":          count,
+            "avg_view_ms":    round(total["view_ms"] / count, 1),
+            "max_view_ms":    values.get(_key(name, "max_view_ms")),
+            "avg_queries":    round(total["queries"] / count, 1),
+            "max_queries":    values.get(_key(name, "max_queries")),
+            "avg_sql_ms":     round(total["sql_ms"] / count, 1),
+            "avg_duplicates": round(total["duplicates"] / count, 1),
+            "avg_bytes":      round(total["bytes"] / count),
+            "_total":         total,
+        })
+    rows.sort(key=lambda row: row["_total"].get(sort, 0), reverse=True)
+    for row in rows:
+        del row["_total"]
+    return rows
+
+
+def reset():
+    _, keys = _keys()
+    cache.delete_many(keys + [SLOW_KEY])
+
+
+class RequestProfileReportView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_summary="API 요청 프로파일 조회 (관리자 전용)",
+        operation_description="""
+샘플링된 요청의 엔드포인트("메서드 URL이름")별 평균·최대 처리 시간, 쿼리 수, SQL 시간,
+같은 SQL 반복 횟수(N+1 의심), 응답 크기와 최근 느린 요청 목록을 반환합니다.
+""",
+        manual_parameters=[
+            openapi.Parameter("sort", openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                              enum=list(FIELDS), description="합계 기준 정렬 (기본 view_ms)"),
+        ],
+        responses={200: "엔드포인트별 집계와 느린 요청 목록"},
+    )
+    def get(self, request):
+        sort = request.query_params.get("sort", "view_ms")
+        if sort not in FIELDS:
+            return Response({"detail": f"sort 는 {', '.join(FIELDS)} 중 하나여야 합니다."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            "sample_rate": settings.REQUEST_PROFILING_SAMPLE_RATE,
+            "slow_ms":     settings.REQUEST_PROFILING_SLOW_MS,
+            "endpoints":   report(sort),
+            "slow":        cache.get(SLOW_KEY) or [],
+        }, status=status.HTTP_200_OK)
+
+    @swagger_auto_schema(operation_summary="API 요청 프로파일 초기화 (관리자 전용)", responses={204: "초기화 완료"})
+    def delete(self, request):
+        reset()
+        return Response(status=status.HTTP_204_NO_CONTENT)
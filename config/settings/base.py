@@ -3,6 +3,7 @@ import pymysql
 from datetime import timedelta
 from dotenv import load_dotenv
 from kombu import Queue
+from celery.schedules import crontab
 from datetime import timedelta
 
 pymysql.install_as_MySQLdb()
@@ -41,6 +42,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "config.profiling.RequestProfilingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -140,6 +142,10 @@ REST_FRAMEWORK = {
     ],
 }
 
+# 목록 API keyset 페이지네이션 (config/pagination.py)
+PAGINATION_DEFAULT_LIMIT = int(os.getenv('PAGINATION_DEFAULT_LIMIT', 20))
+PAGINATION_MAX_LIMIT = int(os.getenv('PAGINATION_MAX_LIMIT', 100))
+
 if os.getenv('ENVIRONMENT') == 'prod':
     default_api_url = 'https://techeerfashion.shop/api/v1'
 else:
@@ -195,16 +201,155 @@ CELERY_TASK_REVOKE = True
 CELERYD_HIJACK_ROOT_LOGGER = False
 CELERYD_REDIRECT_STDOUTS = False
 
+# 큐 분리: 대량 피팅(fan-out)이 사용자 단건 요청(영상 등)의 대기 시간을 늘리지 않도록
+# 큐마다 워커 풀을 따로 띄운다 (docker-compose.yml 의 celery_worker_* 참고)
+# 우선순위(0~9, 클수록 먼저)는 같은 큐 안에서의 처리 순서
+FITTING_QUEUE_PRIORITY_MAX = 9
+CELERY_TASK_QUEUES = [
+    Queue('default'),
+    Queue('fitting.interactive', queue_arguments={'x-max-priority': FITTING_QUEUE_PRIORITY_MAX}),
+    Queue('fitting.poll'),
+    Queue('fitting.bulk', queue_arguments={'x-max-priority': FITTING_QUEUE_PRIORITY_MAX}),
+    Queue('fitting.edit', queue_arguments={'x-max-priority': FITTING_QUEUE_PRIORITY_MAX}),
+    Queue('fitting.persist', queue_arguments={'x-max-priority': FITTING_QUEUE_PRIORITY_MAX}),
+    Queue('fitting.video', queue_arguments={'x-max-priority': FITTING_QUEUE_PRIORITY_MAX}),
+]
+CELERY_TASK_DEFAULT_QUEUE = 'default'
+CELERY_TASK_DEFAULT_PRIORITY = 5
+CELERY_TASK_ROUTES = {
+    # 상태 확인은 가볍고 지연되면 안 되므로 전용 큐
+    'fitting.tasks.poll_provider_job':      {'queue': 'fitting.poll'},
+    'fitting.tasks.sweep_provider_jobs':    {'queue': 'fitting.poll'},
+    # 대량 렌더링
+    'fitting.tasks.run_vto_url_task':       {'queue': 'fitting.bulk'},
+    'fitting.tasks.run_vto_edit_url_task':  {'queue': 'fitting.bulk'},
+    'fitting.tasks.run_fitting_batch_task': {'queue': 'fitting.bulk'},
+    # fan-out 중의 배경 편집 (배경 편집 API 로 받은 단건은 views 가 fitting.interactive 로 보낸다)
+    'fitting.tasks.edit_bg_task':           {'queue': 'fitting.edit'},
+    # 결과 저장은 이미 렌더링된 건을 마무리하는 단계라 먼저 처리
+    'fitting.tasks.upload_vto_result':      {'queue': 'fitting.persist', 'priority': 7},
+    'fitting.tasks.persist_fitting_results': {'queue': 'fitting.persist', 'priority': 7},
+    # 사용자 단건 영상 요청 (대기·다운로드가 길어 fitting.interactive 와 워커 풀을 나눔)
+    'fitting.tasks.generate_fitting_video_task': {'queue': 'fitting.video', 'priority': 7},
+    'fitting.tasks.save_fitting_video_task': {'queue': 'fitting.video', 'priority': 7},
+}
+# 우선순위가 의미 있도록 워커가 미리 가져가는 메시지는 1개로 제한
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+
+# 태스크별 실행 시간·DB 쿼리 수 집계 (fitting/task_stats.py, 부하 테스트 리포트에 사용)
+TASK_STATS_ENABLED = os.getenv('TASK_STATS_ENABLED', 'true').lower() == 'true'
+# Prometheus scrape 토큰 (Authorization: Bearer ...), 없으면 /api/v1/fittings/metrics 비활성화
+METRICS_SCRAPE_TOKEN = os.getenv('METRICS_SCRAPE_TOKEN')
+
+# 이 개수 이하 상품만 예약하는 fan-out(delta 재요청 등)은 대량 fan-out 보다 먼저 처리
+FITTING_SMALL_FANOUT = int(os.getenv('FITTING_SMALL_FANOUT', 5))
+
+# 외부 렌더 작업 완료 대기 방식
+# sweep     : celery beat 가 대기 중인 작업 전체를 주기적으로 한 번에 확인
+# reschedule: 작업 제출 후 상태 확인 태스크를 countdown 으로 재예약 (워커 슬롯 점유 X)
+# blocking  : 워커 안에서 sleep 하며 폴링
+FITTING_POLL_MODE = os.getenv('FITTING_POLL_MODE', 'sweep')
+FITTING_SWEEP_INTERVAL = int(os.getenv('FITTING_SWEEP_INTERVAL', 2))        # 초
+FITTING_SWEEP_BATCH_SIZE = int(os.getenv('FITTING_SWEEP_BATCH_SIZE', 500))  # 1회 최대 확인 건수
+FITTING_SWEEP_CONCURRENCY = int(os.getenv('FITTING_SWEEP_CONCURRENCY', 16)) # 동시 HTTP 조회 수
+FITTING_SWEEP_CLAIM_TIMEOUT = int(os.getenv('FITTING_SWEEP_CLAIM_TIMEOUT', 120))  # sweep 이 선점한 작업을 다른 sweep 이 건너뛰는 시간(초)
+
+# 피팅 fan-out 실행 방식
+# chain  : 상품별 celery chain 을 group 으로 예약
+# asyncio: 사용자 1명의 fan-out 전체를 워커 태스크 1개 안에서 코루틴으로 처리 (fitting/engine.py)
+FITTING_EXECUTION_MODE = os.getenv('FITTING_EXECUTION_MODE', 'chain')
+FITTING_ASYNC_CONCURRENCY = int(os.getenv('FITTING_ASYNC_CONCURRENCY', 32))  # 태스크 1개당 동시 렌더링 수
+
+# VTO 결과 캐시 (fitting/vto_cache.py)
+VTO_CACHE_ENABLED = os.getenv('VTO_CACHE_ENABLED', 'true').lower() == 'true'
+VTO_CACHE_MAX_ENTRIES = int(os.getenv('VTO_CACHE_MAX_ENTRIES', 50000))
+VTO_CACHE_TTL_DAYS = int(os.getenv('VTO_CACHE_TTL_DAYS', 30))   # 마지막 사용 후 보관 기간
+
+# 외부 AI 제공자 HTTP 클라이언트 (fitting/clients.py)
+# 주소를 바꾸면 로컬 에뮬레이터(python manage.py provider_emulator)로 보낼 수 있다
+BITSTUDIO_BASE_URL = os.getenv('BITSTUDIO_BASE_URL', 'https://api.bitstudio.ai')
+THENEWBLACK_BASE_URL = os.getenv('THENEWBLACK_BASE_URL', 'https://thenewblack.ai/api/1.1/wf')
+PROVIDER_CONNECT_TIMEOUT = float(os.getenv('PROVIDER_CONNECT_TIMEOUT', 5))   # 초
+PROVIDER_READ_TIMEOUT = float(os.getenv('PROVIDER_READ_TIMEOUT', 30))        # 초 (호출별 지정 없을 때)
+PROVIDER_MAX_RETRIES = int(os.getenv('PROVIDER_MAX_RETRIES', 3))
+PROVIDER_RETRY_BACKOFF = float(os.getenv('PROVIDER_RETRY_BACKOFF', 0.5))     # 0.5s, 1s, 2s ...
+PROVIDER_POOL_MAXSIZE = int(os.getenv('PROVIDER_POOL_MAXSIZE', max(16, FITTING_SWEEP_CONCURRENCY)))
+
+# 외부 제공자 circuit breaker (fitting/breaker.py)
+PROVIDER_BREAKER_WINDOW = int(os.getenv('PROVIDER_BREAKER_WINDOW', 60))                # 실패율 집계 구간(초)
+PROVIDER_BREAKER_MIN_CALLS = int(os.getenv('PROVIDER_BREAKER_MIN_CALLS', 10))          # 이 이상 호출됐을 때만 판단
+PROVIDER_BREAKER_FAILURE_RATE = float(os.getenv('PROVIDER_BREAKER_FAILURE_RATE', 0.5))
+PROVIDER_BREAKER_COOLDOWN = int(os.getenv('PROVIDER_BREAKER_COOLDOWN', 30))            # open 유지 시간(초)
+PROVIDER_BREAKER_PROBE_TIMEOUT = int(os.getenv('PROVIDER_BREAKER_PROBE_TIMEOUT', 90))  # 시험 호출 1건의 최대 점유 시간(초)
+
+# 외부 제공자 완료 webhook (fitting/webhooks.py)
+# 켜면 작업 제출 시 콜백 주소를 함께 넘기고, 폴링은 놓친 콜백을 찾는 느린 fallback sweep 으로만 동작
+PROVIDER_WEBHOOKS_ENABLED = os.getenv('PROVIDER_WEBHOOKS_ENABLED', 'false').lower() == 'true'
+PROVIDER_WEBHOOK_BASE_URL = os.getenv('PROVIDER_WEBHOOK_BASE_URL', default_api_url)   # 제공자가 호출할 API 주소
+PROVIDER_WEBHOOK_SECRETS = {
+    'bitstudio':   os.getenv('BITSTUDIO_WEBHOOK_SECRET', ''),
+    'thenewblack': os.getenv('TNB_WEBHOOK_SECRET', ''),
+}
+PROVIDER_WEBHOOK_TOLERANCE = int(os.getenv('PROVIDER_WEBHOOK_TOLERANCE', 300))                 # 서명 시각 허용 오차(초)
+PROVIDER_WEBHOOK_FALLBACK_INTERVAL = int(os.getenv('PROVIDER_WEBHOOK_FALLBACK_INTERVAL', 60))  # fallback 폴링 간격(초)
+
+CELERY_BEAT_SCHEDULE = {
+    'evict-vto-cache': {
+        'task': 'fitting.tasks.evict_vto_cache',
+        'schedule': crontab(hour=4, minute=0),
+    },
+}
+if FITTING_POLL_MODE == 'sweep' or PROVIDER_WEBHOOKS_ENABLED:
+    CELERY_BEAT_SCHEDULE['sweep-provider-jobs'] = {
+        'task': 'fitting.tasks.sweep_provider_jobs',
+        'schedule': FITTING_SWEEP_INTERVAL,
+        # 밀린 sweep 은 버리고 다음 주기에 처리
+        'options': {'expires': FITTING_SWEEP_INTERVAL},
+    }
+
 CELERY_FLOWER_USER = 'root'  # Flower 웹 인터페이스 사용자 이름
 CELERY_FLOWER_PASSWORD = 'root'  # Flower 웹 인터페이스 비밀번호
 
+# 공용 캐시 (피팅 진행 상황, 모니터링 집계 등)
+# REDIS_URL 이 없으면 프로세스 로컬 메모리 캐시 (개발/테스트용)
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# API 요청 프로파일링 (config/profiling.py)
+# 샘플링된 요청만 쿼리 수·SQL 시간·중복 SQL 을 재고, 처리 시간은 모든 요청을 재서 느린 요청을 기록
+REQUEST_PROFILING_SAMPLE_RATE = float(os.getenv('REQUEST_PROFILING_SAMPLE_RATE', 0.01))
+REQUEST_PROFILING_SLOW_MS = int(os.getenv('REQUEST_PROFILING_SLOW_MS', 1000))          # 0 이면 느린 요청 기록 안 함
+REQUEST_PROFILING_SLOW_LOG_SIZE = int(os.getenv('REQUEST_PROFILING_SLOW_LOG_SIZE', 50))  # 보관할 최근 느린 요청 수
+
+# 상품 목록 캐시 (product/catalogue.py), 상품 변경 시 버전으로 무효화하므로 TTL 은 안전장치
+CATALOGUE_CACHE_TTL = int(os.getenv('CATALOGUE_CACHE_TTL', 3600))   # 초
+
+# 피팅·영상 상태 SSE 스트림 (fitting/events.py, ASGI 배포 전용), 이벤트 전달은 REDIS_URL 의 pub/sub 사용
+SSE_HEARTBEAT_INTERVAL = int(os.getenv('SSE_HEARTBEAT_INTERVAL', 15))   # 초, 프록시가 유휴 연결을 끊지 않도록
+SSE_MAX_DURATION = int(os.getenv('SSE_MAX_DURATION', 120))              # 초, 지나면 끊고 클라이언트가 재접속 (gunicorn --timeout 300 보다 충분히 짧게)
+SSE_RETRY_MS = int(os.getenv('SSE_RETRY_MS', 3000))                     # 재접속 대기 (EventSource retry)
+
 # CELERY_RESULT_BACKEND = 'rpc://'
 CELERY_RESULT_BACKEND = "django-db"
 
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
 # CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND', 'redis://redis:6379/0')
-CELERY_RESULT_BACKEND = None
+# 피팅 fan-out 의 chord 콜백은 결과 백엔드가 필요 (Redis 가 없으면 django-db)
+CELERY_RESULT_BACKEND = os.getenv('CELERY_RESULT_BACKEND') or REDIS_URL or 'django-db'
+CELERY_RESULT_EXPIRES = timedelta(days=1)
 
 AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
@@ -219,6 +364,40 @@ AWS_S3_OBJECT_PARAMETERS = {
 
 AWS_DEFAULT_ACL = None
 
+# ASGI(uvicorn) 배포 시 외부 API 호출·조회 엔드포인트를 async 뷰로 제공 (config/async_views.py)
+# docker-compose 의 SERVER_MODE=asgi 와 함께 켠다
+ASYNC_VIEWS = os.getenv('ASYNC_VIEWS', 'false').lower() == 'true'
+
+# 파일 저장소 (config/storage.py): s3 | local (테스트·벤치마크용)
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 's3')
+STORAGE_LOCAL_ROOT = os.getenv('STORAGE_LOCAL_ROOT', str(BASE_DIR / 'media'))
+STORAGE_LOCAL_URL = os.getenv('STORAGE_LOCAL_URL', '/media')
+STORAGE_POOL_MAXSIZE = int(os.getenv('STORAGE_POOL_MAXSIZE', 32))     # boto3 커넥션 풀 (프로세스당)
+# 키에 uuid 가 들어가 내용이 바뀌지 않으므로 1년 캐시
+STORAGE_CACHE_CONTROL = os.getenv('STORAGE_CACHE_CONTROL', 'public, max-age=31536000, immutable')
+# 대용량 파일(피팅 영상) 스트리밍 업로드: 다운로드 응답을 이 크기 단위로 잘라 multipart 업로드
+# 워커당 메모리 사용량은 대략 청크 크기 × 동시 업로드 수로 고정된다
+S3_MULTIPART_CHUNK_SIZE = int(os.getenv('S3_MULTIPART_CHUNK_SIZE', 8 * 1024 * 1024))
+S3_MULTIPART_CONCURRENCY = int(os.getenv('S3_MULTIPART_CONCURRENCY', 4))
+S3_MAX_RETRIES = int(os.getenv('S3_MAX_RETRIES', 3))   # boto3 재시도 횟수 (standard 모드, 첫 시도 제외)
+# 상품 갤러리 다중 업로드 시 동시 업로드 수 (요청당)
+PRODUCT_UPLOAD_CONCURRENCY = int(os.getenv('PRODUCT_UPLOAD_CONCURRENCY', 8))
+
+# 업로드 이미지 처리 (config/images.py)
+IMAGE_MAX_DIMENSION = int(os.getenv('IMAGE_MAX_DIMENSION', 2048))   # 원본 긴 변 최대 px
+IMAGE_JPEG_QUALITY = int(os.getenv('IMAGE_JPEG_QUALITY', 88))
+IMAGE_WEBP_QUALITY = int(os.getenv('IMAGE_WEBP_QUALITY', 80))
+# 목록/상세 화면용 변형 폭 (px) → ?image_size=thumbnail|list|detail
+IMAGE_VARIANT_WIDTHS = {
+    'thumbnail': 160,
+    'list':      480,
+    'detail':    1080,
+}
+# 피팅 결과 임의 크기 리사이즈 (fitting/derivatives.py): 폭은 STEP 단위로 올림
+IMAGE_RESIZE_WIDTH_STEP = int(os.getenv('IMAGE_RESIZE_WIDTH_STEP', 20))
+IMAGE_DERIVATIVE_CACHE_DIR = os.getenv('IMAGE_DERIVATIVE_CACHE_DIR', '/tmp/image-derivatives')
+IMAGE_DERIVATIVE_CACHE_MAX_BYTES = int(os.getenv('IMAGE_DERIVATIVE_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+
 MEDIA_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/'
 
 if os.getenv('ENVIRONMENT') == 'prod':
@@ -0,0 +1,170 @@
+"""
+파일 저장소 공용 서비스 (상품/프로필/피팅 이미지, 피팅 영상)
+
+- STORAGE_BACKEND=s3    : S3 버킷에 저장하고 CloudFront 주소 반환 (기본)
+- STORAGE_BACKEND=local : 로컬 디렉터리에 저장 (테스트·벤치마크용, AWS 자격 증명 불필요)
+
+boto3 클라이언트는 처음 사용할 때 프로세스당 1개만 만든다 (fork 된 워커는 새로 생성).
+키는 항상 uuid 를 포함해 내용이 바뀌지 않으므로 길게 캐시해도 된다.
+"""
+import io, os, uuid, shutil, logging, mimetypes, threading
+from pathlib import Path
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def content_type_for(ext: str) -> str:
+    return mimetypes.guess_type(f"file.{ext}")[0] or "application/octet-stream"
+
+
+def new_key(prefix: str, ext: str) -> str:
+    """prefix 는 'product_images/3/' 처럼 '/' 로 끝나거나 'x/3_' 처럼 이름 앞부분"""
+    return f"{prefix}{uuid.uuid4()}.{ext}"
+
+
+class S3Storage:
+    def __init__(self):
+        self._client = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def bucket(self):
+        return settings.AWS_STORAGE_BUCKET_NAME
+
+    @property
+    def client(self):
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._client = self._build_client()
+                    self._pid = os.getpid()
+        return self._client
+
+    def _build_client(self):
+        import boto3
+        from botocore.config import Config
+
+        return boto3.session.Session().client(
+            "s3",
+            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
+            region_name=os.getenv("AWS_S3_REGION_NAME"),
+            config=Config(
+                max_pool_connections=settings.STORAGE_POOL_MAXSIZE,
+                retries={"max_attempts": settings.S3_MAX_RETRIES, "mode": "standard"},
+            ),
+        )
+
+    def _transfer_config(self):
+        from boto3.s3.transfer import TransferConfig
+
+        return TransferConfig(
+            multipart_threshold=settings.S3_MULTIPART_CHUNK_SIZE,
+            multipart_chunksize=settings.S3_MULTIPART_CHUNK_SIZE,
+            max_concurrency=settings.S3_MULTIPART_CONCURRENCY,
+        )
+
+    def url(self, key: str) -> str:
+        return f"{settings.AWS_S3_CUSTOM_DOMAIN}/{key}"
+
+    def save_stream(self, key: str, fileobj, ext: str) -> str:
+        """read() 만 지원하는 스트림도 가능 (S3_MULTIPART_CHUNK_SIZE 단위 multipart 업로드)"""
+        self.client.upload_fileobj(
+            fileobj,
+            self.bucket,
+            key,
+            ExtraArgs={
+                "ContentType":        content_type_for(ext),
+                "ContentDisposition": "inline",
+                "CacheControl":       settings.STORAGE_CACHE_CONTROL,
+            },
+            Config=self._transfer_config(),
+        )
+        return self.url(key)
+
+    def read(self, key: str) -> bytes | None:
+        from botocore.exceptions import ClientError
+
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+        except ClientError as exc:
+            if exc.response.get("Error", {}).get("Code") in ("NoSuchKey", "404"):
+                return None
+            raise
+
+    def is_stored(self, url: str) -> bool:
+        domain = settings.AWS_S3_CUSTOM_DOMAIN
+        return bool(domain) and url.startswith(f"{domain}/")
+
+    def key_for(self, url: str) -> str:
+        return url[len(settings.AWS_S3_CUSTOM_DOMAIN) + 1:]
+
+
+class LocalStorage:
+    @property
+    def root(self) -> Path:
+        return Path(settings.STORAGE_LOCAL_ROOT)
+
+    def url(self, key: str) -> str:
+        return f"{settings.STORAGE_LOCAL_URL}/{key}"
+
+    def save_stream(self, key: str, fileobj, ext: str) -> str:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as f:
+            shutil.copyfileobj(fileobj, f, settings.S3_MULTIPART_CHUNK_SIZE)
+        return self.url(key)
+
+    def read(self, key: str) -> bytes | None:
+        try:
+            return (self.root / key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def is_stored(self, url: str) -> bool:
+        return url.startswith(f"{settings.STORAGE_LOCAL_URL}/")
+
+    def key_for(self, url: str) -> str:
+        return url[len(settings.STORAGE_LOCAL_URL) + 1:]
+
+
+class Storage:
+    """설정에 따라 S3 / 로컬 백엔드로 위임"""
+
+    def __init__(self):
+        self._backends = {}
+
+    @property
+    def backend(self):
+        name = settings.STORAGE_BACKEND
+        if name not in self._backends:
+            self._backends[name] = LocalStorage() if name == "local" else S3Storage()
+        return self._backends[name]
+
+    def save(self, prefix: str, data: bytes, ext: str = "jpg") -> str:
+        """바이트를 prefix 아래 새 키로 저장 → 공개 URL"""
+        return self.save_stream(prefix, io.BytesIO(data), ext)
+
+    def save_stream(self, prefix: str, fileobj, ext: str = "jpg") -> str:
+        return self.backend.save_stream(new_key(prefix, ext), fileobj, ext)
+
+    def put(self, key: str, data: bytes, ext: str) -> str:
+        """정해진 키에 저장 (원본·변형처럼 이름을 맞춰야 할 때)"""
+        return self.backend.save_stream(key, io.BytesIO(data), ext)
+
+    def read(self, key: str) -> bytes | None:
+        """저장된 객체 내용 (없으면 None)"""
+        return self.backend.read(key)
+
+    def is_stored(self, url: str) -> bool:
+        """우리 저장소에 이미 저장된 객체 주소인지"""
+        return bool(url) and self.backend.is_stored(url)
+
+    def key_for(self, url: str) -> str | None:
+        """저장소 URL → 객체 키 (우리 저장소 주소가 아니면 None)"""
+        return self.backend.key_for(url) if self.is_stored(url) else None
+
+
+storage = Storage()
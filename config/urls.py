@@ -7,6 +7,8 @@ from django.conf.urls.static import static
 from django.conf import settings
 import os
 
+from config.profiling import RequestProfileReportView
+
 if os.getenv('ENVIRONMENT') == 'prod':
     default_api_url = 'https://techeerfashion.shop/api/v1'
 else:
@@ -34,6 +36,7 @@ urlpatterns = [
         path("users/", include("user.urls")),
         path('products/',include('product.urls')),
         path('categories/',include('category.urls')),
+        path('profiling/requests', RequestProfileReportView.as_view(), name='request-profiling'),
         
     ])),
 ]
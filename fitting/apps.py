@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class FittingConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "fitting"
+
+    def ready(self):
+        if settings.TASK_STATS_ENABLED:
+            from fitting import task_stats
+            task_stats.connect()
@@ -0,0 +1,140 @@
+"""
+ASGI 배포(ASYNC_VIEWS=True)용 async 뷰
+
+외부 API 호출은 httpx.AsyncClient 로 기다리므로 요청마다 스레드를 잡지 않는다.
+응답 형식·상태 코드는 fitting/views.py 의 같은 이름 DRF 뷰와 동일하다 (API 문서는 그쪽 참고).
+"""
+import asyncio, logging
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import JsonResponse
+
+from config.async_views import AsyncAPIView
+from product.models import Product
+from fitting import views, progress, events
+from fitting.clients import async_thenewblack, VIDEO_PROMPT
+from fitting.breaker import breakers, ProviderUnavailable
+from fitting.models import FittingResult, ProviderJob
+from fitting.tasks import fitting_video_chain, edit_bg_task
+
+logger = logging.getLogger(__name__)
+
+NOT_FOUND = {"detail": "찾을 수 없습니다."}
+
+
+def _unavailable(exc):
+    response = JsonResponse({"detail": str(exc), "retry_after": exc.retry_after}, status=503)
+    response["Retry-After"] = str(exc.retry_after)
+    return response
+
+
+async def _fitting_or_none(user, product_id):
+    if not await Product.objects.filter(pk=product_id).aexists():
+        return None
+    return await FittingResult.objects.filter(user=user, product_id=product_id).afirst()
+
+
+class ProductFittingVideoGenerateView(AsyncAPIView):
+
+    async def post(self, request, product_id):
+        fitting = await _fitting_or_none(request.user, product_id)
+        if not fitting:
+            return JsonResponse(NOT_FOUND, status=404)
+
+        if fitting.status == 'processing':
+            return JsonResponse({"detail": "이미 영상 생성 요청이 진행 중입니다."}, status=202)
+        if fitting.status == 'completed' and fitting.video:
+            return JsonResponse({"detail": "이미 영상이 생성되어 있습니다.", "video_url": fitting.video}, status=400)
+
+        # 외부 API 응답을 기다리는 동안 이벤트 루프는 다른 요청을 처리
+        try:
+            resp = await async_thenewblack.submit_video(fitting.image, VIDEO_PROMPT)
+        except ProviderUnavailable as exc:
+            return _unavailable(exc)
+        except httpx.HTTPError as exc:
+            logger.exception("TheNewBlack 영상 생성 요청 네트워크 오류")
+            return JsonResponse({"detail": "영상 생성 요청 중 네트워크 오류", "error": str(exc)}, status=502)
+        if resp.status_code != 200:
+            return JsonResponse({"detail": resp.text}, status=resp.status_code)
+
+        task_id = resp.text.strip()
+        if not task_id:
+            return JsonResponse({"detail": "외부 작업 ID를 받을 수 없습니다. 응답: " + resp.text}, status=500)
+
+        fitting.status = 'processing'
+        await fitting.asave(update_fields=['status'])
+        await sync_to_async(fitting_video_chain(fitting.id, task_id).delay, thread_sensitive=False)()
+
+        return JsonResponse({"detail": "영상 생성 요청을 받았습니다. 잠시 후 상태를 확인하세요."}, status=202)
+
+
+class ProductFittingVideoStatusView(AsyncAPIView):
+
+    async def get(self, request, product_id):
+        fitting = await _fitting_or_none(request.user, product_id)
+        if not fitting:
+            return JsonResponse(NOT_FOUND, status=404)
+        return JsonResponse({
+            'status':    fitting.status,
+            'video_url': fitting.video if fitting.status == 'completed' else None,
+        })
+
+
+class EditBgWhiteView(AsyncAPIView):
+    login_required = False
+
+    async def post(self, request):
+        image_id = self.json_body(request).get("image_id")
+        if not image_id:
+            return JsonResponse({"detail": "image_id 파라미터가 필요합니다."}, status=400)
+
+        unavailable = await sync_to_async(breakers["bitstudio"].unavailable)()
+        if unavailable:
+            return _unavailable(unavailable)
+
+        job = await ProviderJob.objects.acreate(kind="edit_bg", status="queued", max_polls=36, poll_interval=5)
+        await sync_to_async(edit_bg_task.apply_async, thread_sensitive=False)(
+            (image_id,), {"provider_job_id": job.id, "seed": views.EditBgWhiteView.SEED},
+            queue="fitting.interactive", priority=settings.FITTING_QUEUE_PRIORITY_MAX,
+        )
+        return JsonResponse(
+            {"detail": "편집 작업이 접수되었습니다.", "job_id": str(job.public_id), "status": job.status},
+            status=202,
+        )
+
+
+class EditBgJobStatusView(AsyncAPIView):
+    login_required = False
+
+    async def get(self, request, job_id):
+        job = await ProviderJob.objects.filter(public_id=job_id, kind="edit_bg").afirst()
+        if not job:
+            return JsonResponse({"detail": "편집 작업을 찾을 수 없습니다."}, status=404)
+        return JsonResponse({
+            "job_id":     str(job.public_id),
+            "status":     job.status,
+            "image":      job.result if job.status == "completed" else None,
+            "created_at": job.created_at,
+            "updated_at": job.updated_at,
+        })
+
+
+class FittingJobProgressView(AsyncAPIView):
+
+    async def get(self, request, job_id):
+        if job_id == "current":
+            job_id = await sync_to_async(progress.current_job_id)(request.user.id)
+        data = await sync_to_async(progress.get)(job_id) if job_id else None
+        if not data or data["user_id"] != request.user.id:
+            return JsonResponse({"detail": "피팅 작업을 찾을 수 없습니다."}, status=404)
+        return JsonResponse(data)
+
+
+class FittingEventStreamView(AsyncAPIView):
+
+    async def get(self, request):
+        # 구독을 먼저 등록해 snapshot 조회 중에 발행된 이벤트도 놓치지 않는다
+        sub = await sync_to_async(events.subscribe)(request.user.id, asyncio.get_running_loop())
+        snapshot = await sync_to_async(views.event_snapshot)(request.user.id)
+        return views.sse_response(events.astream(sub, snapshot))
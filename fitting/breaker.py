@@ -0,0 +1,155 @@
+"""
+외부 AI 제공자 circuit breaker
+
+상태는 Django cache(Redis)에 두므로 웹/워커 프로세스가 같은 판단을 공유한다.
+- closed   : 정상 호출, 최근 PROVIDER_BREAKER_WINDOW 초의 호출/실패 수를 10초 단위 버킷으로 집계
+- open     : 실패율이 PROVIDER_BREAKER_FAILURE_RATE 이상(최소 PROVIDER_BREAKER_MIN_CALLS 건)이면
+             PROVIDER_BREAKER_COOLDOWN 초 동안 호출 없이 ProviderUnavailable
+- half_open: cooldown 이 지나면 프로세스 통틀어 1건만 시험 호출, 성공하면 closed / 실패하면 다시 open
+연결 오류·타임아웃·429·5xx 를 실패로 센다. 캐시 오류 시에는 호출을 막지 않는다.
+"""
+import math, time, logging
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from fitting import metrics
+
+logger = logging.getLogger(__name__)
+
+BUCKET_SECONDS = 10
+
+
+class ProviderUnavailable(requests.RequestException):
+    """breaker 가 열려 호출하지 않음 (기존 네트워크 오류 처리 경로로 빠르게 실패)"""
+
+    def __init__(self, provider, retry_after):
+        super().__init__(f"{provider} 호출이 일시 중단되었습니다. {retry_after}초 후 다시 시도하세요.")
+        self.provider = provider
+        self.retry_after = retry_after
+
+
+def is_failure_status(status_code) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+class CircuitBreaker:
+
+    def __init__(self, name):
+        self.name = name
+
+    def _key(self, suffix):
+        return f"breaker:{self.name}:{suffix}"
+
+    def _buckets(self, now=None):
+        current = int((now or time.time()) // BUCKET_SECONDS)
+        count = max(1, settings.PROVIDER_BREAKER_WINDOW // BUCKET_SECONDS)
+        return range(current - count + 1, current + 1)
+
+    def _open_until(self):
+        try:
+            return cache.get(self._key("open_until"))
+        except Exception:
+            logger.warning("breaker 상태 조회 실패: %s", self.name, exc_info=True)
+            return None
+
+    def state(self) -> str:
+        open_until = self._open_until()
+        if open_until is None:
+            return "closed"
+        return "open" if time.time() < open_until else "half_open"
+
+    def retry_after(self) -> int:
+        open_until = self._open_until()
+        return max(1, math.ceil((open_until or 0) - time.time()))
+
+    def is_open(self) -> bool:
+        """새 요청을 받을지 판단용 (시험 호출 기회는 소모하지 않음)"""
+        return self.state() == "open"
+
+    def unavailable(self) -> ProviderUnavailable | None:
+        """열려 있으면 새 작업을 받지 않도록 ProviderUnavailable (raise 하지 않고 반환), 아니면 None"""
+        if not self.is_open():
+            return None
+        metrics.incr(f"breaker.{self.name}.rejected")
+        return ProviderUnavailable(self.name, self.retry_after())
+
+    def before_call(self) -> bool:
+        """호출 전 확인 → 시험 호출이면 True, 열려 있으면 ProviderUnavailable"""
+        state = self.state()
+        if state == "closed":
+            return False
+        if state == "half_open":
+            try:
+                if cache.add(self._key("probe"), 1, settings.PROVIDER_BREAKER_PROBE_TIMEOUT):
+                    return True
+            except Exception:
+                logger.warning("breaker 시험 호출 확인 실패: %s", self.name, exc_info=True)
+                return False
+        metrics.incr(f"breaker.{self.name}.rejected")
+        raise ProviderUnavailable(self.name, self.retry_after())
+
+    def record(self, ok: bool, probe=False):
+        try:
+            if probe:
+                if ok:
+                    self._close()
+                else:
+                    self._open()
+                return
+            bucket = self._buckets()[-1]
+            self._incr(f"calls:{bucket}")
+            if not ok:
+                self._incr(f"failures:{bucket}")
+                self._evaluate()
+        except Exception:
+            logger.warning("breaker 기록 실패: %s", self.name, exc_info=True)
+
+    def _incr(self, suffix):
+        key = self._key(suffix)
+        if not cache.add(key, 1, settings.PROVIDER_BREAKER_WINDOW + BUCKET_SECONDS):
+            cache.incr(key)
+
+    def counts(self) -> tuple[int, int]:
+        """최근 window 의 (호출 수, 실패 수)"""
+        buckets = self._buckets()
+        keys = [self._key(f"{kind}:{b}") for kind in ("calls", "failures") for b in buckets]
+        values = cache.get_many(keys)
+        calls = sum(values.get(self._key(f"calls:{b}"), 0) for b in buckets)
+        failures = sum(values.get(self._key(f"failures:{b}"), 0) for b in buckets)
+        return calls, failures
+
+    def _evaluate(self):
+        calls, failures = self.counts()
+        if calls >= settings.PROVIDER_BREAKER_MIN_CALLS and failures / calls >= settings.PROVIDER_BREAKER_FAILURE_RATE:
+            if self.state() == "closed":
+                self._open()
+
+    def _open(self):
+        cooldown = settings.PROVIDER_BREAKER_COOLDOWN
+        # 키가 남아 있는 동안만 open/half_open (오래 방치되면 closed 로 돌아감)
+        cache.set(self._key("open_until"), time.time() + cooldown, cooldown * 10)
+        cache.delete(self._key("probe"))
+        metrics.incr(f"breaker.{self.name}.opened")
+        logger.warning("%s circuit breaker open (%d초)", self.name, cooldown)
+
+    def _close(self):
+        keys = [self._key("open_until"), self._key("probe")]
+        keys += [self._key(f"{kind}:{b}") for kind in ("calls", "failures") for b in self._buckets()]
+        cache.delete_many(keys)
+        logger.info("%s circuit breaker closed", self.name)
+
+    def snapshot(self) -> dict:
+        calls, failures = self.counts()
+        state = self.state()
+        return {
+            "state":       state,
+            "calls":       calls,
+            "failures":    failures,
+            "retry_after": self.retry_after() if state == "open" else None,
+            **metrics.totals([f"breaker.{self.name}.opened", f"breaker.{self.name}.rejected"]),
+        }
+
+
+# 제공자별 breaker (fitting/clients.py 의 동기/비동기 클라이언트가 공유)
+breakers = {name: CircuitBreaker(name) for name in ("bitstudio", "thenewblack")}
@@ -0,0 +1,367 @@
+"""
+외부 AI 제공자(BitStudio, TheNewBlack) 공용 HTTP 클라이언트
+
+- 프로세스당 keep-alive 커넥션 풀 1개 (fork 된 워커는 자체 풀을 새로 만든다)
+- 연결/읽기 타임아웃 통일
+- 연결 오류·429·5xx 는 지수 백오프로 재시도 (POST 는 연결 오류만 재시도)
+- 호출별 지연시간·결과(ok/http_error/error)·응답 바이트·재시도 횟수를 metrics 에 기록
+- 제공자별 circuit breaker (fitting/breaker.py): 장애 중에는 호출 없이 ProviderUnavailable
+- 비동기 클라이언트는 breaker·metrics 기록(캐시 round trip 여러 번)을 스레드에서 처리해 이벤트 루프를 막지 않는다
+"""
+import os, time, asyncio, logging, threading
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from django.conf import settings
+
+from fitting import metrics, webhooks
+from fitting.breaker import breakers, is_failure_status, ProviderUnavailable
+
+logger = logging.getLogger(__name__)
+
+# 피팅 영상 생성 프롬프트
+VIDEO_PROMPT = "A full‑body shot of a professional fashion model gracefully alternating between left and right poses on a minimalist studio background, with soft directional lighting highlighting the contours of the clothing, high resolution, ultra‑realistic detail, while preserving the model’s facial features and the precise fit of the clothing."
+# 피팅 결과 배경 편집(스튜디오 배경) 프롬프트
+STUDIO_BG_PROMPT = "Replace the background with a soft light-gray studio backdrop (#e8e8e8) and add a subtle floor shadow under the model for realism"
+
+
+class ProviderClient:
+    name = "external"
+    base_url = ""
+    ops = ()
+
+    def __init__(self):
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._session = self._build_session()
+                    self._pid = os.getpid()
+        return self._session
+
+    def _build_session(self) -> requests.Session:
+        retry = Retry(
+            total=settings.PROVIDER_MAX_RETRIES,
+            backoff_factor=settings.PROVIDER_RETRY_BACKOFF,
+            status_forcelist=(429, 500, 502, 503, 504),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_maxsize=settings.PROVIDER_POOL_MAXSIZE, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self.default_headers())
+        return session
+
+    def default_headers(self) -> dict:
+        return {}
+
+    def request(self, method, url, op, timeout=None, **kwargs) -> requests.Response:
+        if not url.startswith("http"):
+            url = f"{self.base_url}{url}"
+        timeout = (settings.PROVIDER_CONNECT_TIMEOUT, timeout or settings.PROVIDER_READ_TIMEOUT)
+        breaker = breakers.get(self.name)
+        probe = breaker.before_call() if breaker else False
+
+        start = time.monotonic()
+        outcome, nbytes, retries = "error", 0, 0
+        try:
+            resp = self.session.request(method, url, timeout=timeout, **kwargs)
+        except requests.RequestException:
+            if breaker:
+                breaker.record(False, probe)
+            raise
+        else:
+            if breaker:
+                breaker.record(not is_failure_status(resp.status_code), probe)
+            outcome = "http_error" if resp.status_code >= 400 else "ok"
+            nbytes = _response_bytes(resp, kwargs.get("stream"))
+            # urllib3 Retry 가 재시도한 횟수 (연결 오류·429·5xx)
+            retry = getattr(resp.raw, "retries", None)
+            retries = len(retry.history) if retry else 0
+            return resp
+        finally:
+            elapsed = time.monotonic() - start
+            metrics.provider_call(self.name, op, elapsed, outcome, nbytes, retries)
+            logger.debug("%s %s %s %.0fms", self.name, op, url, elapsed * 1000)
+
+    def get(self, url, op, **kwargs) -> requests.Response:
+        return self.request("GET", url, op, **kwargs)
+
+    def post(self, url, op, **kwargs) -> requests.Response:
+        return self.request("POST", url, op, **kwargs)
+
+    def latency(self) -> dict:
+        return metrics.snapshot([f"provider.{self.name}.{op}" for op in self.ops])
+
+
+def record_call(breaker, probe, ok, provider, op, elapsed, outcome, nbytes=0) -> None:
+    """비동기 클라이언트용 호출 결과 기록 (breaker + metrics, asyncio.to_thread 로 호출)"""
+    if breaker:
+        breaker.record(ok, probe)
+    metrics.provider_call(provider, op, elapsed, outcome, nbytes)
+
+
+def _response_bytes(resp, stream=False) -> int:
+    """응답 본문 크기 (stream 응답은 본문을 읽지 않고 Content-Length 로)"""
+    if stream:
+        return int(resp.headers.get("Content-Length") or 0)
+    return len(resp.content)
+
+
+class BitStudioMixin:
+    """BitStudio 요청 형식 (동기/비동기 클라이언트 공용)"""
+    name = "bitstudio"
+    ops = ("vto_submit", "edit_submit", "poll")
+
+    @property
+    def base_url(self):
+        return settings.BITSTUDIO_BASE_URL
+
+    def default_headers(self):
+        return {"Authorization": f"Bearer {os.getenv('BITSTUDIO_API_KEY')}"}
+
+    def _vto_json(self, person_url, outfit_url, prompt, resolution, style) -> dict:
+        return {
+            "person_image_url":  person_url,
+            "outfit_image_url":  outfit_url,
+            "prompt":            prompt,
+            "resolution":        resolution,
+            "num_images":        1,
+            "style":             style,
+            **self._webhook(),
+        }
+
+    def _edit_json(self, prompt, seed, resolution) -> dict:
+        return {
+            "prompt":      prompt,
+            "resolution":  resolution,
+            "num_images":  1,
+            "seed":        seed,
+            **self._webhook(),
+        }
+
+    def _webhook(self) -> dict:
+        url = webhooks.callback_url(self.name)
+        return {"webhook_url": url} if url else {}
+
+    @staticmethod
+    def edit_version(data) -> dict:
+        """
+        편집 응답에서 새로 만들어진 버전 (version_type 이 edit | edited 인 항목)
+        version_type 을 주지 않는 응답이면 첫 번째 버전, 없으면 KeyError / IndexError
+        """
+        versions = data["versions"]
+        edited = [v for v in versions if v.get("version_type") in ("edit", "edited")]
+        return (edited or versions)[0]
+
+
+class BitStudioClient(BitStudioMixin, ProviderClient):
+
+    def submit_vto(self, person_url, outfit_url, prompt, resolution="standard", style="studio") -> str:
+        """VTO 작업 제출 → 이미지 ID"""
+        r = self.post(
+            "/images/virtual-try-on", "vto_submit",
+            json=self._vto_json(person_url, outfit_url, prompt, resolution, style),
+            timeout=60,
+        )
+        r.raise_for_status()
+        return r.json()[0]["id"]
+
+    def submit_edit(self, image_id, prompt, seed, resolution="standard") -> requests.Response:
+        """이미지 편집 요청 (응답 해석은 호출하는 쪽에서)"""
+        return self.post(
+            f"/images/{image_id}/edit", "edit_submit",
+            json=self._edit_json(prompt, seed, resolution),
+            timeout=60,
+        )
+
+    def get_status(self, url) -> dict:
+        return self.get(url, "poll", timeout=10).json()
+
+
+class AsyncProviderClient:
+    """
+    ASGI 뷰·asyncio 실행 엔진용 httpx.AsyncClient 래퍼 (ProviderClient 와 같은 타임아웃·재시도·지연시간 기록)
+    AsyncClient 는 이벤트 루프에 묶이므로 루프마다 1개씩 만든다.
+    limits: 커넥션 수 제한 (기본 PROVIDER_POOL_MAXSIZE, 엔진은 배치의 동시 진행 수로 제한)
+    """
+    name = "external"
+    base_url = ""
+
+    def __init__(self, limits=None):
+        self._clients = {}
+        self.limits = limits
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if loop not in self._clients:
+            self._clients = {l: c for l, c in self._clients.items() if not l.is_closed()}
+            self._clients[loop] = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers=self.default_headers(),
+                timeout=httpx.Timeout(settings.PROVIDER_READ_TIMEOUT, connect=settings.PROVIDER_CONNECT_TIMEOUT),
+                limits=self.limits or httpx.Limits(max_connections=settings.PROVIDER_POOL_MAXSIZE),
+                transport=httpx.AsyncHTTPTransport(retries=settings.PROVIDER_MAX_RETRIES),
+            )
+        return self._clients[loop]
+
+    def default_headers(self) -> dict:
+        return {}
+
+    async def request(self, method, url, op, **kwargs) -> httpx.Response:
+        breaker = breakers.get(self.name)
+        probe = await asyncio.to_thread(breaker.before_call) if breaker else False
+
+        start = time.monotonic()
+        try:
+            resp = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError:
+            await asyncio.to_thread(record_call, breaker, probe, False, self.name, op, time.monotonic() - start, "error")
+            raise
+        outcome = "http_error" if resp.status_code >= 400 else "ok"
+        await asyncio.to_thread(
+            record_call, breaker, probe, not is_failure_status(resp.status_code),
+            self.name, op, time.monotonic() - start, outcome, len(resp.content),
+        )
+        return resp
+
+    async def get(self, url, op, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, op, **kwargs)
+
+    async def post(self, url, op, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, op, **kwargs)
+
+    async def aclose(self):
+        """현재 이벤트 루프의 클라이언트를 닫는다 (asyncio.run 으로 루프를 매번 새로 만드는 경우)"""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.aclose()
+
+
+class TheNewBlackMixin:
+    name = "thenewblack"
+    ops = ("video_submit", "video_result")
+
+    @property
+    def base_url(self):
+        return settings.THENEWBLACK_BASE_URL
+
+    def _credentials(self):
+        return {
+            'email':    (None, os.getenv("TNB_EMAIL")),
+            'password': (None, os.getenv("TNB_PASSWORD")),
+        }
+
+    def _video_form(self, image_url, prompt):
+        # 값이 없는 필드는 requests 는 건너뛰지만 httpx 는 오류가 나므로 미리 제외
+        form = {
+            **self._credentials(),
+            'image':       (None, image_url),
+            'prompt':      (None, prompt),
+            'webhook_url': (None, webhooks.callback_url(self.name)),
+        }
+        return {k: v for k, v in form.items() if v[1] is not None}
+
+
+class TheNewBlackClient(TheNewBlackMixin, ProviderClient):
+
+    def submit_video(self, image_url, prompt) -> requests.Response:
+        return self.post("/ai-video", "video_submit", files=self._video_form(image_url, prompt), timeout=60)
+
+    def get_video_result(self, task_id) -> requests.Response:
+        return self.post(
+            "/results_video", "video_result",
+            files={**self._credentials(), 'id': (None, task_id)},
+            timeout=30,
+        )
+
+    def get_video_status(self, task_id) -> dict:
+        """영상 결과 조회를 BitStudio 상태 응답과 같은 형식으로 → {"status": "completed", "path": 영상 주소} | {}"""
+        resp = self.get_video_result(task_id)
+        detail = resp.text.strip() if resp.status_code == 200 else ""
+        return {"status": "completed", "path": detail} if detail.startswith("http") else {}
+
+
+class DownloadClient(ProviderClient):
+    """제공자가 돌려준 결과 파일(이미지/영상) 다운로드용"""
+    name = "download"
+    ops = ("image", "video")
+
+
+class AsyncTheNewBlackClient(TheNewBlackMixin, AsyncProviderClient):
+
+    async def submit_video(self, image_url, prompt) -> httpx.Response:
+        return await self.post("/ai-video", "video_submit", files=self._video_form(image_url, prompt), timeout=60)
+
+
+class AsyncBitStudioClient(BitStudioMixin, AsyncProviderClient):
+    """asyncio 실행 엔진(fitting/engine.py)용, 완료는 엔진이 직접 폴링해 확인한다"""
+
+    def _webhook(self) -> dict:
+        # 엔진은 ProviderJob 을 만들지 않으므로 완료 webhook 을 받을 곳이 없다
+        return {}
+
+    async def submit_vto(self, person_url, outfit_url, prompt, resolution="standard", style="studio") -> str:
+        """VTO 작업 제출 → 이미지 ID"""
+        r = await self.post(
+            "/images/virtual-try-on", "vto_submit",
+            json=self._vto_json(person_url, outfit_url, prompt, resolution, style),
+            timeout=60,
+        )
+        r.raise_for_status()
+        return r.json()[0]["id"]
+
+    async def submit_edit(self, image_id, prompt, seed, resolution="standard") -> str:
+        """이미지 편집 요청 → 상태 조회 주소"""
+        r = await self.post(f"/images/{image_id}/edit", "edit_submit", json=self._edit_json(prompt, seed, resolution), timeout=60)
+        r.raise_for_status()
+        ver = self.edit_version(r.json())
+        if ver.get("source_image_id"):
+            return f"/images/{ver['source_image_id']}"
+        return f"/images/versions/{ver['id']}"
+
+    async def wait(self, poll_url, max_polls, poll_interval) -> str | None:
+        """완료될 때까지 폴링 → 결과 path | None (실패 또는 max_polls 초과)"""
+        for _ in range(max_polls):
+            await asyncio.sleep(poll_interval)
+            try:
+                info = (await self.get(poll_url, "poll", timeout=10)).json()
+            except ProviderUnavailable:
+                # breaker 가 열림 → 작업은 제공자 쪽에서 계속 진행 중이므로 버리지 않고 다음 주기에 다시 확인
+                continue
+            except (httpx.HTTPError, ValueError):
+                logger.warning("상태 조회 실패: %s", poll_url, exc_info=True)
+                continue
+            if info.get("status") == "completed" and info.get("path"):
+                return info["path"]
+            if info.get("status") == "failed":
+                return None
+        logger.warning("상태 조회 시간 초과: %s", poll_url)
+        return None
+
+
+class AsyncDownloadClient(AsyncProviderClient):
+    """결과 파일 다운로드용 (BitStudio 인증 헤더를 외부 CDN 에 보내지 않도록 분리)"""
+    name = "download"
+
+
+bitstudio = BitStudioClient()
+thenewblack = TheNewBlackClient()
+downloads = DownloadClient()
+async_thenewblack = AsyncTheNewBlackClient()
+
+
+def latency_snapshot() -> dict:
+    snapshot = {}
+    for client in (bitstudio, thenewblack, downloads):
+        snapshot.update(client.latency())
+    return snapshot
@@ -0,0 +1,160 @@
+"""
+피팅 결과 이미지의 임의 크기 파생본 (on-demand resize)
+
+조회 순서
+1) 로컬 디스크 LRU 캐시 (IMAGE_DERIVATIVE_CACHE_DIR, 최대 IMAGE_DERIVATIVE_CACHE_MAX_BYTES)
+2) 저장소(S3)의 derivatives/ 에 이미 만들어 둔 파생본 → 디스크에 채움
+3) 원본을 읽어 리사이즈 → 저장소에 write-through + 디스크에 저장
+키는 (원본 URL, 폭, 포맷) 해시라 원본이 바뀌면 새 키가 된다.
+"""
+import os, hashlib, logging, tempfile, threading
+from pathlib import Path
+from django.conf import settings
+
+from config import images
+from config.storage import storage, content_type_for
+from fitting import metrics
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"webp": "webp", "jpeg": "jpg"}   # 요청 포맷 → 확장자
+
+
+class DiskLRU:
+    """
+    파일 1개 = 항목 1개, 마지막 사용 시각은 mtime 으로 기록
+    전체 크기가 한도를 넘으면 오래 사용하지 않은 파일부터 지운다 (여러 프로세스가 같은 디렉터리를 써도 안전)
+    """
+
+    def __init__(self, root=None, max_bytes=None):
+        self._root = root
+        self._max_bytes = max_bytes
+        self._size = None          # 이 프로세스가 알고 있는 전체 크기 (한도 초과 시 다시 계산)
+        self._lock = threading.Lock()
+
+    @property
+    def root(self) -> Path:
+        return Path(self._root or settings.IMAGE_DERIVATIVE_CACHE_DIR)
+
+    @property
+    def max_bytes(self) -> int:
+        return self._max_bytes or settings.IMAGE_DERIVATIVE_CACHE_MAX_BYTES
+
+    def _path(self, key) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key) -> bytes | None:
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass   # 읽은 직후 다른 프로세스가 삭제
+        return data
+
+    def set(self, key, data: bytes):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # 임시 파일에 쓴 뒤 교체 → 읽는 쪽이 반쯤 쓰인 파일을 보지 않음
+        fd, tmp = tempfile.mkstemp(dir=path.parent)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()[1]
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._size = self._evict()
+
+    def _scan(self):
+        entries, total = [], 0
+        for path in self.root.glob("*/*"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.name.startswith("tmp"):
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+        return entries, total
+
+    def _evict(self) -> int:
+        """한도의 90% 까지 줄이고 남은 전체 크기 반환"""
+        entries, total = self._scan()
+        target = self.max_bytes * 0.9
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            metrics.incr("image_derivative.evicted")
+        return total
+
+    def stats(self) -> dict:
+        entries, total = self._scan()
+        return {"entries": len(entries), "bytes": total, "max_bytes": self.max_bytes}
+
+
+disk_cache = DiskLRU()
+
+
+def snap_width(width: int) -> int:
+    """캐시 항목 수가 폭 수만큼 늘지 않도록 IMAGE_RESIZE_WIDTH_STEP 단위로 올림"""
+    step = settings.IMAGE_RESIZE_WIDTH_STEP
+    width = max(step, min(width, settings.IMAGE_MAX_DIMENSION))
+    return -(-width // step) * step
+
+
+def derivative_key(source_url, width, fmt) -> str:
+    return hashlib.sha256(f"{source_url}\0{width}\0{fmt}".encode()).hexdigest()
+
+
+def get_derivative(source_url: str, width: int, fmt: str = "webp") -> tuple[bytes, str] | None:
+    """
+    (이미지 바이트, Content-Type) | None (우리 저장소의 원본이 아니거나 원본이 없음)
+    이미지가 아니면 images.InvalidImage
+    """
+    source_key = storage.key_for(source_url)
+    if not source_key:
+        return None
+    ext = FORMATS[fmt]
+    key = derivative_key(source_url, width, fmt)
+    content_type = content_type_for(ext)
+
+    data = disk_cache.get(key)
+    if data is not None:
+        metrics.incr("image_derivative.disk_hit")
+        return data, content_type
+
+    stored_key = f"derivatives/{key[:2]}/{key}.{ext}"
+    data = storage.read(stored_key)
+    if data is not None:
+        metrics.incr("image_derivative.storage_hit")
+    else:
+        source = storage.read(source_key)
+        if source is None:
+            return None
+        metrics.incr("image_derivative.miss")
+        data = images.resize(source, width, fmt)
+        storage.put(stored_key, data, ext)
+
+    disk_cache.set(key, data)
+    return data, content_type
+
+
+def stats() -> dict:
+    counters = metrics.totals([
+        "image_derivative.disk_hit", "image_derivative.storage_hit",
+        "image_derivative.miss", "image_derivative.evicted",
+    ])
+    return {**counters, "disk": disk_cache.stats()}
@@ -0,0 +1,196 @@
+"""
+외부 제공자(BitStudio, TheNewBlack) 로컬 에뮬레이터
+
+실제 크레딧을 쓰지 않고 피팅 파이프라인 처리량을 측정하기 위한 대역 서버.
+BITSTUDIO_BASE_URL / THENEWBLACK_BASE_URL 을 이 서버 주소로 바꿔 웹·워커를 실행한다.
+
+BitStudio
+- POST /images/virtual-try-on      → [{"id", "status": "pending"}]
+- POST /images/{id}/edit           → {"versions": [{"id", "version_type": "edited", "source_image_id": null}]}
+- GET  /images/{id}                → {"id", "status": pending | completed | failed, "path"}
+- GET  /images/versions/{id}       → 동일
+TheNewBlack (경로 끝만 맞으면 됨)
+- POST .../ai-video                → task_id (text)
+- POST .../results_video (id=...)  → 완료 시 영상 주소, 아니면 빈 문자열
+공용
+- GET  /files/{name}               → 이름별로 다른 PNG (.mp4 는 더미 영상)
+- GET  /_stats                     → 요청·작업 집계
+
+응답 지연(latency), 작업 완료 시간(completion ± jitter), 작업 실패율(failure_rate),
+제출 5xx 비율(error_rate)을 조절할 수 있다. 제출 시 webhook_url 을 받으면 완료 시점에
+PROVIDER_WEBHOOK_SECRETS 로 서명한 webhook 을 보낸다.
+"""
+import io, re, json, time, uuid, random, hashlib, logging, threading
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse
+import requests
+from PIL import Image
+
+from fitting import webhooks
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderEmulator:
+
+    def __init__(self, base_url, latency=0.05, completion=5.0, jitter=0.3, failure_rate=0.0, error_rate=0.0):
+        self.base_url = base_url.rstrip("/")
+        self.latency = latency
+        self.completion = completion
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.error_rate = error_rate
+        # 실행마다 이미지 내용이 달라지도록 (이전 실행의 VTO 캐시에 걸리지 않게)
+        self.salt = uuid.uuid4().hex
+        self.jobs = {}
+        self.stats = Counter()
+        self._files = {}
+        self._lock = threading.Lock()
+
+    # ---- 작업 ----
+    def new_job(self, provider, webhook_url=None) -> str:
+        job_id = uuid.uuid4().hex
+        duration = self.completion * random.uniform(1 - self.jitter, 1 + self.jitter)
+        failed = random.random() < self.failure_rate
+        with self._lock:
+            self.jobs[job_id] = {"provider": provider, "ready_at": time.monotonic() + duration, "failed": failed}
+            self.stats[f"jobs.{provider}"] += 1
+        if webhook_url:
+            timer = threading.Timer(duration, self._send_webhook, (job_id, webhook_url))
+            timer.daemon = True
+            timer.start()
+        return job_id
+
+    def status(self, job_id) -> dict | None:
+        job = self.jobs.get(job_id)
+        if job is None:
+            return None
+        if time.monotonic() < job["ready_at"]:
+            return {"id": job_id, "status": "pending"}
+        if job["failed"]:
+            return {"id": job_id, "status": "failed"}
+        ext = "mp4" if job["provider"] == "thenewblack" else "png"
+        return {"id": job_id, "status": "completed", "path": f"{self.base_url}/files/{job_id}.{ext}"}
+
+    def _send_webhook(self, job_id, url):
+        info = self.status(job_id)
+        provider = self.jobs[job_id]["provider"]
+        payload = {"id": job_id, "status": info["status"]}
+        payload["video_url" if provider == "thenewblack" else "path"] = info.get("path")
+        body = json.dumps(payload).encode()
+        try:
+            requests.post(url, data=body, headers=webhooks.signed_headers(provider, body), timeout=10)
+            self._count("webhooks.sent")
+        except (requests.RequestException, KeyError):
+            logger.warning("webhook 전송 실패: %s", url, exc_info=True)
+            self._count("webhooks.failed")
+
+    # ---- 파일 ----
+    def file(self, name) -> tuple[bytes, str]:
+        if name.endswith(".mp4"):
+            return b"\x00\x00\x00\x18ftypmp42" + b"\x00" * 64_000, "video/mp4"
+        if name not in self._files:
+            digest = hashlib.sha256(f"{self.salt}:{name}".encode()).digest()
+            buf = io.BytesIO()
+            Image.new("RGB", (512, 768), tuple(digest[:3])).save(buf, "PNG")
+            self._files[name] = buf.getvalue()
+        return self._files[name], "image/png"
+
+    def _count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            stats = dict(self.stats)
+        now = time.monotonic()
+        pending = sum(1 for job in list(self.jobs.values()) if job["ready_at"] > now)
+        return {**stats, "jobs.pending": pending}
+
+    # ---- HTTP ----
+    def handler(self):
+        emulator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive (클라이언트 커넥션 풀 재사용)
+
+            def log_message(self, fmt, *args):
+                logger.debug(fmt, *args)
+
+            def do_GET(self):
+                emulator._handle(self, "GET")
+
+            def do_POST(self):
+                emulator._handle(self, "POST")
+
+        return Handler
+
+    def _handle(self, req, method):
+        path = urlparse(req.path).path
+        length = int(req.headers.get("Content-Length") or 0)
+        body = req.rfile.read(length) if length else b""
+        time.sleep(self.latency * random.uniform(0.5, 1.5))
+
+        route, status, payload = self._route(method, path, body)
+        self._count(f"requests.{route}")
+        if isinstance(payload, tuple):
+            data, content_type = payload
+        elif isinstance(payload, str):
+            data, content_type = payload.encode(), "text/plain; charset=utf-8"
+        else:
+            data, content_type = json.dumps(payload).encode(), "application/json"
+
+        req.send_response(status)
+        req.send_header("Content-Type", content_type)
+        req.send_header("Content-Length", str(len(data)))
+        req.end_headers()
+        req.wfile.write(data)
+
+    def _submit_failed(self):
+        return random.random() < self.error_rate
+
+    def _route(self, method, path, body):
+        if method == "GET" and path.startswith("/files/"):
+            return "file", 200, self.file(path.rsplit("/", 1)[-1])
+        if method == "GET" and path == "/_stats":
+            return "stats", 200, self.snapshot()
+
+        if method == "POST" and path == "/images/virtual-try-on":
+            if self._submit_failed():
+                return "vto_submit", 500, {"error": "emulated failure"}
+            data = json.loads(body or b"{}")
+            return "vto_submit", 200, [{"id": self.new_job("bitstudio", data.get("webhook_url")), "status": "pending"}]
+
+        match = re.fullmatch(r"/images/([^/]+)/edit", path)
+        if method == "POST" and match:
+            if self._submit_failed():
+                return "edit_submit", 500, {"error": "emulated failure"}
+            data = json.loads(body or b"{}")
+            return "edit_submit", 200, {"versions": [{"id": self.new_job("bitstudio", data.get("webhook_url")), "version_type": "edited", "source_image_id": None}]}
+
+        match = re.fullmatch(r"/images/(?:versions/)?([^/]+)", path)
+        if method == "GET" and match:
+            info = self.status(match.group(1))
+            return ("poll", 200, info) if info else ("poll", 404, {"error": "not found"})
+
+        if method == "POST" and path.endswith("/ai-video"):
+            if self._submit_failed():
+                return "video_submit", 500, "emulated failure"
+            return "video_submit", 200, self.new_job("thenewblack", _form_field(body, "webhook_url"))
+        if method == "POST" and path.endswith("/results_video"):
+            info = self.status(_form_field(body, "id") or "") or {}
+            return "video_result", 200, info.get("path") or ""
+
+        return "unknown", 404, {"error": f"{method} {path}"}
+
+    def serve(self, host, port):
+        server = ThreadingHTTPServer((host, port), self.handler())
+        server.daemon_threads = True
+        return server
+
+
+def _form_field(body: bytes, name: str) -> str | None:
+    """multipart/form-data 본문에서 텍스트 필드 1개 추출"""
+    match = re.search(rb'name="' + name.encode() + rb'"\r\n(?:[^\r\n]*\r\n)*\r\n(.*?)\r\n--', body, re.S)
+    return match.group(1).decode() if match else None
@@ -0,0 +1,130 @@
+"""
+asyncio 기반 피팅 실행 엔진
+
+사용자 1명의 상품 전체 fan-out 을 워커 태스크 1개 안에서 코루틴으로 동시에 처리한다.
+(제출 → 폴링 → [배경 편집 → 폴링] → 다운로드 → S3 업로드 → DB 저장)
+대부분이 HTTP 대기 시간이므로 prefork 슬롯 1개로 수십 건을 함께 진행할 수 있다.
+"""
+import asyncio, logging
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from fitting import vto_cache, progress
+from fitting.clients import AsyncBitStudioClient, AsyncDownloadClient, STUDIO_BG_PROMPT
+from fitting.models import FittingResult
+from fitting.utils import upload_fitting_image_to_s3
+
+logger = logging.getLogger(__name__)
+
+
+class RenderFailed(Exception):
+    pass
+
+
+class AsyncProvider:
+    """
+    배치 1개가 쓰는 비동기 클라이언트 묶음 (fitting/clients.py)
+    커넥션 수는 배치의 동시 진행 수로 제한하고, 배치가 끝나면 닫는다.
+    """
+
+    def __init__(self, concurrency):
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        self.bitstudio = AsyncBitStudioClient(limits=limits)
+        # 결과 다운로드(외부 CDN)에는 BitStudio 인증 헤더를 보내지 않도록 클라이언트를 나눈다
+        self.downloads = AsyncDownloadClient(limits=limits)
+
+    async def aclose(self):
+        await self.bitstudio.aclose()
+        await self.downloads.aclose()
+
+    async def wait(self, poll_url, max_polls, poll_interval) -> str:
+        """완료될 때까지 폴링 → 결과 path"""
+        path = await self.bitstudio.wait(poll_url, max_polls, poll_interval)
+        if not path:
+            raise RenderFailed(f"{poll_url} failed")
+        return path
+
+    async def download(self, url) -> bytes:
+        r = await self.downloads.get(url, "image", timeout=30)
+        r.raise_for_status()
+        return r.content
+
+
+def _save_result(user_id, product_id, s3_url, source_image):
+    FittingResult.objects.update_or_create(
+        user_id=user_id,
+        product_id=product_id,
+        defaults={"image": s3_url, "source_image": source_image},
+    )
+
+
+async def render_product(provider, sem, user_id, person_url, product_id, outfit_url, prompt, detail, fitting_job_id=None, person_digest=None):
+    try:
+        s3_url = await _render_product(provider, sem, user_id, person_url, product_id, outfit_url, prompt, detail, fitting_job_id, person_digest)
+    except BaseException:
+        await sync_to_async(progress.mark)(fitting_job_id, product_id, "failed")
+        raise
+    await sync_to_async(progress.mark)(fitting_job_id, product_id, "done")
+    return s3_url
+
+
+async def _render_product(provider, sem, user_id, person_url, product_id, outfit_url, prompt, detail, fitting_job_id, person_digest):
+    cache_key = None
+    if not detail:
+        # 같은 입력으로 렌더링한 결과가 있으면 재사용
+        cache_key = await asyncio.to_thread(vto_cache.make_key, person_url, outfit_url, prompt, person_digest=person_digest)
+        cached = await sync_to_async(vto_cache.lookup)(cache_key)
+        if cached:
+            await sync_to_async(_save_result)(user_id, product_id, cached, outfit_url)
+            return cached
+
+    async with sem:
+        await sync_to_async(progress.mark)(fitting_job_id, product_id, "in_flight")
+        image_id = await provider.bitstudio.submit_vto(person_url, outfit_url, prompt)
+        path = await provider.wait(f"/images/{image_id}", max_polls=30, poll_interval=2)
+
+        if detail:
+            poll_url = await provider.bitstudio.submit_edit(image_id, STUDIO_BG_PROMPT, seed=42)
+            path = await provider.wait(poll_url, max_polls=36, poll_interval=5)
+
+        img_bytes = await provider.download(path)
+
+    # S3 업로드는 boto3(동기) → 스레드, DB 저장은 Django ORM 전용 스레드에서
+    s3_url = await asyncio.to_thread(
+        upload_fitting_image_to_s3, user_id=user_id, product_id=product_id, image_data=img_bytes
+    )
+    await sync_to_async(vto_cache.store)(cache_key, s3_url)
+    await sync_to_async(_save_result)(user_id, product_id, s3_url, outfit_url)
+    return s3_url
+
+
+async def run_fitting_batch(user_id, person_url, items, prompt, detail=False, concurrency=None, fitting_job_id=None):
+    """
+    items: [(product_id, outfit_url), ...]
+    상품별 렌더링을 동시에 진행하고 {product_id: s3_url | None} 반환
+    동시 진행 수는 concurrency (기본 FITTING_ASYNC_CONCURRENCY) 로 제한
+    """
+    concurrency = concurrency or settings.FITTING_ASYNC_CONCURRENCY
+    sem = asyncio.Semaphore(concurrency)
+    provider = AsyncProvider(concurrency)
+    # 사람 사진 다이제스트는 상품마다 다시 구하지 않도록 한 번만 (상세 피팅은 캐시를 쓰지 않음)
+    person_digest = None if detail else await asyncio.to_thread(vto_cache.try_digest, person_url)
+    try:
+        outcomes = await asyncio.gather(
+            *[
+                render_product(provider, sem, user_id, person_url, product_id, outfit_url, prompt, detail, fitting_job_id, person_digest)
+                for product_id, outfit_url in items
+            ],
+            return_exceptions=True,
+        )
+    finally:
+        await provider.aclose()
+
+    results = {}
+    for (product_id, _), outcome in zip(items, outcomes):
+        if isinstance(outcome, BaseException):
+            logger.warning("상품 %s 피팅 실패: %r", product_id, outcome)
+            outcome = None
+        results[product_id] = outcome
+    return results
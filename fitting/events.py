@@ -0,0 +1,164 @@
+"""
+사용자별 피팅·영상 상태 이벤트 pub/sub (SSE 스트림용)
+
+- 태스크는 publish() 로 상태 변화를 알리고, 웹 프로세스의 SSE 연결은 subscribe() 로 받는다.
+- REDIS_URL 이 있으면 Redis pub/sub 채널 fitting:events:{user_id} 로 워커 → 웹 프로세스에 전달한다.
+  웹 프로세스는 패턴 구독 1개(백그라운드 스레드)로 받아 프로세스 안의 연결들에 나눠주므로
+  SSE 연결 수만큼 Redis 커넥션이 늘지 않는다.
+- 없으면 프로세스 내 broker 가 바로 전달 (개발/테스트, eager 실행용 대역)
+발행 실패는 태스크를 막지 않는다.
+"""
+import json, time, asyncio, logging, threading
+from collections import defaultdict
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "fitting:events:"
+
+
+class Subscription:
+    """
+    연결 1개의 이벤트 대기열 (연결을 처리하는 이벤트 루프의 asyncio.Queue)
+    broker·Redis 수신 스레드에서 넣으므로 루프에 넘겨서 넣는다.
+    """
+
+    def __init__(self, user_id, loop, maxsize=100):
+        self.user_id = user_id
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize)
+
+    def push(self, message: str):
+        try:
+            self._loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:
+            pass   # 연결이 끝나 이벤트 루프가 닫힘
+
+    def _put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # 느린 클라이언트 → 오래된 이벤트 대신 새 이벤트를 버린다 (재접속 시 snapshot 으로 복구)
+            logger.debug("SSE 대기열 가득 참: user %s", self.user_id)
+
+    async def aget(self, timeout) -> str | None:
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        broker.unsubscribe(self)
+
+
+class Broker:
+
+    def __init__(self):
+        self._subs = defaultdict(set)
+        self._lock = threading.Lock()
+        self._listener = None
+
+    def subscribe(self, user_id, loop) -> Subscription:
+        if settings.REDIS_URL:
+            self._ensure_listener()
+        sub = Subscription(user_id, loop)
+        with self._lock:
+            self._subs[user_id].add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            subs = self._subs.get(sub.user_id)
+            if subs:
+                subs.discard(sub)
+                if not subs:
+                    del self._subs[sub.user_id]
+
+    def dispatch(self, user_id, message: str):
+        with self._lock:
+            subs = list(self._subs.get(user_id, ()))
+        for sub in subs:
+            sub.push(message)
+
+    def connections(self) -> int:
+        with self._lock:
+            return sum(len(subs) for subs in self._subs.values())
+
+    # ---- Redis → 프로세스 내 연결 ----
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="fitting-events", daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        import redis
+        while True:
+            try:
+                pubsub = redis.Redis.from_url(settings.REDIS_URL).pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                for msg in pubsub.listen():
+                    user_id = int(msg["channel"].decode().removeprefix(CHANNEL_PREFIX))
+                    self.dispatch(user_id, msg["data"].decode())
+            except Exception:
+                logger.warning("이벤트 구독 연결 끊김, 재연결합니다.", exc_info=True)
+                time.sleep(1)
+
+
+broker = Broker()
+_redis = None
+
+
+def _redis_client():
+    global _redis
+    if _redis is None:
+        import redis
+        _redis = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis
+
+
+def publish(user_id, event: str, data: dict):
+    """event: fitting | fitting.finished | video"""
+    if not user_id:
+        return
+    message = json.dumps({"event": event, "data": data}, ensure_ascii=False)
+    try:
+        if settings.REDIS_URL:
+            _redis_client().publish(f"{CHANNEL_PREFIX}{user_id}", message)
+        else:
+            broker.dispatch(user_id, message)
+    except Exception:
+        logger.warning("상태 이벤트 발행 실패: user %s %s", user_id, event, exc_info=True)
+
+
+def subscribe(user_id, loop) -> Subscription:
+    """
+    loop: 연결을 처리하는 이벤트 루프
+    Redis 수신 스레드를 시작할 수 있으므로 이벤트 루프 밖(sync_to_async)에서 호출한다.
+    """
+    return broker.subscribe(user_id, loop)
+
+
+# ---- SSE 응답 본문 ----
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+def _format_message(message: str) -> str:
+    payload = json.loads(message)
+    return format_sse(payload["event"], payload["data"])
+
+
+async def astream(sub: Subscription, snapshot: dict):
+    """
+    SSE 본문 (ASGI 배포 전용, 대기 중인 연결은 이벤트 루프만 사용)
+    SSE_MAX_DURATION 이 지나면 끊고 클라이언트(EventSource)가 retry 뒤 재접속해 snapshot 부터 다시 받는다.
+    """
+    try:
+        yield f"retry: {settings.SSE_RETRY_MS}\n" + format_sse("snapshot", snapshot)
+        deadline = time.monotonic() + settings.SSE_MAX_DURATION
+        while time.monotonic() < deadline:
+            message = await sub.aget(timeout=settings.SSE_HEARTBEAT_INTERVAL)
+            yield _format_message(message) if message else ": keep-alive\n\n"
+    finally:
+        sub.close()
@@ -0,0 +1,111 @@
+"""
+WSGI / ASGI 배포 비교 벤치마크
+
+같은 엔드포인트를 두 배포(예: sync gunicorn :8000, gunicorn+uvicorn :8001)에 동시 요청 N 개로 보내
+처리량(req/s)과 지연시간 분포를 비교한다.
+
+    python manage.py benchmark_server \\
+        --target wsgi=http://localhost:8000 --target asgi=http://localhost:8001 \\
+        --path /api/v1/products/ --path /api/v1/fittings/jobs/current \\
+        --concurrency 100 --requests 2000 --token <JWT access token>
+"""
+import asyncio, statistics, time
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def _run(base_url, path, method, total, concurrency, headers, body):
+    latencies, errors = [], 0
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async with httpx.AsyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=httpx.Timeout(300, connect=10),
+        limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+    ) as client:
+
+        async def worker():
+            nonlocal errors
+            while True:
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                start = time.perf_counter()
+                try:
+                    resp = await client.request(method, path, json=body)
+                    if resp.status_code >= 500:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - start
+
+    return {
+        "requests": total,
+        "errors":   errors,
+        "rps":      round(total / elapsed, 1),
+        "mean_ms":  round(statistics.fmean(latencies), 1) if latencies else None,
+        "p50_ms":   round(_percentile(latencies, 50), 1) if latencies else None,
+        "p95_ms":   round(_percentile(latencies, 95), 1) if latencies else None,
+        "p99_ms":   round(_percentile(latencies, 99), 1) if latencies else None,
+    }
+
+
+class Command(BaseCommand):
+    help = "WSGI / ASGI 배포에 같은 부하를 보내 처리량·지연시간을 비교합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--target", action="append", required=True,
+                            help="이름=기본 URL (예: wsgi=http://localhost:8000), 여러 번 지정")
+        parser.add_argument("--path", action="append", default=None,
+                            help="요청 경로, 여러 번 지정 (기본 /api/v1/products/)")
+        parser.add_argument("--method", default="GET")
+        parser.add_argument("--json", default=None, help="요청 본문 (JSON 문자열)")
+        parser.add_argument("--requests", type=int, default=500, help="경로당 전체 요청 수")
+        parser.add_argument("--concurrency", type=int, default=50, help="동시 요청 수")
+        parser.add_argument("--token", default=None, help="JWT access token (Authorization: Bearer)")
+        parser.add_argument("--warmup", type=int, default=20, help="측정 전 워밍업 요청 수")
+
+    def handle(self, *args, **opts):
+        import json
+
+        targets = []
+        for target in opts["target"]:
+            name, sep, url = target.partition("=")
+            if not sep:
+                raise CommandError(f"--target 은 이름=URL 형식이어야 합니다: {target}")
+            targets.append((name, url.rstrip("/")))
+        paths = opts["path"] or ["/api/v1/products/"]
+        headers = {"Authorization": f"Bearer {opts['token']}"} if opts["token"] else {}
+        body = json.loads(opts["json"]) if opts["json"] else None
+
+        rows = []
+        for path in paths:
+            for name, url in targets:
+                if opts["warmup"]:
+                    asyncio.run(_run(url, path, opts["method"], opts["warmup"], min(opts["warmup"], opts["concurrency"]), headers, body))
+                result = asyncio.run(_run(url, path, opts["method"], opts["requests"], opts["concurrency"], headers, body))
+                rows.append((path, name, result))
+                self.stdout.write(f"{path} [{name}] {result}")
+
+        self.stdout.write("")
+        self.stdout.write(f"{'path':<40} {'target':<8} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err':>5}")
+        for path, name, r in rows:
+            self.stdout.write(
+                f"{path:<40} {name:<8} {r['rps']:>8} {r['p50_ms'] or '-':>8} {r['p95_ms'] or '-':>8} {r['p99_ms'] or '-':>8} {r['errors']:>5}"
+            )
@@ -0,0 +1,171 @@
+"""
+피팅 파이프라인 end-to-end 부하 테스트
+
+사용자 N 명 × 상품 M 개를 만들어 사용자마다 가상 피팅(ProductFittingGenerateView)을 요청하고,
+모든 작업이 끝날 때까지 기다려 완료 시간·워커 점유율·DB 쿼리 수를 보고한다.
+외부 제공자는 로컬 에뮬레이터로 대신한다 (python manage.py provider_emulator).
+
+    python manage.py provider_emulator --completion 8 &
+    BITSTUDIO_BASE_URL=http://localhost:9000 celery -A config worker -Q default,fitting.interactive,fitting.poll,fitting.bulk,fitting.edit,fitting.persist &
+    BITSTUDIO_BASE_URL=http://localhost:9000 python manage.py fitting_load_test \\
+        --users 20 --products 30 --emulator http://localhost:9000 --drive-sweep --cleanup
+
+워커의 태스크 통계는 TASK_STATS_ENABLED 로 공용 캐시(Redis)에 쌓이므로 같은 REDIS_URL 로 실행한다.
+"""
+import time, uuid, statistics
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from config.celery import app
+from fitting import progress, task_stats
+from fitting.tasks import sweep_provider_jobs
+from product import catalogue
+from product.models import Category, Product
+from user.models import User
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))], 1)
+
+
+def _worker_slots():
+    """실행 중인 워커들의 동시 실행 슬롯 합계 | None (응답 없음, eager 실행)"""
+    if app.conf.task_always_eager:
+        return None
+    try:
+        stats = app.control.inspect(timeout=2).stats() or {}
+    except Exception:
+        return None
+    return sum(worker.get("pool", {}).get("max-concurrency", 0) for worker in stats.values()) or None
+
+
+class Command(BaseCommand):
+    help = "에뮬레이터를 대상으로 사용자 N 명 × 상품 M 개 가상 피팅을 실행하고 처리 성능을 보고합니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10)
+        parser.add_argument("--products", type=int, default=20)
+        parser.add_argument("--emulator", default=None, help="에뮬레이터 주소, 사용자·상품 이미지를 여기서 받음 (기본 BITSTUDIO_BASE_URL)")
+        parser.add_argument("--detail", action="store_true", help="상세 피팅(배경 편집 포함) 엔드포인트 사용")
+        parser.add_argument("--timeout", type=int, default=900, help="전체 완료 대기 시간(초)")
+        parser.add_argument("--drive-sweep", action="store_true",
+                            help="celery beat 대신 이 명령이 sweep_provider_jobs 를 주기 실행")
+        parser.add_argument("--worker-slots", type=int, default=None,
+                            help="워커 동시 실행 슬롯 합계 (기본: celery inspect 로 조회)")
+        parser.add_argument("--cleanup", action="store_true", help="끝난 뒤 테스트 사용자·상품 삭제")
+
+    def handle(self, *args, **opts):
+        emulator = (opts["emulator"] or settings.BITSTUDIO_BASE_URL).rstrip("/")
+        if emulator.startswith("https://api.bitstudio.ai"):
+            raise CommandError("실제 제공자에는 실행할 수 없습니다. --emulator 또는 BITSTUDIO_BASE_URL 을 에뮬레이터로 지정하세요.")
+
+        run = uuid.uuid4().hex[:8]
+        users, products, category = self._setup(run, emulator, opts["users"], opts["products"])
+        try:
+            self._run(users, products, opts)
+        finally:
+            if opts["cleanup"]:
+                User.objects.filter(pk__in=[u.pk for u in users]).delete()
+                Product.objects.filter(pk__in=[p.pk for p in products]).delete()
+                category.delete()
+
+    def _setup(self, run, emulator, user_count, product_count):
+        category = Category.objects.create(name=f"loadtest-{run}")
+        products = Product.objects.bulk_create([
+            Product(category=category, name=f"loadtest-{run}-{i}", content="", price=1, count=1,
+                    image=f"{emulator}/files/outfit-{run}-{i}.png")
+            for i in range(product_count)
+        ])
+        catalogue.invalidate()   # bulk_create 는 저장 신호가 없음
+        users = [
+            User.objects.create(username=f"loadtest-{run}-{i}", profile_image=f"{emulator}/files/person-{run}-{i}.png")
+            for i in range(user_count)
+        ]
+        # 피팅 대상은 전체 상품이므로 기존 상품이 있으면 사용자당 렌더링 수가 그만큼 늘어난다
+        self.stdout.write(f"run {run}: users={user_count} products={product_count} (전체 상품 {Product.objects.count()})")
+        return users, products, category
+
+    def _run(self, users, products, opts):
+        path = "/api/v1/fittings/images/detail" if opts["detail"] else "/api/v1/fittings/images"
+        before = task_stats.snapshot()
+        client = APIClient()
+
+        # 1) 요청 (웹 쪽 응답 시간·쿼리 수)
+        jobs, request_ms, request_queries = {}, [], []
+        started = time.monotonic()
+        for user in users:
+            client.force_authenticate(user)
+            with CaptureQueriesContext(connection) as queries:
+                t0 = time.monotonic()
+                resp = client.post(path)
+                request_ms.append((time.monotonic() - t0) * 1000)
+            request_queries.append(len(queries))
+            if resp.status_code != 202:
+                self.stderr.write(f"user {user.pk}: {resp.status_code} {resp.data}")
+                continue
+            jobs[resp.data["task_group_id"]] = user.pk
+        client.force_authenticate(None)
+        if not jobs:
+            raise CommandError("예약된 피팅 작업이 없습니다.")
+
+        # 2) 완료 대기
+        deadline = time.monotonic() + opts["timeout"]
+        pending = set(jobs)
+        results = {}
+        while pending and time.monotonic() < deadline:
+            if opts["drive_sweep"]:
+                sweep_provider_jobs()
+            for job_id in list(pending):
+                data = progress.get(job_id)
+                if data and data["finished_at"]:
+                    results[job_id] = data
+                    pending.discard(job_id)
+            if pending:
+                time.sleep(settings.FITTING_SWEEP_INTERVAL if opts["drive_sweep"] else 1)
+        wall = time.monotonic() - started
+
+        # 3) 보고
+        after = task_stats.snapshot()
+        durations = [d["finished_at"] - d["started_at"] for d in results.values()]
+        done = sum(d["done"] for d in results.values())
+        failed = sum(d["failed"] for d in results.values())
+        timed_out = [progress.get(job_id) for job_id in pending]
+
+        self.stdout.write("")
+        self.stdout.write(f"jobs        : {len(results)} / {len(jobs)} 완료, 시간 초과 {len(pending)}")
+        self.stdout.write(f"products    : 성공 {done}, 실패 {failed}, 미완료 {sum((d or {}).get('total', 0) - (d or {}).get('done', 0) - (d or {}).get('failed', 0) for d in timed_out)}")
+        self.stdout.write(f"wall time   : {wall:.1f}s, 처리량 {(done + failed) / wall:.2f} products/s")
+        if durations:
+            self.stdout.write(
+                f"end-to-end  : p50 {_percentile(durations, 50)}s  p95 {_percentile(durations, 95)}s  max {max(durations):.1f}s"
+            )
+        self.stdout.write(
+            f"request     : p50 {_percentile(request_ms, 50)}ms  max {max(request_ms):.0f}ms  "
+            f"queries avg {statistics.fmean(request_queries):.1f}"
+        )
+
+        self.stdout.write("")
+        self.stdout.write(f"{'task':<28} {'count':>7} {'avg ms':>9} {'busy s':>9} {'queries':>8} {'q/task':>7}")
+        total_busy_ms = 0
+        for name in task_stats.TASK_NAMES:
+            count = after[name]["count"] - before[name]["count"]
+            if not count:
+                continue
+            busy_ms = after[name]["busy_ms"] - before[name]["busy_ms"]
+            queries = after[name]["queries"] - before[name]["queries"]
+            total_busy_ms += busy_ms
+            self.stdout.write(
+                f"{name:<28} {count:>7} {busy_ms / count:>9.0f} {busy_ms / 1000:>9.1f} {queries:>8} {queries / count:>7.1f}"
+            )
+
+        slots = opts["worker_slots"] or _worker_slots()
+        if slots:
+            self.stdout.write(f"\nworker occupancy: {total_busy_ms / 1000 / (wall * slots):.1%} ({slots} slots, 바쁜 시간 {total_busy_ms / 1000:.1f}s)")
+        else:
+            self.stdout.write(f"\nworker occupancy: 슬롯 수를 알 수 없음 (--worker-slots 지정), 바쁜 시간 {total_busy_ms / 1000:.1f}s")
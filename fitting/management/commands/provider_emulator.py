@@ -0,0 +1,48 @@
+"""
+외부 제공자 로컬 에뮬레이터 실행 (fitting/emulator.py)
+
+    python manage.py provider_emulator --port 9000 --latency 50 --completion 8 --failure-rate 0.05
+
+웹·워커는 아래 환경변수로 실행한다.
+    BITSTUDIO_BASE_URL=http://localhost:9000
+    THENEWBLACK_BASE_URL=http://localhost:9000/tnb
+"""
+from django.core.management.base import BaseCommand
+
+from fitting.emulator import ProviderEmulator
+
+
+class Command(BaseCommand):
+    help = "BitStudio / TheNewBlack 대역 서버를 실행합니다 (부하 테스트용)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="0.0.0.0")
+        parser.add_argument("--port", type=int, default=9000)
+        parser.add_argument("--public-url", default=None, help="결과 파일 주소에 쓸 외부 주소 (기본 http://localhost:<port>)")
+        parser.add_argument("--latency", type=float, default=50, help="요청별 평균 응답 지연(ms)")
+        parser.add_argument("--completion", type=float, default=5, help="작업 완료까지 평균 시간(초)")
+        parser.add_argument("--jitter", type=float, default=0.3, help="완료 시간 편차 비율 (0.3 → ±30%%)")
+        parser.add_argument("--failure-rate", type=float, default=0.0, help="작업이 failed 로 끝나는 비율")
+        parser.add_argument("--error-rate", type=float, default=0.0, help="제출 요청이 500 을 반환하는 비율")
+
+    def handle(self, *args, **opts):
+        base_url = opts["public_url"] or f"http://localhost:{opts['port']}"
+        emulator = ProviderEmulator(
+            base_url,
+            latency=opts["latency"] / 1000,
+            completion=opts["completion"],
+            jitter=opts["jitter"],
+            failure_rate=opts["failure_rate"],
+            error_rate=opts["error_rate"],
+        )
+        server = emulator.serve(opts["host"], opts["port"])
+        self.stdout.write(f"provider emulator: {base_url}")
+        self.stdout.write(f"  BITSTUDIO_BASE_URL={base_url}")
+        self.stdout.write(f"  THENEWBLACK_BASE_URL={base_url}/tnb")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"{emulator.snapshot()}")
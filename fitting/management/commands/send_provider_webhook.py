@@ -0,0 +1,45 @@
+"""
+로컬 제공자 대역: 서명한 작업 완료 webhook 을 보낸다
+
+    python manage.py send_provider_webhook bitstudio <외부 작업 ID> --path https://.../result.png
+    python manage.py send_provider_webhook thenewblack <task_id> --path https://.../video.mp4
+    python manage.py send_provider_webhook bitstudio <외부 작업 ID> --status failed
+
+PROVIDER_WEBHOOK_SECRETS 의 같은 secret 으로 서명하므로 수신 서버와 같은 설정으로 실행한다.
+"""
+import json
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from fitting import webhooks
+
+
+class Command(BaseCommand):
+    help = "외부 제공자 대신 서명한 작업 완료 webhook 을 보냅니다."
+
+    def add_arguments(self, parser):
+        parser.add_argument("provider", choices=list(webhooks.PROVIDER_KINDS))
+        parser.add_argument("external_id", help="ProviderJob.external_id (BitStudio 이미지 ID, TheNewBlack task_id)")
+        parser.add_argument("--status", default="completed", choices=["completed", "failed"])
+        parser.add_argument("--path", default=None, help="결과 이미지/영상 주소")
+        parser.add_argument("--base-url", default=None, help="수신 API 주소 (기본 PROVIDER_WEBHOOK_BASE_URL)")
+
+    def handle(self, *args, **opts):
+        provider = opts["provider"]
+        if not settings.PROVIDER_WEBHOOK_SECRETS.get(provider):
+            raise CommandError(f"{provider} webhook secret 이 설정되지 않았습니다.")
+        if opts["status"] == "completed" and not opts["path"]:
+            raise CommandError("completed 는 --path 가 필요합니다.")
+
+        result_field = "video_url" if provider == "thenewblack" else "path"
+        body = json.dumps({"id": opts["external_id"], "status": opts["status"], result_field: opts["path"]}).encode()
+        base_url = (opts["base_url"] or settings.PROVIDER_WEBHOOK_BASE_URL).rstrip("/")
+
+        resp = requests.post(
+            f"{base_url}/fittings/webhooks/{provider}",
+            data=body, headers=webhooks.signed_headers(provider, body), timeout=10,
+        )
+        self.stdout.write(f"{resp.status_code} {resp.text}")
+        if resp.status_code >= 400:
+            raise CommandError("webhook 이 거부되었습니다.")
@@ -0,0 +1,106 @@
+"""
+피팅 파이프라인 모니터링용 카운터/지연시간 집계
+
+값은 Django cache 에 저장하므로 웹/워커 프로세스가 같은 캐시를 쓰면
+어느 프로세스에서든 합산된 값을 조회할 수 있다.
+모니터링 실패가 실제 작업을 막지 않도록 캐시 오류는 로그만 남긴다.
+observe 는 Prometheus 히스토그램용 구간별 건수도 함께 쌓는다 (fitting/prometheus.py 가 노출).
+"""
+import logging
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+PREFIX = "metrics:"
+# 지연시간 히스토그램 구간 상한(초), 제출·다운로드(수백 ms)부터 렌더링 대기(수 분)까지
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+
+def incr(name: str, amount: int = 1) -> None:
+    key = PREFIX + name
+    try:
+        if not cache.add(key, amount, timeout=None):
+            cache.incr(key, amount)
+    except Exception:
+        logger.warning("metrics incr 실패: %s", name, exc_info=True)
+
+
+def observe(name: str, seconds: float) -> None:
+    """지연시간 1건 기록 (count / sum / max, ms 단위)"""
+    ms = int(seconds * 1000)
+    incr(f"{name}:count")
+    incr(f"{name}:sum_ms", ms)
+    incr(f"{name}:le:{_bucket(seconds)}")
+    try:
+        key = f"{PREFIX}{name}:max_ms"
+        current = cache.get(key)
+        if current is None or ms > current:
+            cache.set(key, ms, timeout=None)
+    except Exception:
+        logger.warning("metrics max 갱신 실패: %s", name, exc_info=True)
+
+
+def _bucket(seconds) -> str:
+    for le in BUCKETS:
+        if seconds <= le:
+            return str(le)
+    return "+Inf"
+
+
+def provider_call(provider, op, elapsed, outcome, nbytes=0, retries=0) -> None:
+    """
+    외부 호출 1건 기록 (동기/비동기 클라이언트 공용)
+    outcome: ok | http_error (4xx/5xx) | error (연결 오류·타임아웃)
+    """
+    name = f"provider.{provider}.{op}"
+    observe(name, elapsed)
+    incr(f"{name}:{outcome}")
+    if nbytes:
+        incr(f"{name}:bytes", nbytes)
+    if retries:
+        incr(f"{name}:retries", retries)
+
+
+def totals(names) -> dict:
+    """incr 로 기록한 카운터들의 현재값"""
+    values = cache.get_many([PREFIX + n for n in names])
+    return {n: values.get(PREFIX + n, 0) for n in names}
+
+
+def snapshot(names) -> dict:
+    """observe 로 기록한 이름들의 현재 집계값"""
+    keys = [f"{PREFIX}{n}:{f}" for n in names for f in ("count", "sum_ms", "max_ms")]
+    values = cache.get_many(keys)
+    result = {}
+    for n in names:
+        count = values.get(f"{PREFIX}{n}:count", 0)
+        total = values.get(f"{PREFIX}{n}:sum_ms", 0)
+        result[n] = {
+            "count":  count,
+            "avg_ms": round(total / count, 1) if count else None,
+            "max_ms": values.get(f"{PREFIX}{n}:max_ms"),
+        }
+    return result
+
+
+def histograms(names) -> dict:
+    """observe 로 기록한 이름별 {"buckets": [(상한, 누적 건수)], "count", "sum"(초)}"""
+    les = [str(le) for le in BUCKETS] + ["+Inf"]
+    keys = [f"{PREFIX}{n}:le:{le}" for n in names for le in les]
+    keys += [f"{PREFIX}{n}:{f}" for n in names for f in ("count", "sum_ms")]
+    values = cache.get_many(keys)
+    result = {}
+    for n in names:
+        cumulative, buckets = 0, []
+        for le in les:
+            cumulative += values.get(f"{PREFIX}{n}:le:{le}", 0)
+            buckets.append((le, cumulative))
+        count = values.get(f"{PREFIX}{n}:count", 0)
+        # 구간 기록 이전에 쌓인 값도 있으므로 +Inf 는 전체 건수로 맞춘다
+        buckets[-1] = ("+Inf", count)
+        result[n] = {
+            "buckets": buckets,
+            "count":   count,
+            "sum":     values.get(f"{PREFIX}{n}:sum_ms", 0) / 1000,
+        }
+    return result
@@ -1,5 +1,7 @@
+import uuid
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 class UserImage(models.Model):
     user_id = models.ForeignKey(
@@ -40,6 +42,7 @@ class FittingResult(models.Model):
         verbose_name="영상 생성 상태"
     )
     image = models.CharField(max_length=255, null=True, blank=True, verbose_name="피팅사진 주소")
+    source_image = models.CharField(max_length=255, null=True, blank=True, verbose_name="렌더링에 사용한 상품 이미지 주소")
     video = models.CharField(max_length=255, null=True, blank=True, verbose_name="피팅영상")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="생성일시")
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True, verbose_name="수정일시")
@@ -54,3 +57,56 @@ class FittingResult(models.Model):
     def __str__(self):
         return f"FittingResult {self.id} - User {self.user_id} - Product {self.product_id}"
 
+class ProviderJob(models.Model):
+    """
+    외부 렌더링(BitStudio) / 영상 생성(TheNewBlack) 작업 1건의 상태 머신
+    [queued →] submitted → polling → completed | failed | timeout
+    queued 는 API 로 접수만 하고 아직 제출 전인 작업 (배경 편집 요청)
+    """
+    PENDING_STATUSES = ('submitted', 'polling')
+
+    kind = models.CharField(
+        max_length=20,
+        choices=[('vto', '가상 피팅'), ('vto_edit', '가상 피팅(편집용)'), ('edit_bg', '배경 편집'), ('video', '피팅 영상')],
+        verbose_name="작업 종류"
+    )
+    public_id = models.UUIDField(default=uuid.uuid4, unique=True, editable=False, verbose_name="외부 공개용 작업 아이디")
+    external_id = models.CharField(max_length=100, db_index=True, blank=True, verbose_name="외부 작업 아이디")
+    poll_url = models.CharField(max_length=255, verbose_name="상태 조회 주소")
+    status = models.CharField(
+        max_length=20,
+        choices=[('queued', '접수됨'), ('submitted', '제출됨'), ('polling', '폴링중'), ('completed', '완료'), ('failed', '실패'), ('timeout', '시간초과')],
+        default='submitted',
+        verbose_name="작업 상태"
+    )
+    result = models.CharField(max_length=500, null=True, blank=True, verbose_name="작업 결과")
+    poll_count = models.PositiveIntegerField(default=0, verbose_name="폴링 횟수")
+    max_polls = models.PositiveIntegerField(default=30, verbose_name="최대 폴링 횟수")
+    poll_interval = models.PositiveIntegerField(default=2, verbose_name="폴링 간격(초)")
+    next_steps = models.JSONField(null=True, blank=True, verbose_name="완료 후 이어서 실행할 체인")
+    next_poll_at = models.DateTimeField(null=True, blank=True, verbose_name="다음 상태 조회 예정일시")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="생성일시")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="수정일시")
+
+    class Meta:
+        db_table = 'provider_job'
+        indexes = [
+            models.Index(fields=['status', 'next_poll_at']),
+        ]
+
+    def __str__(self):
+        return f"ProviderJob {self.id} - {self.kind} {self.external_id} ({self.status})"
+
+class VTOCacheEntry(models.Model):
+    """같은 입력(사진·옷·프롬프트·파라미터)으로 렌더링한 VTO 결과 재사용용 캐시"""
+    key = models.CharField(max_length=64, unique=True, verbose_name="입력 해시(sha256)")
+    image = models.CharField(max_length=255, verbose_name="결과 이미지 주소")
+    hit_count = models.PositiveIntegerField(default=0, verbose_name="재사용 횟수")
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True, verbose_name="마지막 사용일시")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="생성일시")
+
+    class Meta:
+        db_table = 'vto_cache_entry'
+
+    def __str__(self):
+        return f"VTOCacheEntry {self.key[:12]} ({self.hit_count} hits)"
@@ -0,0 +1,127 @@
+"""
+피팅 작업(사용자 1명의 fan-out) 진행 상황 기록
+
+태스크가 상품별 상태를 Django cache(Redis)에 기록하고, 조회는 get_many 한 번으로 끝난다.
+- fitting:job:{id}            메타 (user_id, product_ids, total, started_at)
+- fitting:job:{id}:done       완료 상품 수 (incr)
+- fitting:job:{id}:failed     실패 상품 수 (incr)
+- fitting:job:{id}:p:{pid}    상품별 상태 {status, started_at, finished_at}
+- fitting:job:{id}:finished   전체 완료 시각
+상품별 상태: queued → in_flight → (chain 모드: uploaded →) done | failed
+uploaded 는 S3 업로드까지 끝나고 chord 콜백의 DB 일괄 저장을 기다리는 상태 (done 에는 세지 않음).
+상품이 모두 done | failed 가 되면 user.is_fitting 을 해제한다.
+상태가 바뀔 때마다 사용자 이벤트 스트림(fitting/events.py)에도 발행한다.
+"""
+import logging, time
+from django.core.cache import cache
+
+from fitting import events
+
+logger = logging.getLogger(__name__)
+
+TTL = 60 * 60 * 24
+
+
+def _key(job_id, suffix=""):
+    return f"fitting:job:{job_id}{suffix}"
+
+
+def start(job_id, user_id, product_ids):
+    now = time.time()
+    values = {
+        _key(job_id): {
+            "user_id":     user_id,
+            "product_ids": list(product_ids),
+            "total":       len(product_ids),
+            "started_at":  now,
+        },
+        _key(job_id, ":done"):   0,
+        _key(job_id, ":failed"): 0,
+    }
+    for pid in product_ids:
+        values[_key(job_id, f":p:{pid}")] = {"status": "queued", "started_at": None, "finished_at": None}
+    cache.set_many(values, TTL)
+    cache.set(f"fitting:user:{user_id}:job", job_id, TTL)
+
+
+def mark(job_id, product_id, status):
+    """status: in_flight | uploaded | done | failed"""
+    if not job_id:
+        return
+    try:
+        key = _key(job_id, f":p:{product_id}")
+        values = cache.get_many([key, _key(job_id)])
+        record = values.get(key) or {"started_at": None}
+        record["status"] = status
+        if status == "in_flight":
+            record["started_at"] = time.time()
+        elif not (status == "done" and record.get("finished_at")):
+            # uploaded → done 은 DB 저장만 남았던 것이므로 렌더링·업로드가 끝난 시각을 유지
+            record["finished_at"] = time.time()
+        cache.set(key, record, TTL)
+
+        meta = values.get(_key(job_id))
+        if meta:
+            events.publish(meta["user_id"], "fitting", {"job_id": job_id, "product_id": product_id, "status": status})
+
+        if status in ("done", "failed"):
+            cache.incr(_key(job_id, f":{status}"))
+            _finish_if_complete(job_id)
+    except Exception:
+        # 진행 상황 기록 실패가 렌더링 자체를 막지 않도록
+        logger.warning("피팅 진행 상황 기록 실패: %s / %s", job_id, product_id, exc_info=True)
+
+
+def _finish_if_complete(job_id):
+    values = cache.get_many([_key(job_id), _key(job_id, ":done"), _key(job_id, ":failed")])
+    meta = values.get(_key(job_id))
+    if not meta:
+        return
+    done, failed = values.get(_key(job_id, ":done"), 0), values.get(_key(job_id, ":failed"), 0)
+    if done + failed < meta["total"]:
+        return
+    # 동시에 끝난 태스크가 여러 개여도 한 번만 처리
+    if cache.add(_key(job_id, ":finished"), time.time(), TTL):
+        from user.models import User
+        User.objects.filter(pk=meta["user_id"]).update(is_fitting=False)
+        events.publish(meta["user_id"], "fitting.finished", {"job_id": job_id, "done": done, "failed": failed})
+
+
+def get(job_id):
+    """진행 상황 dict | None (만료되었거나 없는 작업)"""
+    meta = cache.get(_key(job_id))
+    if not meta:
+        return None
+
+    product_keys = {_key(job_id, f":p:{pid}"): pid for pid in meta["product_ids"]}
+    values = cache.get_many([_key(job_id, ":done"), _key(job_id, ":failed"), _key(job_id, ":finished"), *product_keys])
+
+    products = {pid: values.get(key, {"status": "queued"}) for key, pid in product_keys.items()}
+    finished_at = values.get(_key(job_id, ":finished"))
+    return {
+        "job_id":      job_id,
+        "user_id":     meta["user_id"],
+        "total":       meta["total"],
+        "done":        values.get(_key(job_id, ":done"), 0),
+        "failed":      values.get(_key(job_id, ":failed"), 0),
+        "in_flight":   sum(1 for p in products.values() if p["status"] == "in_flight"),
+        "uploaded":    sum(1 for p in products.values() if p["status"] == "uploaded"),
+        "started_at":  meta["started_at"],
+        "finished_at": finished_at,
+        "elapsed":     round((finished_at or time.time()) - meta["started_at"], 1),
+        "products":    products,
+    }
+
+
+def abort(job_id):
+    """끝나지 않은 상품(queued | in_flight | uploaded)을 모두 실패로 마침 (결과 저장 자체가 실패한 경우)"""
+    job = get(job_id) if job_id else None
+    if not job:
+        return
+    for product_id, record in job["products"].items():
+        if record["status"] not in ("done", "failed"):
+            mark(job_id, product_id, "failed")
+
+
+def current_job_id(user_id):
+    return cache.get(f"fitting:user:{user_id}:job")
@@ -0,0 +1,101 @@
+"""
+피팅 파이프라인 집계를 Prometheus 텍스트 형식으로 노출 (GET /api/v1/fittings/metrics)
+
+값은 metrics(캐시)에 웹/워커 프로세스가 함께 쌓은 누적값이므로 어느 웹 프로세스를 scrape 해도 같다.
+단계별로 어디서 시간이 쓰이는지 보도록 나눈다.
+- 제출·상태 조회·결과 다운로드 : fitting_provider_request_duration_seconds{provider, op}
+- 렌더링 대기(제출 → 확정)     : fitting_provider_job_wait_seconds{kind}
+- S3 업로드                    : fitting_upload_duration_seconds{op}
+- 태스크 실행(워커 점유)       : fitting_task_duration_seconds{task}
+"""
+from fitting import metrics, task_stats
+from fitting.breaker import breakers
+from fitting.clients import bitstudio, thenewblack, downloads
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+JOB_KINDS = ("vto", "vto_edit", "edit_bg", "video")
+JOB_RESULTS = ("completed", "failed", "timeout")
+PROVIDER_OUTCOMES = ("ok", "http_error", "error")
+UPLOAD_OPS = ("image", "video")
+BREAKER_STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _provider_ops():
+    return [(client.name, op) for client in (bitstudio, thenewblack, downloads) for op in client.ops]
+
+
+def _histograms():
+    """(이름, 설명, [(라벨, metrics 이름)])"""
+    return [
+        ("fitting_provider_request_duration_seconds", "외부 제공자 호출 지연시간 (제출·상태 조회·결과 다운로드)",
+         [({"provider": p, "op": op}, f"provider.{p}.{op}") for p, op in _provider_ops()]),
+        ("fitting_provider_job_wait_seconds", "외부 작업 제출부터 완료·실패·시간초과 확정까지 걸린 시간",
+         [({"kind": kind}, f"provider_job.{kind}.wait") for kind in JOB_KINDS]),
+        ("fitting_upload_duration_seconds", "결과 파일 S3 업로드 시간",
+         [({"op": op}, f"transfer.{op}") for op in UPLOAD_OPS]),
+        ("fitting_task_duration_seconds", "Celery 태스크 실행 시간 (워커 슬롯 점유)",
+         [({"task": name}, f"task.{name}") for name in task_stats.TASK_NAMES]),
+    ]
+
+
+def _counters():
+    return [
+        ("fitting_provider_requests_total", "외부 제공자 호출 수 (결과별)",
+         [({"provider": p, "op": op, "outcome": o}, f"provider.{p}.{op}:{o}")
+          for p, op in _provider_ops() for o in PROVIDER_OUTCOMES]),
+        ("fitting_provider_retries_total", "외부 제공자 호출 중 HTTP 재시도 수",
+         [({"provider": p, "op": op}, f"provider.{p}.{op}:retries") for p, op in _provider_ops()]),
+        ("fitting_provider_response_bytes_total", "외부 제공자 응답 본문 바이트",
+         [({"provider": p, "op": op}, f"provider.{p}.{op}:bytes") for p, op in _provider_ops()]),
+        ("fitting_provider_jobs_total", "확정된 외부 작업 수",
+         [({"kind": kind, "status": s}, f"provider_job.{kind}.{s}") for kind in JOB_KINDS for s in JOB_RESULTS]),
+        ("fitting_provider_job_polls_total", "확정 전까지 진행 중으로 응답한 상태 조회 수",
+         [({"kind": kind}, f"provider_job.{kind}.polls") for kind in JOB_KINDS]),
+        ("fitting_upload_bytes_total", "S3 업로드 바이트",
+         [({"op": op}, f"transfer.{op}:bytes") for op in UPLOAD_OPS]),
+        ("fitting_task_runs_total", "Celery 태스크 실행 수 (결과별, retry 는 재시도 예약, ignored 는 외부 작업 대기로 체인을 넘김)",
+         [({"task": name, "outcome": o}, f"task.{name}:{o}") for name in task_stats.TASK_NAMES for o in task_stats.OUTCOMES]),
+        ("fitting_task_db_queries_total", "Celery 태스크가 실행한 DB 쿼리 수",
+         [({"task": name}, f"task.{name}:queries") for name in task_stats.TASK_NAMES]),
+        ("fitting_provider_breaker_opened_total", "circuit breaker 가 열린 횟수",
+         [({"provider": name}, f"breaker.{name}.opened") for name in breakers]),
+        ("fitting_provider_breaker_rejected_total", "circuit breaker 가 열려 거절한 호출 수",
+         [({"provider": name}, f"breaker.{name}.rejected") for name in breakers]),
+        ("fitting_provider_webhooks_total", "수신한 제공자 webhook 수",
+         [({"provider": name, "result": r}, f"provider.webhook.{name}.{r}") for name in breakers for r in ("received", "rejected")]),
+        ("fitting_results_total", "저장된 피팅 결과 수",
+         [({"result": r}, f"fitting.results.{r}") for r in ("saved", "failed")]),
+        ("fitting_vto_cache_requests_total", "VTO 결과 캐시 조회 수",
+         [({"result": r}, f"vto_cache.{r}") for r in ("hit", "miss")]),
+    ]
+
+
+def _labels(labels: dict) -> str:
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels.items()) + "}"
+
+
+def render() -> str:
+    histograms, counters = _histograms(), _counters()
+    hist_values = metrics.histograms([name for _, _, series in histograms for _, name in series])
+    counter_values = metrics.totals([name for _, _, series in counters for _, name in series])
+
+    lines = []
+    for family, help_text, series in histograms:
+        lines += [f"# HELP {family} {help_text}", f"# TYPE {family} histogram"]
+        for labels, name in series:
+            value = hist_values[name]
+            for le, count in value["buckets"]:
+                lines.append(f"{family}_bucket{_labels({**labels, 'le': le})} {count}")
+            lines.append(f"{family}_sum{_labels(labels)} {value['sum']}")
+            lines.append(f"{family}_count{_labels(labels)} {value['count']}")
+
+    for family, help_text, series in counters:
+        lines += [f"# HELP {family} {help_text}", f"# TYPE {family} counter"]
+        lines += [f"{family}{_labels(labels)} {counter_values[name]}" for labels, name in series]
+
+    lines += ["# HELP fitting_provider_breaker_state circuit breaker 상태 (0 closed, 1 half_open, 2 open)",
+              "# TYPE fitting_provider_breaker_state gauge"]
+    lines += [f"fitting_provider_breaker_state{_labels({'provider': name})} {BREAKER_STATES[breaker.state()]}"
+              for name, breaker in breakers.items()]
+    return "\n".join(lines) + "\n"
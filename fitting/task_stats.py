@@ -0,0 +1,74 @@
+"""
+Celery 태스크 이름별 실행 통계 (부하 테스트·모니터링용)
+
+task_prerun / task_postrun 신호로 실행 횟수, 실행 시간(워커 슬롯 점유 시간), DB 쿼리 수를
+metrics 에 누적한다. 웹/워커 어느 프로세스에서 실행돼도 같은 캐시에 합산된다.
+- task.{이름}          observe (count / sum_ms / max_ms)
+- task.{이름}:queries  incr
+- task.{이름}:{결과}    incr (success | failure | retry | ignored)
+"""
+import time
+from celery import signals
+from django.db import connection
+
+from fitting import metrics
+
+OUTCOMES = ("success", "failure", "retry", "ignored")
+
+TASK_NAMES = (
+    "run_vto_url_task", "run_vto_edit_url_task", "edit_bg_task", "upload_vto_result",
+    "persist_fitting_results", "run_fitting_batch_task", "poll_provider_job", "sweep_provider_jobs",
+    "generate_fitting_video_task", "save_fitting_video_task",
+)
+
+_running = {}   # task_id → (시작 시각, 쿼리 카운터)
+
+
+class _QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _task_started(task_id=None, **kwargs):
+    counter = _QueryCounter()
+    # 태스크를 실행하는 스레드의 커넥션에만 붙는다 (threads pool 에서도 태스크별로 분리)
+    connection.execute_wrappers.append(counter)
+    _running[task_id] = (time.monotonic(), counter)
+
+
+def _task_finished(task_id=None, task=None, state=None, **kwargs):
+    started = _running.pop(task_id, None)
+    if started is None:
+        return
+    start, counter = started
+    if counter in connection.execute_wrappers:
+        connection.execute_wrappers.remove(counter)
+
+    name = task.name.rsplit(".", 1)[-1]
+    metrics.observe(f"task.{name}", time.monotonic() - start)
+    metrics.incr(f"task.{name}:queries", counter.count)
+    if state:
+        metrics.incr(f"task.{name}:{state.lower()}")
+
+
+def connect():
+    signals.task_prerun.connect(_task_started, weak=False, dispatch_uid="fitting.task_stats.prerun")
+    signals.task_postrun.connect(_task_finished, weak=False, dispatch_uid="fitting.task_stats.postrun")
+
+
+def snapshot() -> dict:
+    """태스크별 {count, busy_ms, queries}"""
+    timings = metrics.snapshot([f"task.{name}" for name in TASK_NAMES])
+    queries = metrics.totals([f"task.{name}:queries" for name in TASK_NAMES])
+    return {
+        name: {
+            "count":   timings[f"task.{name}"]["count"],
+            "busy_ms": round((timings[f"task.{name}"]["avg_ms"] or 0) * timings[f"task.{name}"]["count"]),
+            "queries": queries[f"task.{name}:queries"],
+        }
+        for name in TASK_NAMES
+    }
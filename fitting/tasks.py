@@ -1,213 +1,520 @@
 import os, time, requests
 import requests, io
-from celery import shared_task
+import logging
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from celery import shared_task, signature, chain
+from celery.exceptions import Ignore
+from botocore.exceptions import BotoCoreError, ClientError
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
+from django.db import connection, transaction
+from django.utils import timezone
 
 from user.models import User
 from product.models import Product
-from fitting.models import FittingResult
-from fitting.utils import upload_fitting_image_to_s3, upload_bytes
+from fitting.models import FittingResult, ProviderJob
+from fitting.utils import upload_fitting_image_to_s3, upload_stream, is_stored_url
+from fitting import vto_cache, progress, metrics, webhooks, events
+from fitting.clients import bitstudio, thenewblack, downloads, STUDIO_BG_PROMPT
+from fitting.breaker import ProviderUnavailable
+from fitting.engine import run_fitting_batch
 
+logger = logging.getLogger(__name__)
+
+
+def _finish_job(job, status, result=None):
+    """
+    작업 상태를 확정하고, 멈춰둔 체인이 있으면 결과를 넘겨 이어서 실행
+    이미 다른 쪽에서 확정한 작업이면 아무 것도 하지 않는다 (중복 실행 방지)
+    """
+    updated = ProviderJob.objects.filter(
+        pk=job.pk, status__in=ProviderJob.PENDING_STATUSES
+    ).update(status=status, result=result, poll_count=job.poll_count, updated_at=timezone.now())
+    job.status, job.result = status, result
+
+    if updated:
+        # 제출부터 확정까지 걸린 시간(제공자 렌더링 대기)과 pending 으로 응답한 조회 수
+        metrics.observe(f"provider_job.{job.kind}.wait", (timezone.now() - job.created_at).total_seconds())
+        metrics.incr(f"provider_job.{job.kind}.{status}")
+        metrics.incr(f"provider_job.{job.kind}.polls", job.poll_count)
+
+    if updated and job.next_steps:
+        # celery 가 체인을 이어가는 방식(trace.py)과 동일하게 다음 태스크 실행
+        steps = list(job.next_steps)
+        signature(steps.pop()).apply_async((result,), chain=steps or None)
+    return True
+
+
+def _fetch_status(job):
+    """
+    외부 작업 상태 조회 (DB 접근 없음 → 스레드에서 호출 가능)
+    실패 시 빈 dict, breaker 가 열려 조회하지 않았으면 None
+    """
+    try:
+        if job.kind == "video":
+            return thenewblack.get_video_status(job.external_id)
+        return bitstudio.get_status(job.poll_url)
+    except ProviderUnavailable:
+        return None
+    except (requests.RequestException, ValueError):
+        logger.warning("ProviderJob %s 상태 조회 실패", job.id, exc_info=True)
+        return {}
+
+
+def _apply_status(job, info, count_skipped=False):
+    """
+    조회한 상태를 작업에 반영
+    완료/실패/타임아웃으로 확정되면 True, 계속 기다려야 하면 False
+    count_skipped: breaker 가 열려 조회하지 못한 것도 폴링 1회로 센다 (워커가 기다리는 blocking 모드)
+    """
+    if info is None:
+        if not count_skipped:
+            # 제공자 장애로 조회하지 않음 → 폴링 횟수를 쓰지 않고 다음 주기에 다시 확인
+            return _defer_poll(job)
+        info = {}
+    if info.get("status") == "completed" and info.get("path"):
+        # vto_edit 는 다음 단계(배경 편집)에 이미지 ID 를 넘긴다
+        result = job.external_id if job.kind == "vto_edit" else info["path"]
+        return _finish_job(job, "completed", result)
+    if info.get("status") == "failed":
+        return _finish_job(job, "failed")
+
+    job.poll_count += 1
+    if job.poll_count >= job.max_polls:
+        return _finish_job(job, "timeout")
+
+    return _defer_poll(job, status="polling")
+
+
+def _defer_poll(job, **fields):
+    """
+    다음 조회 시각을 poll_interval 뒤로 정하고 fields 와 폴링 횟수를 반영 → 그 사이 확정됐으면 True
+    조회하는 동안 webhook 이 같은 작업을 확정했을 수 있으므로 대기 중인 작업일 때만 갱신한다
+    (확정된 작업을 polling 으로 되돌리면 다음 sweep 에서 후속 체인이 한 번 더 실행된다)
+    """
+    now = timezone.now()
+    fields.update(poll_count=job.poll_count, next_poll_at=now + timedelta(seconds=job.poll_interval))
+    updated = ProviderJob.objects.filter(
+        pk=job.pk, status__in=ProviderJob.PENDING_STATUSES
+    ).update(**fields, updated_at=now)
+    if not updated:
+        job.refresh_from_db()
+        return True
+    for name, value in fields.items():
+        setattr(job, name, value)
+    return False
+
+
+def _check_job(job, count_skipped=False):
+    """외부 작업 상태를 1회 조회해 반영"""
+    return _apply_status(job, _fetch_status(job), count_skipped)
+
+
+def apply_webhook_event(provider, external_id, info):
+    """
+    제공자 완료 webhook 반영 → 대기 중이던 작업 | 이미 확정된 작업 | None (아직 모르는 작업)
+    완료/실패 이외의 중간 상태 알림은 무시한다 (폴링 횟수를 소모하지 않음).
+    """
+    jobs = ProviderJob.objects.filter(kind__in=webhooks.PROVIDER_KINDS[provider], external_id=external_id)
+    job = jobs.filter(status__in=ProviderJob.PENDING_STATUSES).order_by("-id").first()
+    if job is None:
+        return jobs.order_by("-id").first()
+    if info.get("status") in ("completed", "failed"):
+        _apply_status(job, info)
+    return job
+
+
+def _poll_schedule(max_polls, poll_interval):
+    """
+    webhook 을 쓰면 폴링은 놓친 콜백을 찾는 fallback 이므로 간격을 늘리고,
+    전체 대기 시간은 원래 이상(최소 2회 확인)으로 유지 → (max_polls, poll_interval)
+    """
+    if not settings.PROVIDER_WEBHOOKS_ENABLED:
+        return max_polls, poll_interval
+    interval = max(poll_interval, settings.PROVIDER_WEBHOOK_FALLBACK_INTERVAL)
+    return max(2, -(-max_polls * poll_interval // interval)), interval
+
+
+def _wait_for_job(task, kind, external_id, poll_url, max_polls, poll_interval, job_id=None):
+    """
+    제출된 외부 작업의 완료를 기다린다.
+    job_id 가 있으면 API 로 접수해 둔(queued) 작업을 이어서 쓰고, 없으면 새로 만든다.
+
+    - blocking  : 워커 안에서 sleep 하며 폴링 후 결과 반환 (eager 실행 포함)
+    - reschedule: 남은 체인을 작업에 저장하고 상태 확인 태스크만 예약한 뒤 워커 슬롯 반환
+    - sweep     : 남은 체인을 작업에 저장만 하고, 상태 확인은 sweep_provider_jobs 가 일괄 처리
+    PROVIDER_WEBHOOKS_ENABLED 이면 완료는 webhook 으로 받고, sweep 이 느린 간격으로 놓친 작업만 확인한다.
+    """
+    mode = "blocking" if task.request.is_eager else settings.FITTING_POLL_MODE
+    if settings.PROVIDER_WEBHOOKS_ENABLED and mode != "blocking":
+        mode = "sweep"
+        max_polls, poll_interval = _poll_schedule(max_polls, poll_interval)
+    fields = dict(
+        kind=kind,
+        status="submitted",
+        external_id=external_id,
+        poll_url=poll_url,
+        max_polls=max_polls,
+        poll_interval=poll_interval,
+        next_steps=None if mode == "blocking" else task.request.chain,
+        next_poll_at=timezone.now() + timedelta(seconds=poll_interval),
+    )
+    if job_id:
+        ProviderJob.objects.filter(pk=job_id).update(**fields, updated_at=timezone.now())
+        job = ProviderJob.objects.get(pk=job_id)
+    else:
+        job = ProviderJob.objects.create(**fields)
+
+    if mode == "blocking":
+        # 장애가 길어져도 워커를 max_polls × poll_interval 이상 붙잡지 않도록 건너뛴 조회도 센다
+        while not _check_job(job, count_skipped=True):
+            time.sleep(poll_interval)
+        return job.result
+
+    if mode == "reschedule":
+        poll_provider_job.apply_async((job.id,), countdown=poll_interval)
+    # 체인은 작업 완료 시점에 _finish_job 이 이어서 실행하므로 여기서는 끊는다
+    raise Ignore()
+
+
+def _pass_to_next_step(task, **kwargs):
+    """체인의 다음 태스크에 kwargs 를 추가 (남은 체인은 역순이라 마지막 원소가 다음 태스크)"""
+    if task.request.chain:
+        task.request.chain[-1].setdefault("kwargs", {}).update(kwargs)
+
+
+@shared_task
+def poll_provider_job(job_id):
+    """외부 작업 상태를 1회 확인하고, 아직이면 poll_interval 뒤로 재예약"""
+    job = ProviderJob.objects.filter(pk=job_id).first()
+    if job is None or job.status not in ProviderJob.PENDING_STATUSES:
+        return None
+
+    if not _check_job(job):
+        poll_provider_job.apply_async((job.id,), countdown=job.poll_interval)
+    return job.status
+
+
+def _claim_due_jobs():
+    """
+    조회 시각이 된 작업을 최대 FITTING_SWEEP_BATCH_SIZE 건 선점 → 작업 목록
+    sweep 이 겹쳐 실행돼도(느린 제공자, beat 중복) 같은 작업을 두 번 조회해 poll_count 를 이중으로 쓰지 않도록
+    다른 sweep 이 잠근 행은 건너뛰고, 선점한 작업은 next_poll_at 을 FITTING_SWEEP_CLAIM_TIMEOUT 뒤로 미룬다.
+    조회 결과를 반영하면 next_poll_at 은 원래 간격으로 다시 정해진다 (sweep 이 중간에 죽으면 timeout 뒤 재조회).
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        jobs = list(
+            ProviderJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status__in=ProviderJob.PENDING_STATUSES, next_poll_at__lte=now)
+            .order_by("next_poll_at")[:settings.FITTING_SWEEP_BATCH_SIZE]
+        )
+        if jobs:
+            claimed_until = now + timedelta(seconds=settings.FITTING_SWEEP_CLAIM_TIMEOUT)
+            ProviderJob.objects.filter(pk__in=[job.pk for job in jobs]).update(next_poll_at=claimed_until)
+    return jobs
+
+
+@shared_task
+def sweep_provider_jobs():
+    """
+    조회 시각이 된 외부 작업을 모아 한 번에 상태 확인 (celery beat 주기 실행)
+    HTTP 조회만 스레드로 병렬 처리(공용 커넥션 풀 재사용)하고, DB 반영과 후속 체인 실행은 순서대로 처리
+    → 확정된 작업 수 반환
+    """
+    jobs = _claim_due_jobs()
+    if not jobs:
+        return 0
+
+    with ThreadPoolExecutor(max_workers=settings.FITTING_SWEEP_CONCURRENCY) as pool:
+        infos = list(pool.map(_fetch_status, jobs))
+
+    finished = sum(_apply_status(job, info) for job, info in zip(jobs, infos))
+    logger.info("ProviderJob sweep: %d건 확인, %d건 확정", len(jobs), finished)
+    return finished
 
-BITSTUDIO_API_KEY = os.environ["BITSTUDIO_API_KEY"]
 
 # fitting/tasks.py  (추가 부분만)
 @shared_task(bind=True, max_retries=3, default_retry_delay=5)
-def run_vto_url_task(self, person_url, outfit_url, prompt):
+def run_vto_url_task(self, person_url, outfit_url, prompt, fitting_job_id=None, product_id=None, person_digest=None):
     """
     Bitstudio에 URL만 넘겨 VTO 1장을 생성 → 완료 path | None
+    같은 입력으로 렌더링한 결과가 캐시에 있으면 저장된 S3 주소를 바로 반환
+    person_digest: fan-out 에서 한 번만 구한 사람 사진 다이제스트 (vto_cache.try_digest)
     """
+    progress.mark(fitting_job_id, product_id, "in_flight")
+
+    # ⓪ 결과 캐시 확인 (미스면 다음 단계가 저장할 수 있도록 키 전달)
+    cache_key = vto_cache.make_key(person_url, outfit_url, prompt, person_digest=person_digest)
+    cached = vto_cache.lookup(cache_key)
+    if cached:
+        return cached
+    _pass_to_next_step(self, cache_key=cache_key)
+
+    # ① 작업 시작
     try:
-        # ① 작업 시작
-        r = requests.post(
-            "https://api.bitstudio.ai/images/virtual-try-on",
-            headers={"Authorization": f"Bearer {BITSTUDIO_API_KEY}",
-                     "Content-Type": "application/json"},
-            json={
-                "person_image_url":  person_url,
-                "outfit_image_url":  outfit_url,
-                "prompt":            prompt,
-                "resolution":        "standard",
-                "num_images":        1,
-                "style":             "studio",
-            },
-            timeout=60,
-        )
-        r.raise_for_status()
-        job_id = r.json()[0]["id"]
-
-        # ② 완료 폴링 (2 초 × 30 = 60 초)
-        for _ in range(30):
-            info = requests.get(
-                f"https://api.bitstudio.ai/images/{job_id}",
-                headers={"Authorization": f"Bearer {BITSTUDIO_API_KEY}"},
-                timeout=10,
-            ).json()
-
-            if info.get("status") == "completed":
-                return info.get("path")
-            if info.get("status") == "failed":
-                return None
-            time.sleep(2)
-
-        return None            # 타임아웃
+        job_id = bitstudio.submit_vto(person_url, outfit_url, prompt)
+    except ProviderUnavailable:
+        # 제공자 장애 중 → 재시도로 워커를 붙잡지 않고 바로 실패 처리
+        logger.warning("VTO 작업 제출 생략 (circuit breaker open): %s", outfit_url)
+        return None
     except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            logger.exception("VTO 작업 제출 실패: %s", outfit_url)
+            return None   # 다음 단계에서 실패로 기록
         raise self.retry(exc=exc)
-    
+
+    # ② 완료 대기 (2 초 × 30 = 60 초)
+    return _wait_for_job(
+        self, "vto", job_id,
+        f"{bitstudio.base_url}/images/{job_id}",
+        max_polls=30, poll_interval=2,
+    )
+
 @shared_task(bind=True, max_retries=2, default_retry_delay=10)
-def save_to_s3_and_db(self, vto_url: str, user_id: int, product_id: int):
+def upload_vto_result(self, vto_url: str, user_id: int, product_id: int, source_image: str | None = None,
+                      cache_key: str | None = None, fitting_job_id: str | None = None):
+    """
+    VTO 결과를 S3 에 업로드 → 저장할 레코드 dict | None
+    DB 저장은 fan-out 전체가 끝난 뒤 chord 콜백(persist_fitting_results)이 한 번에 한다.
+    chord 가 끝까지 진행되도록 실패(다운로드·S3 오류)는 재시도 후 예외 대신 None 으로 넘긴다.
+    """
     if not vto_url:
+        progress.mark(fitting_job_id, product_id, "failed")
         return None   # 이전 태스크 실패한 경우
 
     try:
-        # 1) 이미지 다운로드
-        resp = requests.get(vto_url, timeout=30)
-        resp.raise_for_status()
-        img_bytes = resp.content
-
-        # 2) S3 업로드
-        s3_url = upload_fitting_image_to_s3(
-            user_id=user_id,
-            product_id=product_id,
-            image_data=img_bytes
-        )
-
-        # 3) DB 저장 (상품 1:1)
-        user = User.objects.get(id=user_id)
-        product = Product.objects.get(id=product_id)
-
-        FittingResult.objects.update_or_create(
-            user = user,
-            product=product,                # 1:1 관계 기준
-            defaults={
-                "user":  user,
-                "image": s3_url
-            }
-        )
-        return s3_url
+        if is_stored_url(vto_url):
+            # 캐시 히트 → 이미 S3 에 있는 결과 재사용
+            s3_url = vto_url
+        else:
+            # 1) 이미지 다운로드
+            resp = downloads.get(vto_url, "image", timeout=30)
+            resp.raise_for_status()
+            img_bytes = resp.content
 
-    except (requests.RequestException, ObjectDoesNotExist) as exc:
-        # 네트워크 오류나 객체 미존재 시 재시도
+            # 2) S3 업로드
+            s3_url = upload_fitting_image_to_s3(
+                user_id=user_id,
+                product_id=product_id,
+                image_data=img_bytes
+            )
+            vto_cache.store(cache_key, s3_url)
+    except (requests.RequestException, BotoCoreError, ClientError) as exc:
+        # 다운로드·S3 오류 시 재시도
+        if self.request.retries >= self.max_retries:
+            logger.warning("VTO 결과 업로드 실패: %s", vto_url, exc_info=True)
+            progress.mark(fitting_job_id, product_id, "failed")
+            return None
         raise self.retry(exc=exc)
-    
+
+    # 상품별 진행 상황은 바로 반영하고, DB 저장(→ done)만 chord 콜백으로 넘긴다
+    progress.mark(fitting_job_id, product_id, "uploaded")
+    return {"product_id": product_id, "image": s3_url, "source_image": source_image}
+
+
+def bulk_save_fitting_results(user_id, records) -> int:
+    """
+    (user, product) 기준으로 피팅 결과를 한 번에 upsert → 저장 건수
+    삭제된 상품은 건너뛴다.
+    """
+    records = [r for r in records if r]
+    if not records:
+        return 0
+    existing = set(
+        Product.objects.filter(id__in=[r["product_id"] for r in records]).values_list("id", flat=True)
+    )
+    objs = [
+        FittingResult(user_id=user_id, product_id=r["product_id"], image=r["image"], source_image=r["source_image"])
+        for r in records if r["product_id"] in existing
+    ]
+    options = {"update_conflicts": True, "update_fields": ["image", "source_image", "updated_at"]}
+    if connection.features.supports_update_conflicts_with_target:
+        # PostgreSQL / SQLite 는 충돌 기준 컬럼 지정 필요, MySQL 은 지정 불가 (ON DUPLICATE KEY)
+        options["unique_fields"] = ["user", "product"]
+    FittingResult.objects.bulk_create(objs, **options)
+    return len(objs)
+
+
+@shared_task
+def persist_fitting_results(records, user_id, fitting_job_id=None, total=None):
+    """
+    fan-out chord 콜백: 상품별 결과를 한 번에 저장하고 피팅 상태를 해제
+    """
+    saved = 0
+    if User.objects.filter(pk=user_id).exists():
+        saved = bulk_save_fitting_results(user_id, records)
+        User.objects.filter(pk=user_id).update(is_fitting=False)
+
+    for record in records:
+        if record:
+            progress.mark(fitting_job_id, record["product_id"], "done")
+
+    total = total or len(records)
+    metrics.incr("fitting.results.saved", saved)
+    metrics.incr("fitting.results.failed", total - saved)
+    logger.info("피팅 작업 %s 완료: 사용자 %s, 저장 %d / %d", fitting_job_id, user_id, saved, total)
+    return {"user_id": user_id, "total": total, "saved": saved, "failed": total - saved}
+
+@shared_task
+def fitting_results_failed(request, exc, traceback, user_id, fitting_job_id=None, total=None):
+    """
+    persist_fitting_results 의 errback (콜백 자체 또는 chord 헤더가 예외로 끝난 경우)
+    저장하지 못한 상품을 실패로 마치고 피팅 상태를 해제해 is_fitting 이 남아 재요청이 막히지 않게 한다.
+    """
+    logger.error("피팅 작업 %s 결과 저장 실패: 사용자 %s, %r", fitting_job_id, user_id, exc)
+    progress.abort(fitting_job_id)
+    User.objects.filter(pk=user_id).update(is_fitting=False)
+    metrics.incr("fitting.results.failed", total or 0)
+
+
+def persist_callback(user_id, fitting_job_id, total):
+    """fan-out chord 콜백 (실패하면 fitting_results_failed)"""
+    return persist_fitting_results.s(user_id, fitting_job_id=fitting_job_id, total=total).on_error(
+        fitting_results_failed.s(user_id, fitting_job_id=fitting_job_id, total=total)
+    )
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=5)
-def run_vto_edit_url_task(self, person_url, outfit_url, prompt):
+def run_vto_edit_url_task(self, person_url, outfit_url, prompt, fitting_job_id=None, product_id=None):
     """
     Bitstudio에 URL만 넘겨 VTO 1장을 생성
     → 완료된 **이미지 ID** (job_id) 반환, 실패/타임아웃 시 None
     """
+    progress.mark(fitting_job_id, product_id, "in_flight")
+
+    # ① 작업 시작
     try:
-        # ① 작업 시작
-        r = requests.post(
-            "https://api.bitstudio.ai/images/virtual-try-on",
-            headers={"Authorization": f"Bearer {BITSTUDIO_API_KEY}",
-                     "Content-Type": "application/json"},
-            json={
-                "person_image_url":  person_url,
-                "outfit_image_url":  outfit_url,
-                "prompt":            prompt,
-                "resolution":        "standard",
-                "num_images":        1,
-                "style":             "studio",
-            },
-            timeout=60,
-        )
-        r.raise_for_status()
-        vto_image_id = r.json()[0]["id"]          # ← 결과 이미지 ID
-
-        # ② 완료 폴링 (2초 × 30 = 60초)
-        for _ in range(30):
-            info = requests.get(
-                f"https://api.bitstudio.ai/images/{vto_image_id}",
-                headers={"Authorization": f"Bearer {BITSTUDIO_API_KEY}"},
-                timeout=10,
-            ).json()
-
-            if info.get("status") == "completed" and info.get("path"):
-                return vto_image_id              # ✅ 이미지 ID 반환
-            if info.get("status") == "failed":
-                return None
-            time.sleep(2)
-
-        return None  # 타임아웃
+        vto_image_id = bitstudio.submit_vto(person_url, outfit_url, prompt)   # ← 결과 이미지 ID
+    except ProviderUnavailable:
+        # 제공자 장애 중 → 재시도로 워커를 붙잡지 않고 바로 실패 처리
+        logger.warning("VTO 작업 제출 생략 (circuit breaker open): %s", outfit_url)
+        return None
     except Exception as exc:
+        if self.request.retries >= self.max_retries:
+            logger.exception("VTO 작업 제출 실패: %s", outfit_url)
+            return None   # 다음 단계에서 실패로 기록
         raise self.retry(exc=exc)
 
+    # ② 완료 대기 (2초 × 30 = 60초) → ✅ 이미지 ID 반환
+    return _wait_for_job(
+        self, "vto_edit", vto_image_id,
+        f"{bitstudio.base_url}/images/{vto_image_id}",
+        max_polls=30, poll_interval=2,
+    )
+
 @shared_task(bind=True, max_retries=3, default_retry_delay=5)
-def edit_bg_task(self, vto_image_id):
+def edit_bg_task(self, vto_image_id, provider_job_id=None, seed=42):
+    """
+    배경 편집 → 완료 path | None
+    provider_job_id: 배경 편집 API 로 접수된 작업 (상태 조회용), 체인 중간 단계로 쓸 때는 없음
+    """
+    if not vto_image_id:
+        return None   # 이전 태스크 실패한 경우
+
     # 1) Edit 요청
-    r = requests.post(
-        f"https://api.bitstudio.ai/images/{vto_image_id}/edit",
-        headers={"Authorization": f"Bearer {BITSTUDIO_API_KEY}",
-                 "Content-Type":  "application/json"},
-        json={
-            "prompt":      "Replace the background with a soft light-gray studio backdrop (#e8e8e8) and add a subtle floor shadow under the model for realism",
-            "resolution":  "standard",
-            "num_images":  1,
-            "seed":        42
-        },
-        timeout=60,
-    ).json()
-
-    ver = r["versions"][0]
+    try:
+        r = bitstudio.submit_edit(
+            vto_image_id,
+            prompt=STUDIO_BG_PROMPT,
+            seed=seed,
+        )
+        r.raise_for_status()
+        ver = bitstudio.edit_version(r.json())
+    except (requests.RequestException, ValueError, KeyError, IndexError):
+        logger.exception("배경 편집 요청 실패: %s", vto_image_id)
+        if provider_job_id:
+            ProviderJob.objects.filter(pk=provider_job_id).update(status="failed", updated_at=timezone.now())
+        return None   # 다음 단계에서 실패로 기록
+
     result_id = ver.get("source_image_id") or ver["id"]
     poll_url  = (
-        f"https://api.bitstudio.ai/images/{result_id}"
+        f"{bitstudio.base_url}/images/{result_id}"
         if ver.get("source_image_id") else
-        f"https://api.bitstudio.ai/images/versions/{result_id}"
+        f"{bitstudio.base_url}/images/versions/{result_id}"
     )
 
-    # 2) 폴링 (5 s × 36 = 3분)
-    for _ in range(36):
-        info = requests.get(poll_url, headers={"Authorization": f"Bearer {BITSTUDIO_API_KEY}"}, timeout=15).json()
-        if info["status"] == "completed" and info.get("path"):
-            return info["path"]
-        if info["status"] == "failed":
-            return None
-        time.sleep(5)
-    return None
+    # 2) 완료 대기 (5 s × 36 = 3분)
+    return _wait_for_job(self, "edit_bg", result_id, poll_url, max_polls=36, poll_interval=5, job_id=provider_job_id)
 
 @shared_task
-def generate_fitting_video_task(fitting_id, task_id):
-    fitting = FittingResult.objects.get(pk=fitting_id)
-    video_url = None
-
-    # 최대 8분 5초마다 폴링
-    for _ in range(48):
-        time.sleep(10)
-        resp = requests.post(
-            "https://thenewblack.ai/api/1.1/wf/results_video",
-            files={
-                'email':    (None, os.getenv("TNB_EMAIL")),
-                'password': (None, os.getenv("TNB_PASSWORD")),
-                'id':       (None, task_id),
-            }
+def evict_vto_cache():
+    """VTO 결과 캐시 정리 (celery beat 매일 실행) → 삭제 건수"""
+    return vto_cache.evict()
+
+@shared_task
+def run_fitting_batch_task(user_id, person_url, items, prompt, detail=False, fitting_job_id=None):
+    """
+    asyncio 실행 모드: 사용자 1명의 상품 전체를 이 태스크 안에서 동시에 렌더링
+    items: [[product_id, outfit_url], ...] → {"total", "completed", "failed"}
+    진행 상황 캐시를 워커가 못 보거나(REDIS_URL 없음) 도중에 예외가 나도 피팅 상태는 여기서 해제한다.
+    """
+    try:
+        results = asyncio.run(
+            run_fitting_batch(user_id, person_url, items, prompt, detail=detail, fitting_job_id=fitting_job_id)
         )
-        if resp.status_code != 200:
-            continue
-        detail = resp.text.strip()
-        if detail and detail.startswith("http"):
-            video_url = detail
-            break
+    finally:
+        User.objects.filter(pk=user_id).update(is_fitting=False)
+    completed = sum(1 for url in results.values() if url)
+    return {"total": len(results), "completed": completed, "failed": len(results) - completed}
+
+@shared_task(bind=True)
+def generate_fitting_video_task(self, fitting_id, task_id):
+    """
+    TheNewBlack 영상 생성 완료 대기 (10초 × 48 = 8분) → 영상 주소 | None
+    완료는 webhook 또는 폴링으로 확정되고, 이어지는 save_fitting_video_task 가 저장한다.
+    """
+    return _wait_for_job(
+        self, "video", task_id, f"{thenewblack.base_url}/results_video",
+        max_polls=48, poll_interval=10,
+    )
+
+
+def _video_finished(fitting, status, video=None):
+    fields = ['status', 'video'] if video else ['status']
+    fitting.status, fitting.video = status, video or fitting.video
+    fitting.save(update_fields=fields)
+    events.publish(fitting.user_id, "video", {
+        "product_id": fitting.product_id,
+        "status":     status,
+        "video_url":  video,
+    })
+
 
+@shared_task(bind=True, max_retries=2, default_retry_delay=10)
+def save_fitting_video_task(self, video_url, fitting_id):
+    """완료된 영상을 S3 에 저장하고 피팅 결과에 반영 (실패/타임아웃이면 실패로 기록)"""
+    fitting = FittingResult.objects.filter(pk=fitting_id).first()
+    if fitting is None:
+        return None
     if not video_url:
-        fitting.status = 'failed'
-        fitting.save(update_fields=['status'])
-        return
+        _video_finished(fitting, 'failed')
+        return None
 
-    # 비디오 다운로드
-    video_resp = requests.get(video_url, stream=True)
-    video_resp.raise_for_status()
-    video_bytes = video_resp.content
+    # 비디오 다운로드 → S3 multipart 업로드 (본문을 메모리에 올리지 않고 청크 단위로 전달)
+    try:
+        video_resp = downloads.get(video_url, "video", stream=True, timeout=60)
+        video_resp.raise_for_status()
 
-    # S3 업로드 via utils.upload_bytes
-    # prefix 에 사용자·상품 구분자 추가
-    prefix = f"fitting_videos/{fitting.user.id}/{fitting.product.id}/"
-    # ext="mp4" 로 지정
-    s3_url = upload_bytes(prefix, video_bytes, ext="mp4")
+        # prefix 에 사용자·상품 구분자 추가
+        prefix = f"fitting_videos/{fitting.user_id}/{fitting.product_id}/"
+        s3_url = upload_stream(prefix, video_resp, ext="mp4")
+    except (requests.RequestException, BotoCoreError, ClientError) as exc:
+        if self.request.retries >= self.max_retries:
+            logger.warning("피팅 영상 저장 실패: %s", video_url, exc_info=True)
+            _video_finished(fitting, 'failed')
+            return None
+        raise self.retry(exc=exc)
 
     # DB 업데이트
-    fitting.video = s3_url
-    fitting.status = 'completed'
-    fitting.save(update_fields=['video', 'status'])
\ No newline at end of file
+    _video_finished(fitting, 'completed', s3_url)
+    return s3_url
+
+
+def fitting_video_chain(fitting_id, task_id):
+    """제출된 영상 작업의 완료 대기 → 저장 체인"""
+    return chain(
+        generate_fitting_video_task.s(fitting_id, task_id),
+        save_fitting_video_task.s(fitting_id),
+    )
@@ -1,10 +1,20 @@
 from django.urls import path
+from config.async_views import select_view
 from .views import *
+from . import async_views
 
 urlpatterns = [
     path('images', ProductFittingGenerateView.as_view(),name='generate_product_fitting'),
-    path('images/edit-bg-white', EditBgWhiteView.as_view(),name='edit_bg_white'),
+    path('images/edit-bg-white', select_view(EditBgWhiteView, async_views.EditBgWhiteView),name='edit_bg_white'),
+    path('images/edit-bg-white/<uuid:job_id>', select_view(EditBgJobStatusView, async_views.EditBgJobStatusView), name='edit_bg_white_status'),
     path('images/detail',ProductFittingGenerateDetailView.as_view(),name='generate_product_detail_fitting'),
-    path('<int:product_id>/videos',ProductFittingVideoGenerateView.as_view(),name='generate_product_fitting_video'),
-    path('<int:product_id>/videos/status',ProductFittingVideoStatusView.as_view(),name='fitting-status'),
+    path('<int:product_id>/videos',select_view(ProductFittingVideoGenerateView, async_views.ProductFittingVideoGenerateView),name='generate_product_fitting_video'),
+    path('<int:product_id>/videos/status',select_view(ProductFittingVideoStatusView, async_views.ProductFittingVideoStatusView),name='fitting-status'),
+    path('providers/latency', ProviderLatencyView.as_view(), name='provider-latency'),
+    path('images/cache', VTOCacheStatsView.as_view(), name='vto-cache-stats'),
+    path('metrics', PrometheusMetricsView.as_view(), name='fitting-metrics'),
+    path('events', select_view(FittingEventStreamView, async_views.FittingEventStreamView), name='fitting-events'),
+    path('jobs/<str:job_id>', select_view(FittingJobProgressView, async_views.FittingJobProgressView), name='fitting-job-progress'),
+    path('results/<int:fitting_id>/image', FittingResultImageView.as_view(), name='fitting-result-image'),
+    path('webhooks/<str:provider>', ProviderWebhookView.as_view(), name='provider-webhook'),
 ]
\ No newline at end of file
@@ -1,29 +1,20 @@
-import os, io, uuid, boto3, requests
+import time, logging
+from config.storage import storage
+from . import metrics
+from .clients import downloads
 
-s3 = boto3.client(
-    "s3",
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    region_name=os.getenv("AWS_S3_REGION_NAME"),
-)
-BUCKET = os.getenv("AWS_STORAGE_BUCKET_NAME")
-CLOUDFRONT_DOMAIN = os.getenv("AWS_S3_CUSTOM_DOMAIN")
+logger = logging.getLogger(__name__)
+
+
+def is_stored_url(url: str) -> bool:
+    """우리 저장소(CloudFront)에 이미 저장된 객체 주소인지"""
+    return storage.is_stored(url)
 
 def upload_bytes(prefix: str, data: bytes, ext: str = "jpg") -> str:
-    key = f"{prefix}{uuid.uuid4()}.{ext}"
-    s3.upload_fileobj(
-        io.BytesIO(data),
-        BUCKET,
-        key,
-        ExtraArgs={
-            "ContentType": f"image/{ext}",
-            "ContentDisposition": "inline",
-        },
-    )
-    return f"{CLOUDFRONT_DOMAIN}/{key}"
+    return storage.save(prefix, data, ext)
 
 def upload_url(prefix: str, remote_url: str) -> str:
-    resp = requests.get(remote_url, timeout=30)
+    resp = downloads.get(remote_url, "image", timeout=30)
     resp.raise_for_status()
 
     # 확장자 안전 추출
@@ -43,27 +34,59 @@ def upload_fitting_image_to_s3(
     ext: str = "jpg",
 ) -> str:
     if variation is None:
-        key = f"fitting_images/{user_id}/{product_id}/{uuid.uuid4()}.{ext}"
+        prefix = f"fitting_images/{user_id}/{product_id}/"
     else:
-        key = f"fitting_images/{user_id}/{product_id}_{variation}_{uuid.uuid4()}.{ext}"
+        prefix = f"fitting_images/{user_id}/{product_id}_{variation}_"
+    start = time.monotonic()
+    url = storage.save(prefix, image_data, ext)
+    metrics.observe("transfer.image", time.monotonic() - start)
+    metrics.incr("transfer.image:bytes", len(image_data))
+    return url
 
-    s3.upload_fileobj(
-        io.BytesIO(image_data),
-        BUCKET,
-        key,
-        ExtraArgs={"ContentType": f"image/{ext}", "ContentDisposition": "inline"},
-    )
-    return f"{CLOUDFRONT_DOMAIN}/{key}"
 
-def upload_bytes(prefix: str, data: bytes, ext: str = "jpg") -> str:
-    key = f"{prefix}{uuid.uuid4()}.{ext}"
-    s3.upload_fileobj(
-        io.BytesIO(data),
-        BUCKET,
-        key,
-        ExtraArgs={
-            "ContentType": f"{'video' if ext=='mp4' else 'image'}/{ext}",
-            "ContentDisposition": "inline",
-        },
-    )
-    return f"{CLOUDFRONT_DOMAIN}/{key}"
\ No newline at end of file
+class _CountingReader:
+    """업로드되는 바이트 수를 세는 읽기 전용 래퍼 (boto3 는 read() 만 사용)"""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = self.raw.read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def upload_stream(prefix: str, resp, ext: str = "mp4", op: str = "video") -> str:
+    """
+    stream=True 로 받은 응답 본문을 메모리에 모으지 않고 S3 multipart 업로드로 바로 전달
+    S3_MULTIPART_CHUNK_SIZE 단위로 읽어 올리므로 파일 크기와 관계없이 메모리 사용량이 일정하다.
+    """
+    resp.raw.decode_content = True   # gzip 등 전송 인코딩은 풀어서 저장
+    body = _CountingReader(resp.raw)
+
+    start = time.monotonic()
+    try:
+        url = storage.save_stream(prefix, body, ext)
+    finally:
+        resp.close()
+
+    elapsed = time.monotonic() - start
+    metrics.observe(f"transfer.{op}", elapsed)
+    metrics.incr(f"transfer.{op}:bytes", body.bytes_read)
+    logger.info("%s 스트리밍 업로드 %s: %.1fMB, %.1fMB/s",
+                op, url, body.bytes_read / 1e6, body.bytes_read / 1e6 / max(elapsed, 1e-3))
+    return url
+
+
+def transfer_snapshot(ops=("image", "video")) -> dict:
+    """S3 업로드 건수·지연시간·평균 처리량(MB/s)"""
+    snapshot = metrics.snapshot([f"transfer.{op}" for op in ops])
+    totals = metrics.totals([f"transfer.{op}:bytes" for op in ops])
+    for op in ops:
+        stats = snapshot[f"transfer.{op}"]
+        total_bytes = totals[f"transfer.{op}:bytes"]
+        total_ms = (stats["avg_ms"] or 0) * stats["count"]
+        stats["bytes"] = total_bytes
+        stats["avg_mb_per_s"] = round(total_bytes / 1e6 / (total_ms / 1000), 2) if total_ms else None
+    return snapshot
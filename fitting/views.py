@@ -1,4 +1,4 @@
-import os, time
+import os, uuid, json, hmac
 from dotenv import load_dotenv
 from rest_framework import status, parsers
 from rest_framework.generics import GenericAPIView
@@ -9,31 +9,86 @@ from drf_yasg import openapi
 from django.conf import settings
 from openai import OpenAI
 from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 import base64
 from .serializers import GenerateVTORequestSerializer, VTORequestSerializer, GenerateVTOProductRequestSerializer, VTOTestRequestSerializer, ChangeBgSerializer
 import requests
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
 from celery import chord
-from .tasks import run_vto_url_task, save_to_s3_and_db, run_vto_edit_url_task, edit_bg_task, generate_fitting_video_task
-from .utils      import upload_bytes, upload_url
-from .models     import UserImage
+from .tasks import run_vto_url_task, upload_vto_result, persist_callback, run_vto_edit_url_task, edit_bg_task, fitting_video_chain, run_fitting_batch_task, apply_webhook_event
+from .utils      import transfer_snapshot
+from .clients    import thenewblack, latency_snapshot, VIDEO_PROMPT
+from .breaker    import breakers, ProviderUnavailable
+from . import vto_cache, progress, derivatives, metrics, webhooks, prometheus
+from config.images import InvalidImage
+from .models     import UserImage, ProviderJob
 from celery import group, chain
 from product.models import Product
 from django.core.files.uploadedfile import UploadedFile
 from django.shortcuts import get_object_or_404
+from django.http import HttpResponse, StreamingHttpResponse
+from django.db.models import F, Q
 from .models import FittingResult
 import logging
 
 logger = logging.getLogger(__name__)
 load_dotenv()
-BITSTUDIO_API_KEY = os.getenv("BITSTUDIO_API_KEY")
+
+DELTA_PARAMETER = openapi.Parameter(
+    name="mode",
+    in_=openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    required=False,
+    enum=["delta"],
+    description="delta: 피팅 결과가 없거나(실패 포함) 상품 이미지가 바뀐 상품만 다시 예약 (진행 중인 피팅이 끝난 뒤 재요청 가능)",
+)
+
+def fanout_priority(count):
+    """작은 fan-out(단건·delta 재요청)이 대량 fan-out 뒤에 밀리지 않도록 큐 우선순위 부여"""
+    return 8 if count <= settings.FITTING_SMALL_FANOUT else 3
+
+PROVIDER_UNAVAILABLE_RESPONSE = openapi.Response(
+    description="외부 제공자 장애로 일시 중단 (Retry-After 초 후 재시도)",
+    examples={"application/json": {"detail": "bitstudio 호출이 일시 중단되었습니다. 30초 후 다시 시도하세요.", "retry_after": 30}},
+)
+
+
+def provider_unavailable_response(exc):
+    return Response(
+        {"detail": str(exc), "retry_after": exc.retry_after},
+        status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+def fitting_targets(user, delta=False):
+    """
+    피팅을 예약할 상품 (삭제된 상품 제외)
+    delta=True 면 이미 현재 상품 이미지로 렌더링한 결과가 있는 상품은 제외한다.
+    """
+    products = Product.objects.filter(Q(is_deleted=False) | Q(is_deleted__isnull=True))
+    if not delta:
+        return list(products)
+
+    # 렌더링에 쓴 상품 이미지가 그대로인 결과만 최신으로 본다
+    # (source_image 가 없는 예전 결과는 상품 수정 시각으로 판단)
+    fresh = (
+        FittingResult.objects
+        .filter(user=user, image__isnull=False)
+        .exclude(image="")
+        .filter(
+            Q(source_image=F("product__image"))
+            | Q(source_image__isnull=True, updated_at__gte=F("product__updated_at"))
+        )
+    )
+    return list(products.exclude(id__in=fresh.values("product_id")))
 
 class ProductFittingGenerateView(APIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
         operation_summary="상품별 가상 피팅 작업 예약(퀄리티 낮음)",
-        operation_description="사용자의 프로필 사진과 모든 상품 이미지를 이용해 병렬로 가상 피팅 태스크를 예약합니다. 한 번만 실행 가능하며, 실행 중이거나 완료된 경우 재요청이 불가능합니다.",
+        operation_description="사용자의 프로필 사진과 모든 상품 이미지를 이용해 병렬로 가상 피팅 태스크를 예약합니다. 피팅이 진행 중이면 재요청할 수 없으며, 이전 작업이 끝나면 다시 요청할 수 있습니다. mode=delta 로 요청하면 결과가 없거나 상품 이미지가 바뀐 상품만 다시 예약합니다.",
+        manual_parameters=[DELTA_PARAMETER],
         responses={
             202: openapi.Response(
                 description="가상 피팅 작업이 병렬로 예약되었습니다.",
@@ -53,47 +108,74 @@ class ProductFittingGenerateView(APIView):
                         "error": openapi.Schema(type=openapi.TYPE_STRING)
                     }
                 )
-            )
+            ),
+            503: PROVIDER_UNAVAILABLE_RESPONSE,
         },
     )
     def post(self, request):
         user = request.user
+        delta = request.query_params.get("mode") == "delta"
+        # delta 도 진행 중인 작업과 겹치면 같은 상품이 두 번 예약되고 진행 상황(current 작업)이 덮어써진다
         if user.is_fitting:
             return Response(
-                {"error": "이미 가상 피팅을 완료했거나 피팅 중입니다."},
+                {"error": "이미 가상 피팅이 진행 중입니다. 이전 작업이 끝난 뒤 다시 요청하세요."},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # 제공자 장애 중에는 새 작업을 예약하지 않음 (큐에 쌓여 워커를 붙잡지 않도록)
+        unavailable = breakers["bitstudio"].unavailable()
+        if unavailable:
+            return provider_unavailable_response(unavailable)
+
         person_url = user.profile_image
         if not person_url:
             return Response({"error": "사용자 사진이 없습니다."}, status=400)
 
-        products = Product.objects.all()
-        if not products.exists():
+        products = fitting_targets(user, delta)
+        if not products:
+            if delta:
+                return Response({"message": "새로 피팅할 상품이 없습니다.", "total_products": 0}, status=200)
             return Response({"error": "상품이 없습니다."}, status=400)
 
         prompt = "Using the outfit image as the pose, lighting, and background reference, replace the model with the input person so that the person now wears the same clothes in the exact pose and setting. Preserve the model photo’s camera angle, framing, and white-studio background, but swap in the input person’s face, skin tone, hair, and body proportions. Ensure the clothes fit naturally to the new body and the overall result looks realistic and high-quality."
         
-        # 시작 시점에 플래그 설정
+        # 시작 시점에 플래그 설정 (모든 상품이 끝나면 progress 가 해제)
         user.is_fitting = True
         user.save(update_fields=["is_fitting"])
+
+        job_id = uuid.uuid4().hex
+        progress.start(job_id, user.id, [product.id for product in products])
         
-        # 상품별 태스크를 group으로 묶어 한꺼번에 예약
-        tasks = [
-            chain(
-                run_vto_url_task.s(person_url, product.image, prompt),   # ① VTO 생성
-                save_to_s3_and_db.s(user.id, product.id)         # ② S3+DB 저장
+        if settings.FITTING_EXECUTION_MODE == "asyncio":
+            # 워커 태스크 1개 안에서 상품 전체를 코루틴으로 동시 처리
+            items = [[product.id, product.image] for product in products]
+            job = run_fitting_batch_task.apply_async(
+                (user.id, person_url, items, prompt), {"fitting_job_id": job_id},
+                task_id=job_id, priority=fanout_priority(len(products)),
             )
-            for product in products
-        ]
+        else:
+            # 사람 사진은 모든 상품이 같으므로 캐시 키용 다이제스트를 한 번만 구해 넘긴다
+            person_digest = vto_cache.try_digest(person_url)
+            # 상품별 태스크를 group으로 묶어 한꺼번에 예약
+            tasks = [
+                chain(
+                    run_vto_url_task.s(person_url, product.image, prompt, fitting_job_id=job_id, product_id=product.id, person_digest=person_digest),   # ① VTO 생성
+                    upload_vto_result.s(user.id, product.id, source_image=product.image, fitting_job_id=job_id)         # ② S3 업로드
+                )
+                for product in products
+            ]
 
-        job = group(tasks).apply_async()   # 비동기 예약
+            # 모든 상품이 끝나면 콜백이 결과를 한 번에 DB 저장 + 피팅 상태 해제
+            job = chord(tasks)(
+                persist_callback(user.id, job_id, len(products)),
+                task_id=job_id, priority=fanout_priority(len(products)),
+            )
 
         return Response(
             {
                 "message": "가상 피팅 작업이 병렬로 예약되었습니다.",
                 "task_group_id": job.id,
-                "total_products": products.count()
+                "total_products": len(products)
             },
             status=202
         )
@@ -101,31 +183,23 @@ class ProductFittingGenerateView(APIView):
 class EditBgWhiteView(APIView):
     """
     BitStudio Edit Image API를 사용해
-    image_id로 지정한 원본 이미지의 **배경을 흰색**으로 바꿉니다.
+    image_id로 지정한 원본 이미지의 **배경을 스튜디오 배경**으로 바꿉니다.
+    요청은 바로 접수만 하고, 편집·폴링은 edit_bg_task 가 워커에서 처리합니다.
     """
     permission_classes = [AllowAny]
     parser_classes     = [parsers.JSONParser, parsers.FormParser]
 
-    # -------- 수정 파라미터 --------
-    PROMPT      = "Replace the background with a soft light-gray studio backdrop (#e8e8e8) and add a subtle floor shadow under the model for realism"
-    RESOLUTION  = "standard"
-    NUM_IMAGES  = 1
-    SEED        = 4
-
-    # -------- 폴링 설정 --------
-    POLL_INTERVAL = 5   # 초
-    MAX_POLLS     = 36
+    SEED = 4
 
     # -------- Swagger 스키마 --------
     @swagger_auto_schema(
-        operation_summary="이미지 배경을 흰색으로 편집",
+        operation_summary="이미지 배경 편집 작업 접수",
         operation_description="""
-BitStudio **Edit Image API**를 호출해 `image_id`에 해당하는 이미지를
-plain white 배경으로 변경합니다.
+BitStudio **Edit Image API**로 `image_id`에 해당하는 이미지의 배경을
+스튜디오 배경으로 바꾸는 작업을 접수하고 바로 응답합니다.
 
-- 200 OK  : 편집 완료, 최종 URL 반환  
-- 202     : 30초 내 완료되지 않음(계속 폴링 필요)  
-- 400/500 : 요청 실패
+- 202 : 접수 완료, `job_id`로 `images/edit-bg-white/{job_id}` 에서 상태·결과 조회
+- 400 : image_id 누락
 """,
         request_body=openapi.Schema(
             type=openapi.TYPE_OBJECT,
@@ -136,9 +210,18 @@ plain white 배경으로 변경합니다.
             example={"image_id": "IMG_123"}
         ),
         responses={
-            200: openapi.Response(description="편집 완료"),
-            202: openapi.Response(description="편집 진행 중(타임아웃)"),
-            400: openapi.Response(description="BitStudio 요청 실패"),
+            202: openapi.Response(
+                description="편집 작업 접수",
+                examples={
+                    "application/json": {
+                        "detail": "편집 작업이 접수되었습니다.",
+                        "job_id": "0b8c7a1e-2f0d-4c55-9a7e-3f1d2c9b8a10",
+                        "status": "queued",
+                    }
+                }
+            ),
+            400: openapi.Response(description="잘못된 요청"),
+            503: PROVIDER_UNAVAILABLE_RESPONSE,
         },
     )
     # --------------------------------
@@ -150,97 +233,75 @@ plain white 배경으로 변경합니다.
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # 1) 편집 요청
-        try:
-            edit_resp = requests.post(
-                f"https://api.bitstudio.ai/images/{image_id}/edit",
-                headers={
-                    "Authorization": f"Bearer {BITSTUDIO_API_KEY}",
-                    "Content-Type":  "application/json",
-                },
-                json={
-                    "prompt":     self.PROMPT,
-                    "resolution": self.RESOLUTION,
-                    "num_images": self.NUM_IMAGES,
-                    "seed":       self.SEED,
-                },
-                timeout=60,
-            )
-        except requests.RequestException as exc:
-            logger.exception("BitStudio 편집 요청 네트워크 오류")
-            return Response(
-                {"detail": "BitStudio 편집 요청 중 네트워크 오류", "error": str(exc)},
-                status=status.HTTP_502_BAD_GATEWAY,
-            )
-
-        # 2xx 이외 → 실패로 간주
-        if not edit_resp.ok:
-            return Response(
-                {"detail": "BitStudio 편집 요청 실패", "bitstudio_response": edit_resp.text},
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        edit_data = edit_resp.json()
-        logger.debug("BitStudio edit 응답: %s", edit_data)
+        # 제공자 장애 중에는 새 작업을 예약하지 않음 (큐에 쌓여 워커를 붙잡지 않도록)
+        unavailable = breakers["bitstudio"].unavailable()
+        if unavailable:
+            return provider_unavailable_response(unavailable)
 
-        # 2) 새로 만들어진 edited 버전 찾기
-        edit_versions = [
-            v for v in edit_data.get("versions", [])
-            if v.get("version_type") in ("edit", "edited")
-        ]
-        if not edit_versions:
-            return Response(
-                {"detail": "versions 배열에 edit/edited 항목이 없습니다.",
-                 "bitstudio_response": edit_data},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            )
+        job = ProviderJob.objects.create(kind="edit_bg", status="queued", max_polls=36, poll_interval=5)
+        # 사용자 단건 요청 → fan-out 의 배경 편집(fitting.edit) 뒤에 밀리지 않도록 전용 큐
+        edit_bg_task.apply_async(
+            (image_id,), {"provider_job_id": job.id, "seed": self.SEED},
+            queue="fitting.interactive", priority=settings.FITTING_QUEUE_PRIORITY_MAX,
+        )
+        return Response(
+            {
+                "detail": "편집 작업이 접수되었습니다.",
+                "job_id": str(job.public_id),
+                "status": job.status,
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
 
-        edit_version = edit_versions[0]
-        target_id = edit_version["source_image_id"]
-
-        print(target_id)
-        # 3) 편집 완료까지 폴링
-        for _ in range(self.MAX_POLLS):
-            status_resp = requests.get(
-                f"https://api.bitstudio.ai/images/{target_id}",
-                headers={"Authorization": f"Bearer {BITSTUDIO_API_KEY}"},
-                timeout=30,
-            ).json()
-
-            logger.debug("폴링 결과: %s", status_resp)
-
-            if status_resp.get("status") == "completed":
-                return Response(
-                    {
-                        "detail": "편집 완료",
-                        "image":  status_resp.get("path"),
-                        "meta":   status_resp,
-                    },
-                    status=status.HTTP_200_OK,
-                )
-            if status_resp.get("status") == "failed":
-                return Response(
-                    {"detail": "BitStudio 편집 실패", "meta": status_resp},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
 
-            time.sleep(self.POLL_INTERVAL)
+class EditBgJobStatusView(APIView):
+    permission_classes = [AllowAny]
 
-        # 4) 타임아웃
+    @swagger_auto_schema(
+        operation_summary="이미지 배경 편집 작업 상태 조회",
+        operation_description="배경 편집 접수 시 받은 job_id 로 상태를 조회합니다. 완료(completed)되면 image 에 결과 이미지 주소가 담깁니다.",
+        manual_parameters=[
+            openapi.Parameter("job_id", openapi.IN_PATH, type=openapi.TYPE_STRING, required=True, description="배경 편집 접수 응답의 job_id"),
+        ],
+        responses={
+            200: openapi.Response(
+                description="작업 상태 (queued | submitted | polling | completed | failed | timeout)",
+                examples={
+                    "application/json": {
+                        "job_id": "0b8c7a1e-2f0d-4c55-9a7e-3f1d2c9b8a10",
+                        "status": "completed",
+                        "image": "https://cdn.example.com/edited.png",
+                        "created_at": "2025-01-01T00:00:00Z",
+                        "updated_at": "2025-01-01T00:00:40Z",
+                    }
+                }
+            ),
+            404: openapi.Response(description="작업 없음"),
+        },
+    )
+    def get(self, request, job_id):
+        job = ProviderJob.objects.filter(public_id=job_id, kind="edit_bg").first()
+        if not job:
+            return Response({"detail": "편집 작업을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
         return Response(
             {
-                "detail": f"{self.MAX_POLLS * self.POLL_INTERVAL}초 내에 편집이 완료되지 않았습니다.",
-                "meta": edit_data,
+                "job_id":     str(job.public_id),
+                "status":     job.status,
+                "image":      job.result if job.status == "completed" else None,
+                "created_at": job.created_at,
+                "updated_at": job.updated_at,
             },
-            status=status.HTTP_202_ACCEPTED,
+            status=status.HTTP_200_OK,
         )
-        
+
+
 class ProductFittingGenerateDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
         operation_summary="상품별 가상 피팅 작업 예약(퀄리티 높음)",
-        operation_description="사용자의 프로필 사진과 모든 상품 이미지를 이용해 비동기로 상세 가상 피팅 작업을 예약합니다. 이미 완료했거나 진행 중이면 재요청이 불가능합니다.",
+        operation_description="사용자의 프로필 사진과 모든 상품 이미지를 이용해 비동기로 상세 가상 피팅 작업을 예약합니다. 피팅이 진행 중이면 재요청할 수 없으며, 이전 작업이 끝나면 다시 요청할 수 있습니다. mode=delta 로 요청하면 결과가 없거나 상품 이미지가 바뀐 상품만 다시 예약합니다.",
+        manual_parameters=[DELTA_PARAMETER],
         responses={
             202: openapi.Response(
                 description="상세 가상 피팅 작업이 병렬로 예약되었습니다.",
@@ -260,48 +321,73 @@ class ProductFittingGenerateDetailView(APIView):
                         "error": openapi.Schema(type=openapi.TYPE_STRING)
                     }
                 )
-            )
+            ),
+            503: PROVIDER_UNAVAILABLE_RESPONSE,
         },
     )
     def post(self, request):
         user = request.user
+        delta = request.query_params.get("mode") == "delta"
         
+        # delta 도 진행 중인 작업과 겹치면 같은 상품이 두 번 예약되고 진행 상황(current 작업)이 덮어써진다
         if user.is_fitting:
             return Response(
-                {"error": "이미 가상 피팅을 완료했거나 피팅 중입니다."},
+                {"error": "이미 가상 피팅이 진행 중입니다. 이전 작업이 끝난 뒤 다시 요청하세요."},
                 status=status.HTTP_400_BAD_REQUEST
             )
             
+        # 제공자 장애 중에는 새 작업을 예약하지 않음 (큐에 쌓여 워커를 붙잡지 않도록)
+        unavailable = breakers["bitstudio"].unavailable()
+        if unavailable:
+            return provider_unavailable_response(unavailable)
+
         person_url = user.profile_image
         if not person_url:
             return Response({"error": "사용자 사진이 없습니다."}, status=400)
 
-        products = Product.objects.all()
-        if not products.exists():
+        products = fitting_targets(user, delta)
+        if not products:
+            if delta:
+                return Response({"message": "새로 피팅할 상품이 없습니다.", "total_products": 0}, status=200)
             return Response({"error": "상품이 없습니다."}, status=400)
 
         prompt = "Using the outfit image as the pose, lighting, and background reference, replace the model with the input person so that the person now wears the same clothes in the exact pose and setting. Preserve the model photo’s camera angle, framing, and white-studio background, but swap in the input person’s face, skin tone, hair, and body proportions. Ensure the clothes fit naturally to the new body and the overall result looks realistic and high-quality."
-        # 시작 시점에 플래그 설정
+        # 시작 시점에 플래그 설정 (모든 상품이 끝나면 progress 가 해제)
         user.is_fitting = True
         user.save(update_fields=["is_fitting"])
 
-        # 상품별 태스크를 group으로 묶어 한꺼번에 예약
-        tasks = [
-            chain(
-                run_vto_edit_url_task.s(person_url, product.image, prompt),   # ① VTO 생성
-                edit_bg_task.s(),
-                save_to_s3_and_db.s(user.id, product.id)         # ② S3+DB 저장
+        job_id = uuid.uuid4().hex
+        progress.start(job_id, user.id, [product.id for product in products])
+
+        if settings.FITTING_EXECUTION_MODE == "asyncio":
+            # 워커 태스크 1개 안에서 상품 전체를 코루틴으로 동시 처리 (배경 편집 포함)
+            items = [[product.id, product.image] for product in products]
+            job = run_fitting_batch_task.apply_async(
+                (user.id, person_url, items, prompt), {"detail": True, "fitting_job_id": job_id},
+                task_id=job_id, priority=fanout_priority(len(products)),
             )
-            for product in products
-        ]
+        else:
+            # 상품별 태스크를 group으로 묶어 한꺼번에 예약
+            tasks = [
+                chain(
+                    run_vto_edit_url_task.s(person_url, product.image, prompt, fitting_job_id=job_id, product_id=product.id),   # ① VTO 생성
+                    edit_bg_task.s(),
+                    upload_vto_result.s(user.id, product.id, source_image=product.image, fitting_job_id=job_id)         # ② S3 업로드
+                )
+                for product in products
+            ]
 
-        job = group(tasks).apply_async()   # 비동기 예약
+            # 모든 상품이 끝나면 콜백이 결과를 한 번에 DB 저장 + 피팅 상태 해제
+            job = chord(tasks)(
+                persist_callback(user.id, job_id, len(products)),
+                task_id=job_id, priority=fanout_priority(len(products)),
+            )
 
         return Response(
             {
                 "message": "가상 피팅 작업이 병렬로 예약되었습니다.",
                 "task_group_id": job.id,
-                "total_products": products.count()
+                "total_products": len(products)
             },
             status=202
         )
@@ -342,7 +428,8 @@ class ProductFittingVideoGenerateView(APIView):
             ),
             404: openapi.Response(
                 description="해당 상품 또는 피팅 결과를 찾을 수 없습니다."
-            )
+            ),
+            503: PROVIDER_UNAVAILABLE_RESPONSE,
         },
     )
     def post(self, request, product_id):
@@ -368,15 +455,16 @@ class ProductFittingVideoGenerateView(APIView):
             )
 
         # 외부 API에 작업 요청만 보내고 external_id 만 저장
-        resp = requests.post(
-            "https://thenewblack.ai/api/1.1/wf/ai-video",
-            files={
-                'email':    (None, os.getenv("TNB_EMAIL")),
-                'password': (None, os.getenv("TNB_PASSWORD")),
-                'image':    (None, fitting.image),
-                'prompt':   (None, "A full‑body shot of a professional fashion model gracefully alternating between left and right poses on a minimalist studio background, with soft directional lighting highlighting the contours of the clothing, high resolution, ultra‑realistic detail, while preserving the model’s facial features and the precise fit of the clothing."),
-            }
-        )
+        try:
+            resp = thenewblack.submit_video(fitting.image, VIDEO_PROMPT)
+        except ProviderUnavailable as exc:
+            return provider_unavailable_response(exc)
+        except requests.RequestException as exc:
+            logger.exception("TheNewBlack 영상 생성 요청 네트워크 오류")
+            return Response(
+                {"detail": "영상 생성 요청 중 네트워크 오류", "error": str(exc)},
+                status=status.HTTP_502_BAD_GATEWAY,
+            )
         if resp.status_code != 200:
             return Response({"detail": resp.text}, status=resp.status_code)
 
@@ -391,7 +479,7 @@ class ProductFittingVideoGenerateView(APIView):
         fitting.save(update_fields=['status'])
 
         # Celery 태스크 비동기로 호출
-        generate_fitting_video_task.delay(fitting.id, task_id)
+        fitting_video_chain(fitting.id, task_id).delay()
 
         return Response(
             {"detail": "영상 생성 요청을 받았습니다. 잠시 후 상태를 확인하세요."},
@@ -449,4 +537,257 @@ class ProductFittingVideoStatusView(APIView):
         return Response({
             'status':    fitting.status,
             'video_url': fitting.video if fitting.status == 'completed' else None
-        }, status=status.HTTP_200_OK)
\ No newline at end of file
+        }, status=status.HTTP_200_OK)
+
+class ProviderLatencyView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_summary="외부 제공자 호출 지연시간 조회 (관리자 전용)",
+        operation_description="BitStudio / TheNewBlack / 결과 다운로드 호출의 누적 횟수, 평균·최대 지연시간(ms), 영상 스트리밍 업로드 처리량(MB/s)과 제공자별 circuit breaker 상태를 반환합니다.",
+        responses={200: "제공자·호출 종류별 지연시간 집계"},
+    )
+    def get(self, request):
+        return Response(
+            {
+                **latency_snapshot(),
+                **transfer_snapshot(),
+                "breakers": {name: breaker.snapshot() for name, breaker in breakers.items()},
+            },
+            status=status.HTTP_200_OK,
+        )
+
+
+class PrometheusMetricsView(APIView):
+    """Prometheus scrape 대상 (웹/워커가 캐시에 쌓은 집계를 텍스트 형식으로 반환)"""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="피팅 파이프라인 Prometheus 메트릭",
+        operation_description="""
+외부 제공자 호출(제출·상태 조회·다운로드) 지연시간 히스토그램과 결과·재시도·응답 바이트,
+외부 작업 대기 시간·폴링 횟수, S3 업로드 시간·바이트, 태스크별 실행 시간·결과·DB 쿼리 수를 반환합니다.
+
+- 헤더 `Authorization: Bearer {METRICS_SCRAPE_TOKEN}`
+""",
+        responses={
+            200: openapi.Response(description="Prometheus 텍스트 형식 (text/plain; version=0.0.4)"),
+            401: openapi.Response(description="토큰 불일치"),
+            404: openapi.Response(description="METRICS_SCRAPE_TOKEN 미설정 (비활성화)"),
+        },
+    )
+    def get(self, request):
+        token = settings.METRICS_SCRAPE_TOKEN
+        if not token:
+            return Response({"detail": "메트릭 수집이 비활성화되어 있습니다."}, status=status.HTTP_404_NOT_FOUND)
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return Response({"detail": "인증 토큰이 올바르지 않습니다."}, status=status.HTTP_401_UNAUTHORIZED)
+        return HttpResponse(prometheus.render(), content_type=prometheus.CONTENT_TYPE)
+
+
+class VTOCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    @swagger_auto_schema(
+        operation_summary="VTO 결과 캐시 현황 조회 (관리자 전용)",
+        operation_description="같은 입력으로 렌더링한 결과를 재사용한 횟수(hit)와 새로 렌더링한 횟수(miss), 저장된 항목 수와 리사이즈 파생 이미지 캐시 현황을 반환합니다.",
+        responses={200: "캐시 히트/미스 집계"},
+    )
+    def get(self, request):
+        return Response({**vto_cache.stats(), "derivatives": derivatives.stats()}, status=status.HTTP_200_OK)
+
+
+class FittingJobProgressView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="가상 피팅 작업 진행 상황 조회",
+        operation_description="피팅 예약 시 받은 task_group_id 로 전체/완료/실패/진행 중/업로드 완료(저장 대기) 상품 수와 상품별 상태·소요 시간을 한 번에 조회합니다. job_id 에 current 를 넣으면 가장 최근 작업을 조회합니다.",
+        manual_parameters=[
+            openapi.Parameter(
+                name="job_id",
+                in_=openapi.IN_PATH,
+                type=openapi.TYPE_STRING,
+                required=True,
+                description="피팅 예약 응답의 task_group_id 또는 current",
+            ),
+        ],
+        responses={
+            200: openapi.Response(
+                description="진행 상황",
+                examples={
+                    "application/json": {
+                        "job_id": "string",
+                        "total": 10,
+                        "done": 7,
+                        "failed": 1,
+                        "in_flight": 1,
+                        "uploaded": 1,
+                        "started_at": 1720000000.0,
+                        "finished_at": None,
+                        "elapsed": 42.3,
+                        "products": {"1": {"status": "done", "started_at": 1720000001.0, "finished_at": 1720000030.0}},
+                    }
+                }
+            ),
+            404: openapi.Response(description="작업이 없거나 만료됨"),
+        },
+    )
+    def get(self, request, job_id):
+        if job_id == "current":
+            job_id = progress.current_job_id(request.user.id)
+        data = progress.get(job_id) if job_id else None
+        if not data or data["user_id"] != request.user.id:
+            return Response({"detail": "피팅 작업을 찾을 수 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data, status=status.HTTP_200_OK)
+
+
+def event_snapshot(user_id) -> dict:
+    """스트림 연결 직후 보낼 현재 상태 (최근 피팅 작업 진행 상황 + 생성 중인 영상)"""
+    job_id = progress.current_job_id(user_id)
+    videos = FittingResult.objects.filter(user_id=user_id, status='processing').values_list('product_id', flat=True)
+    return {
+        "fitting": progress.get(job_id) if job_id else None,
+        "videos":  [{"product_id": product_id, "status": "processing", "video_url": None} for product_id in videos],
+    }
+
+
+def sse_response(body):
+    response = StreamingHttpResponse(body, content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"   # 프록시(nginx 등) 버퍼링 해제
+    return response
+
+
+class EventStreamRenderer(BaseRenderer):
+    """EventSource 의 Accept: text/event-stream 요청이 406 이 되지 않도록 (본문은 StreamingHttpResponse 가 직접 씀)"""
+    media_type = "text/event-stream"
+    format = "sse"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, ensure_ascii=False).encode()
+
+
+class FittingEventStreamView(APIView):
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [EventStreamRenderer, JSONRenderer]
+
+    @swagger_auto_schema(
+        operation_summary="피팅·영상 상태 이벤트 스트림 (SSE)",
+        operation_description="""
+상품별 폴링 대신 사용자 1명의 피팅 이미지·영상 상태 변화를 Server-Sent Events 로 받습니다.
+
+- `snapshot` : 연결 직후 현재 상태 `{"fitting": 진행 상황 | null, "videos": [...]}`
+- `fitting` : 상품별 렌더링 상태 `{"job_id", "product_id", "status": in_flight | uploaded | done | failed}` (uploaded: 결과 업로드 완료, 저장 대기)
+- `fitting.finished` : 피팅 작업 전체 완료 `{"job_id", "done", "failed"}`
+- `video` : 영상 생성 결과 `{"product_id", "status": completed | failed, "video_url"}`
+
+SSE_MAX_DURATION 이 지나면 서버가 연결을 끊고, EventSource 가 자동으로 재접속해 snapshot 부터 다시 받습니다.
+
+ASGI 배포(SERVER_MODE=asgi, ASYNC_VIEWS=true)에서만 제공되며, WSGI 배포에서는 501 을 반환합니다.
+이 경우 `fittings/jobs/{job_id}` 로 진행 상황을 조회하세요.
+""",
+        responses={200: "text/event-stream", 501: "WSGI 배포에서는 지원하지 않음"},
+    )
+    def get(self, request):
+        # 동기 워커는 연결 1개가 SSE_MAX_DURATION 동안 워커를 점유해 나머지 API 가 멈추므로 스트림을 열지 않는다
+        return Response(
+            {"error": "이벤트 스트림은 ASGI 배포에서만 제공됩니다. fittings/jobs/{job_id} 로 진행 상황을 조회하세요."},
+            status=status.HTTP_501_NOT_IMPLEMENTED,
+        )
+
+
+class FittingResultImageView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_summary="피팅 결과 이미지 리사이즈",
+        operation_description="피팅 결과 이미지를 요청한 폭(px)과 포맷으로 변환해 반환합니다. 폭은 20px 단위로 올림되며, 한 번 만든 이미지는 캐시되어 다음 요청부터 바로 반환됩니다.",
+        manual_parameters=[
+            openapi.Parameter("fitting_id", openapi.IN_PATH, type=openapi.TYPE_INTEGER, required=True, description="피팅 결과 ID"),
+            openapi.Parameter("width", openapi.IN_QUERY, type=openapi.TYPE_INTEGER, required=True, description="이미지 폭 (px)"),
+            openapi.Parameter("image_format", openapi.IN_QUERY, type=openapi.TYPE_STRING, required=False,
+                              enum=list(derivatives.FORMATS), default="webp", description="이미지 포맷"),
+        ],
+        responses={200: "리사이즈된 이미지", 400: "잘못된 요청", 404: "피팅 결과 또는 이미지 없음"},
+    )
+    def get(self, request, fitting_id):
+        fitting = FittingResult.objects.filter(pk=fitting_id, user=request.user).only("image").first()
+        if not fitting or not fitting.image:
+            return Response({"error": "피팅 결과 이미지를 찾을 수 없습니다."}, status=404)
+
+        try:
+            width = derivatives.snap_width(int(request.query_params.get("width", "")))
+        except ValueError:
+            return Response({"error": "width 는 정수여야 합니다."}, status=400)
+        fmt = request.query_params.get("image_format", "webp")
+        if fmt not in derivatives.FORMATS:
+            return Response({"error": f"image_format 은 {', '.join(derivatives.FORMATS)} 중 하나여야 합니다."}, status=400)
+
+        try:
+            found = derivatives.get_derivative(fitting.image, width, fmt)
+        except InvalidImage as exc:
+            return Response({"error": str(exc)}, status=400)
+        if not found:
+            return Response({"error": "피팅 결과 이미지를 찾을 수 없습니다."}, status=404)
+
+        data, content_type = found
+        response = HttpResponse(data, content_type=content_type)
+        response["Cache-Control"] = "private, max-age=86400"
+        return response
+
+
+class ProviderWebhookView(APIView):
+    """
+    외부 제공자 작업 완료 콜백
+    서명을 확인한 뒤 추적 중인 ProviderJob 을 확정하고, 멈춰둔 후속 단계(결과 저장)를 이어서 실행합니다.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    @swagger_auto_schema(
+        operation_summary="외부 제공자 작업 완료 webhook",
+        operation_description="""
+BitStudio / TheNewBlack 이 작업 완료·실패 시 호출합니다.
+
+- 헤더 `X-Webhook-Timestamp`(unix 초), `X-Webhook-Signature`(`sha256=` + HMAC-SHA256(secret, "{timestamp}." + 본문))
+- 본문: `{"id": 외부 작업 ID, "status": "completed" | "failed", "path" | "video_url": 결과 주소}`
+- 404 는 아직 등록되지 않은 작업이므로 제공자가 재시도합니다.
+""",
+        manual_parameters=[
+            openapi.Parameter("provider", openapi.IN_PATH, type=openapi.TYPE_STRING, required=True, enum=list(webhooks.PROVIDER_KINDS)),
+        ],
+        responses={
+            200: openapi.Response(
+                description="반영 완료 (이미 확정된 작업이면 그대로 응답)",
+                examples={"application/json": {"detail": "작업 상태를 반영했습니다.", "status": "completed"}}
+            ),
+            400: openapi.Response(description="본문 형식 오류"),
+            401: openapi.Response(description="서명 검증 실패"),
+            404: openapi.Response(description="알 수 없는 제공자 또는 작업"),
+        },
+    )
+    def post(self, request, provider):
+        if provider not in webhooks.PROVIDER_KINDS:
+            return Response({"detail": "알 수 없는 제공자입니다."}, status=status.HTTP_404_NOT_FOUND)
+
+        # 서명은 원본 본문 기준이므로 파싱 전에 확인
+        body = request.body
+        try:
+            webhooks.verify(provider, request.headers, body)
+        except webhooks.InvalidSignature as exc:
+            metrics.incr(f"provider.webhook.{provider}.rejected")
+            logger.warning("%s webhook 서명 검증 실패: %s", provider, exc)
+            return Response({"detail": str(exc)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            external_id, info = webhooks.parse_event(provider, json.loads(body))
+        except (ValueError, AttributeError) as exc:
+            return Response({"detail": f"잘못된 webhook 본문입니다: {exc}"}, status=status.HTTP_400_BAD_REQUEST)
+
+        metrics.incr(f"provider.webhook.{provider}.received")
+        job = apply_webhook_event(provider, external_id, info)
+        if job is None:
+            return Response({"detail": "추적 중인 작업이 없습니다."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"detail": "작업 상태를 반영했습니다.", "status": job.status}, status=status.HTTP_200_OK)
@@ -0,0 +1,118 @@
+"""
+내용 기반(content-addressed) VTO 결과 캐시
+
+(사람 사진 바이트, 옷 사진 바이트, 프롬프트, resolution, style, seed) 해시가 같으면
+이전에 S3 에 저장한 렌더링 결과를 그대로 재사용한다.
+이미지 URL 은 S3 uuid 키라 내용이 바뀌지 않으므로 URL → 다이제스트를 캐시해
+사용자 사진처럼 같은 이미지를 상품마다 다시 내려받지 않는다.
+"""
+import hashlib, logging
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.db.models import F
+from django.utils import timezone
+
+from fitting import metrics
+from fitting.clients import downloads
+from fitting.models import VTOCacheEntry
+
+logger = logging.getLogger(__name__)
+
+DIGEST_TTL = 60 * 60 * 24 * 7
+
+
+def image_digest(url: str) -> str:
+    key = "vto:digest:" + hashlib.sha1(url.encode()).hexdigest()
+    digest = cache.get(key)
+    if digest is None:
+        resp = downloads.get(url, "image", timeout=30)
+        resp.raise_for_status()
+        digest = hashlib.sha256(resp.content).hexdigest()
+        cache.set(key, digest, DIGEST_TTL)
+    return digest
+
+
+def try_digest(url):
+    """
+    이미지 다이제스트 | None (캐시를 쓰지 않거나 구할 수 없으면)
+    fan-out 전에 사람 사진 다이제스트를 한 번만 구해 make_key 에 넘기는 용도 (상품마다 다시 내려받지 않도록)
+    """
+    if not settings.VTO_CACHE_ENABLED:
+        return None
+    try:
+        return image_digest(url)
+    except Exception:
+        logger.warning("이미지 다이제스트 계산 실패: %s", url, exc_info=True)
+        return None
+
+
+def make_key(person_url, outfit_url, prompt, resolution="standard", style="studio", seed=None, person_digest=None):
+    """
+    캐시 키 (sha256), 이미지를 받을 수 없거나 캐시 장애면 None → 캐시 없이 진행
+    person_digest: 미리 구한 사람 사진 다이제스트 (try_digest)
+    """
+    if not settings.VTO_CACHE_ENABLED:
+        return None
+    try:
+        parts = [person_digest or image_digest(person_url), image_digest(outfit_url), prompt, resolution, style, str(seed)]
+    except Exception:
+        logger.warning("VTO 캐시 키 생성 실패: %s / %s", person_url, outfit_url, exc_info=True)
+        return None
+    return hashlib.sha256("\0".join(parts).encode()).hexdigest()
+
+
+def lookup(key):
+    """저장된 결과 이미지 URL | None (히트/미스 집계)"""
+    if not key:
+        return None
+    try:
+        image = VTOCacheEntry.objects.filter(key=key).values_list("image", flat=True).first()
+    except DatabaseError:
+        logger.warning("VTO 캐시 조회 실패: %s", key, exc_info=True)
+        return None
+    if image is None:
+        metrics.incr("vto_cache.miss")
+        return None
+
+    metrics.incr("vto_cache.hit")
+    VTOCacheEntry.objects.filter(key=key).update(hit_count=F("hit_count") + 1, last_used_at=timezone.now())
+    return image
+
+
+def store(key, image):
+    """결과 등록 (실패해도 렌더링 결과 저장은 계속되도록 로그만 남김)"""
+    if not (key and image):
+        return
+    try:
+        VTOCacheEntry.objects.get_or_create(key=key, defaults={"image": image})
+    except DatabaseError:
+        logger.warning("VTO 캐시 저장 실패: %s", key, exc_info=True)
+
+
+def stats() -> dict:
+    values = cache.get_many([f"{metrics.PREFIX}vto_cache.hit", f"{metrics.PREFIX}vto_cache.miss"])
+    hits = values.get(f"{metrics.PREFIX}vto_cache.hit", 0)
+    misses = values.get(f"{metrics.PREFIX}vto_cache.miss", 0)
+    return {
+        "hits":     hits,
+        "misses":   misses,
+        "hit_rate": round(hits / (hits + misses), 3) if hits + misses else None,
+        "entries":  VTOCacheEntry.objects.count(),
+    }
+
+
+def evict() -> int:
+    """
+    TTL 이 지난 항목과 최대 개수를 넘는 항목(마지막 사용이 오래된 순)을 제거
+    S3 객체는 FittingResult 가 계속 참조하므로 지우지 않고 캐시 항목만 삭제한다.
+    """
+    expired = timezone.now() - timedelta(days=settings.VTO_CACHE_TTL_DAYS)
+    deleted, _ = VTOCacheEntry.objects.filter(last_used_at__lt=expired).delete()
+
+    overflow = VTOCacheEntry.objects.count() - settings.VTO_CACHE_MAX_ENTRIES
+    if overflow > 0:
+        ids = list(VTOCacheEntry.objects.order_by("last_used_at").values_list("id", flat=True)[:overflow])
+        deleted += VTOCacheEntry.objects.filter(id__in=ids).delete()[0]
+    return deleted
@@ -0,0 +1,76 @@
+"""
+외부 제공자(BitStudio, TheNewBlack) 작업 완료 webhook 서명·해석
+
+서명: X-Webhook-Signature = "sha256=" + HMAC-SHA256(secret, f"{timestamp}." + 원본 본문)
+      X-Webhook-Timestamp = 서명 시각(unix 초), PROVIDER_WEBHOOK_TOLERANCE 를 넘으면 재전송 공격으로 보고 거부
+secret 은 제공자별로 PROVIDER_WEBHOOK_SECRETS 에 둔다 (비어 있으면 해당 제공자 webhook 은 모두 거부).
+"""
+import hmac, time, hashlib
+from django.conf import settings
+
+SIGNATURE_HEADER = "X-Webhook-Signature"
+TIMESTAMP_HEADER = "X-Webhook-Timestamp"
+
+# 제공자 → webhook 으로 완료를 받는 ProviderJob 종류
+PROVIDER_KINDS = {
+    "bitstudio":   ("vto", "vto_edit", "edit_bg"),
+    "thenewblack": ("video",),
+}
+
+
+class InvalidSignature(Exception):
+    pass
+
+
+def sign(secret: str, timestamp, body: bytes) -> str:
+    mac = hmac.new(secret.encode(), f"{timestamp}.".encode() + body, hashlib.sha256)
+    return f"sha256={mac.hexdigest()}"
+
+
+def signed_headers(provider: str, body: bytes) -> dict:
+    """제공자 대역(로컬 테스트, 에뮬레이터)이 webhook 을 보낼 때 붙일 헤더"""
+    timestamp = int(time.time())
+    return {
+        TIMESTAMP_HEADER: str(timestamp),
+        SIGNATURE_HEADER: sign(settings.PROVIDER_WEBHOOK_SECRETS[provider], timestamp, body),
+        "Content-Type": "application/json",
+    }
+
+
+def verify(provider: str, headers, body: bytes, now=None):
+    """서명이 맞지 않으면 InvalidSignature"""
+    secret = settings.PROVIDER_WEBHOOK_SECRETS.get(provider)
+    if not secret:
+        raise InvalidSignature(f"{provider} webhook secret 이 설정되지 않았습니다.")
+
+    signature = headers.get(SIGNATURE_HEADER) or ""
+    try:
+        timestamp = int(headers.get(TIMESTAMP_HEADER) or "")
+    except ValueError:
+        raise InvalidSignature("서명 시각이 없습니다.")
+    if abs((now or time.time()) - timestamp) > settings.PROVIDER_WEBHOOK_TOLERANCE:
+        raise InvalidSignature("서명 시각이 허용 범위를 벗어났습니다.")
+    if not hmac.compare_digest(sign(secret, timestamp, body), signature):
+        raise InvalidSignature("서명이 일치하지 않습니다.")
+
+
+def callback_url(provider: str) -> str | None:
+    """작업 제출 시 넘길 콜백 주소 (webhook 을 쓰지 않으면 None)"""
+    if not settings.PROVIDER_WEBHOOKS_ENABLED:
+        return None
+    return f"{settings.PROVIDER_WEBHOOK_BASE_URL.rstrip('/')}/fittings/webhooks/{provider}"
+
+
+def parse_event(provider: str, payload: dict) -> tuple[str, dict]:
+    """
+    제공자별 본문 → (외부 작업 ID, 상태 dict)
+    상태 dict 는 폴링 응답과 같은 형식 {"status": completed | failed | ..., "path": 결과 주소}
+    """
+    if provider == "thenewblack":
+        path = payload.get("video_url") or payload.get("result")
+    else:
+        path = payload.get("path")
+    external_id = str(payload.get("id") or "")
+    if not external_id:
+        raise ValueError("작업 ID(id)가 없습니다.")
+    return external_id, {"status": payload.get("status"), "path": path}
@@ -0,0 +1,69 @@
+"""
+ASGI 배포(ASYNC_VIEWS=True)용 상품 조회 async 뷰
+등록/이미지 업로드(POST)는 기존 DRF 뷰가 처리한다 (sync_view).
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+
+from config.async_views import AsyncAPIView
+from config.images import pick as pick_image
+from config.pagination import InvalidCursor, page_params
+from config.fields import InvalidFields, select_fields
+from fitting.models import FittingResult
+from product import views, catalogue
+from product.models import Product, ProductImage
+
+
+class ProductCreateListView(AsyncAPIView):
+    login_required = False
+    sync_view = views.ProductCreateListView
+
+    async def get(self, request):
+        show_fitting = request.GET.get('show_fitting', 'false').lower() == 'true'
+        image_size = request.GET.get('image_size')
+        try:
+            after, limit = page_params(request.GET)
+            fields = select_fields(request.GET, catalogue.PRODUCT_FIELDS, catalogue.LIST_FIELDS, required=("product_id",))
+        except (InvalidCursor, InvalidFields) as exc:
+            return JsonResponse({"detail": str(exc)}, status=400)
+
+        if show_fitting and not request.user.is_authenticated:
+            return JsonResponse({"detail": "로그인이 필요합니다."}, status=401)
+
+        result, next_cursor = await sync_to_async(catalogue.page)(image_size, after, limit, fields)
+        if show_fitting and "image" in fields:
+            fitting_map = {
+                product_id: image
+                async for product_id, image in FittingResult.objects
+                .filter(user=request.user, is_deleted=False, product_id__in=[p["product_id"] for p in result])
+                .values_list("product_id", "image")
+                if image
+            }
+            result = catalogue.with_fittings(result, fitting_map)
+        return JsonResponse({'products': result, 'next': next_cursor})
+
+
+class ProductDetailImageView(AsyncAPIView):
+    login_required = False
+    sync_view = views.ProductDetailImageView
+
+    async def get(self, request, product_id):
+        product = await Product.objects.filter(pk=product_id).afirst()
+        if not product:
+            return JsonResponse({'error': '상품이 존재하지 않습니다.'}, status=404)
+
+        image_size = request.GET.get('image_size')
+        product_images = [
+            pick_image(image, variants, image_size)
+            async for image, variants in ProductImage.objects
+            .filter(product=product, is_deleted=0).values_list('image', 'image_variants')
+        ]
+        return JsonResponse({
+            "product_id": product.id,
+            "name": product.name,
+            "content": product.content,
+            "price": product.price,
+            "count": product.count,
+            "model_image": pick_image(product.image, product.image_variants, image_size),
+            "product_images": product_images,
+        })
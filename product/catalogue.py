@@ -0,0 +1,116 @@
+"""
+상품 목록(카탈로그) 캐시
+
+삭제되지 않은 상품의 목록 응답을 페이지(이미지 크기·cursor·limit)별로 공용 캐시에 두고,
+Product 가 저장·삭제(soft delete 포함)되면 버전을 올려 한 번에 무효화한다.
+페이지는 keyset(id 순) 조회로 만들므로 상품 수와 관계없이 캐시 미스 비용도 일정하다 (config/pagination.py).
+- 캐시 키에 버전(catalogue:version)이 들어가므로 이전 버전 항목은 더 이상 조회되지 않고 TTL 로 사라진다.
+- 버전은 트랜잭션 커밋 뒤에 올린다 (커밋 전 데이터로 새 버전이 채워지지 않도록).
+- 응답 필드(?fields=)에 필요한 컬럼만 .values() 로 읽는다. 기본은 목록 화면용 LIST_FIELDS (상세 설명 제외).
+- 캐시는 서버가 발급했을 수 있는 cursor(첫 페이지, 목록에 있는 상품 id)의 페이지만 저장한다.
+  익명 사용자가 임의의 cursor 를 보내도 캐시 항목이 늘지 않도록 (그런 요청은 매번 DB 에서 만든다).
+- show_fitting=true 는 캐시된 기본 목록에 사용자 피팅 이미지만 덮어쓴다.
+- bulk_create / QuerySet.update 는 신호가 없으므로 호출한 쪽에서 invalidate() 를 부른다.
+"""
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+
+from config.images import pick as pick_image
+from config.fields import columns
+from config.pagination import keyset_page
+
+VERSION_KEY = "catalogue:version"
+
+# 응답 필드 → 조회 컬럼 (product_id 는 항상 포함)
+PRODUCT_FIELDS = {
+    "product_id": ("id",),
+    "name":       ("name",),
+    "price":      ("price",),
+    "image":      ("image", "image_variants"),
+    "content":    ("content",),
+}
+LIST_FIELDS = ("product_id", "name", "price", "image")
+
+
+def _version() -> int:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # 버전 키가 밀려나도 예전 버전 번호를 다시 쓰지 않도록 현재 시각(ms)에서 시작
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+
+
+def _on_product_changed(sender, **kwargs):
+    transaction.on_commit(invalidate)
+
+
+def connect():
+    from product.models import Product
+    post_save.connect(_on_product_changed, sender=Product, dispatch_uid="product.catalogue.save")
+    post_delete.connect(_on_product_changed, sender=Product, dispatch_uid="product.catalogue.delete")
+
+
+def _item(row, fields, image_size) -> dict:
+    item = {}
+    for name in fields:
+        if name == "product_id":
+            item[name] = row["id"]
+        elif name == "image":
+            item[name] = pick_image(row["image"], row["image_variants"], image_size)
+        else:
+            item[name] = row[name]
+    return item
+
+
+def _listed():
+    from product.models import Product
+    return Product.objects.filter(Q(is_deleted=False) | Q(is_deleted__isnull=True))
+
+
+def _build(image_size, after, limit, fields) -> tuple[list[dict], str | None]:
+    products = _listed().values(*columns(fields, PRODUCT_FIELDS))
+    rows, next_cursor = keyset_page(products, after, limit)
+    return [_item(row, fields, image_size) for row in rows], next_cursor
+
+
+def _issued(after) -> bool:
+    """서버가 발급했을 수 있는 cursor 인지 (다음 페이지 cursor 는 항상 목록에 있는 상품 id)"""
+    return after == 0 or _listed().filter(id=after).exists()
+
+
+def page(image_size=None, after=0, limit=20, fields=LIST_FIELDS) -> tuple[list[dict], str | None]:
+    """
+    기본 상품 목록 1페이지 → (상품 목록, 다음 페이지 cursor | None)
+    fields 는 PRODUCT_FIELDS 순서로 정렬된 목록 (config.fields.select_fields)
+    캐시 미스면 DB 에서 만들어 저장(발급한 cursor 만), 반환 목록은 수정하지 않는다.
+    """
+    if image_size not in settings.IMAGE_VARIANT_WIDTHS:
+        image_size = None   # 없는 크기는 원본과 같은 결과 → 캐시 키를 늘리지 않음
+    key = f"catalogue:{_version()}:{image_size or 'original'}:{after}:{limit}:{','.join(fields)}"
+    result = cache.get(key)
+    if result is None:
+        result = _build(image_size, after, limit, fields)
+        if _issued(after):
+            cache.set(key, result, settings.CATALOGUE_CACHE_TTL)
+    return result
+
+
+def with_fittings(items, fitting_map) -> list[dict]:
+    """기본 목록에 사용자 피팅 이미지를 덮어쓴 새 목록 (피팅 결과가 없으면 기본 이미지)"""
+    return [
+        {**item, "image": fitting_map[item["product_id"]]}
+        if "image" in item and item["product_id"] in fitting_map else item
+        for item in items
+    ]
@@ -20,6 +20,7 @@ class Product(models.Model):
     price = models.IntegerField(verbose_name="가격")
     count = models.IntegerField(verbose_name="재고")
     image = models.CharField(max_length=255, verbose_name="모델 이미지 주소")
+    image_variants = models.JSONField(default=dict, blank=True, verbose_name="크기별 이미지 주소")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="생성일시")
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True, verbose_name="수정일시")
     is_deleted = models.BooleanField(null=True, blank=True, verbose_name="삭제여부")
@@ -34,6 +35,7 @@ class Product(models.Model):
 class ProductImage(models.Model):
     product = models.ForeignKey(Product, on_delete=models.CASCADE, related_name='product_images', verbose_name="상품 아이디")
     image = models.CharField(max_length=255, verbose_name="상품 이미지 주소")
+    image_variants = models.JSONField(default=dict, blank=True, verbose_name="크기별 이미지 주소")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="생성일시")
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True, verbose_name="수정일시")
     is_deleted = models.BooleanField(null=True, blank=True, verbose_name="삭제여부")
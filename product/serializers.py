@@ -11,10 +11,14 @@ class ProductCreateSerializer(serializers.ModelSerializer):
     def create(self, validated_data):
         image_file = validated_data.pop('image_file')
         from .utils import upload_image_to_s3  # S3 업로드 함수
+        from config.images import InvalidImage
 
         # S3 업로드 후 URL 획득
-        s3_url = upload_image_to_s3(image_file, folder='model_images/')
+        try:
+            s3_url, variants = upload_image_to_s3(image_file, folder='model_images/')
+        except InvalidImage as exc:
+            raise serializers.ValidationError({"image_file": str(exc)})
 
         # 상품 등록
-        product = Product.objects.create(image=s3_url, **validated_data)
+        product = Product.objects.create(image=s3_url, image_variants=variants, **validated_data)
         return product
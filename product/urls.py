@@ -1,7 +1,9 @@
 from django.urls import path
+from config.async_views import select_view
 from .views import ProductCreateListView, ProductDetailImageView
+from . import async_views
 
 urlpatterns = [
-    path('', ProductCreateListView.as_view(), name='product-create'),                         # POST /products/
-    path('<int:product_id>', ProductDetailImageView.as_view(), name='product-detail'),        # GET  /products/{product_id}    path('<int:product_id>/images', ProductDetailImageView.as_view(), name='product-images'), # POST /products/{product_id}/images
+    path('', select_view(ProductCreateListView, async_views.ProductCreateListView), name='product-create'),                         # POST /products/
+    path('<int:product_id>', select_view(ProductDetailImageView, async_views.ProductDetailImageView), name='product-detail'),        # GET  /products/{product_id}    path('<int:product_id>/images', ProductDetailImageView.as_view(), name='product-images'), # POST /products/{product_id}/images
 ]
@@ -1,46 +1,45 @@
-import os, io, uuid, boto3
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from config import images
 
-s3 = boto3.client(
-    "s3",
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    region_name=os.getenv("AWS_S3_REGION_NAME"),
-)
+logger = logging.getLogger(__name__)
 
-BUCKET = os.getenv("AWS_STORAGE_BUCKET_NAME")
-CLOUDFRONT_DOMAIN = os.getenv("AWS_S3_CUSTOM_DOMAIN")
 
+def upload_product_image(product_id: int, image_bytes: bytes) -> tuple[str, dict]:
+    """
+    상품 ID 하위로 이미지(원본 + 크기별 변형)를 저장 → (원본 URL, {변형: URL})
+    product_images/{product_id}/{uuid}.jpg, {uuid}_{변형}.webp
+    이미지가 아니면 images.InvalidImage
+    """
+    return images.store(f"product_images/{product_id}/", images.process(image_bytes))
 
-def upload_product_image(product_id: int, image_bytes: bytes, ext: str = "jpg") -> str:
+
+def upload_image_to_s3(image_file, folder: str = "model_images/") -> tuple[str, dict]:
     """
-    상품 ID 기반으로 S3에 이미지 저장 후 CloudFront URL 반환
-    model_images/{product_id}/{uuid}.jpg 형식
+    업로드된 이미지 파일을 folder 하위에 저장 (상품 ID 가 정해지기 전 등록용)
     """
-    key = f"model_images/{product_id}/{uuid.uuid4()}.{ext}"
-    s3.upload_fileobj(
-        io.BytesIO(image_bytes),
-        BUCKET,
-        key,
-        ExtraArgs={
-            "ContentType": f"image/{ext}",
-            "ContentDisposition": "inline",
-        },
-    )
-    return f"{CLOUDFRONT_DOMAIN}/{key}"
-
-def upload_product_image(product_id: int, image_bytes: bytes, ext: str = "jpg") -> str:
+    return images.store(folder, images.process(image_file.read()))
+
+
+def upload_product_images(product_id: int, image_files) -> tuple[list, list]:
     """
-    상품 ID 하위로 이미지를 저장하고 CloudFront URL 반환
-    product_images/{product_id}/{uuid}.jpg
+    여러 이미지 파일을 스레드 풀에서 동시에 처리·업로드
+    → (업로드 순서대로의 [(URL, 변형)], 실패 목록 [{"filename", "error"}])
     """
-    key = f"product_images/{product_id}/{uuid.uuid4()}.{ext}"
-    s3.upload_fileobj(
-        io.BytesIO(image_bytes),
-        BUCKET,
-        key,
-        ExtraArgs={
-            "ContentType": f"image/{ext}",
-            "ContentDisposition": "inline",
-        },
-    )
-    return f"{CLOUDFRONT_DOMAIN}/{key}"
+    def upload(image_file):
+        try:
+            return upload_product_image(product_id, image_file.read()), None
+        except images.InvalidImage as exc:
+            return None, {"filename": image_file.name, "error": str(exc)}
+        except Exception as exc:
+            logger.warning("상품 %s 이미지 업로드 실패: %s", product_id, image_file.name, exc_info=True)
+            return None, {"filename": image_file.name, "error": str(exc)}
+
+    workers = max(1, min(settings.PRODUCT_UPLOAD_CONCURRENCY, len(image_files)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(upload, image_files))
+
+    uploaded = [result for result, _ in outcomes if result]
+    failed = [error for _, error in outcomes if error]
+    return uploaded, failed
@@ -4,12 +4,27 @@ from rest_framework.permissions import AllowAny
 from rest_framework.parsers import MultiPartParser, FormParser
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
-from django.db.models import Q
+from django.conf import settings
 from rest_framework.permissions import IsAuthenticated
 
 from .models import Product, ProductImage
-from .utils import upload_product_image
+from .utils import upload_product_image, upload_product_images
+from . import catalogue
 from fitting.models import FittingResult
+from config.images import InvalidImage, pick as pick_image
+from config.pagination import InvalidCursor, PAGINATION_PARAMETERS, page_params
+from config.fields import InvalidFields, select_fields, fields_parameter
+
+IMAGE_SIZE_PARAMETER = openapi.Parameter(
+    name="image_size",
+    in_=openapi.IN_QUERY,
+    type=openapi.TYPE_STRING,
+    required=False,
+    enum=list(settings.IMAGE_VARIANT_WIDTHS),
+    description="이미지 크기 (thumbnail 160px / list 480px / detail 1080px, WebP). 생략 시 원본",
+)
+
+LIST_FIELDS_PARAMETER = fields_parameter(catalogue.PRODUCT_FIELDS, catalogue.LIST_FIELDS, required=("product_id",))
 
 class ProductCreateListView(APIView):
     permission_classes = [AllowAny]
@@ -42,8 +57,13 @@ class ProductCreateListView(APIView):
             image=''
         )
         image_bytes = image_file.read()
-        s3_url = upload_product_image(product.id, image_bytes)
+        try:
+            s3_url, variants = upload_product_image(product.id, image_bytes)
+        except InvalidImage as exc:
+            product.delete()
+            return Response({"error": str(exc)}, status=400)
         product.image = s3_url
+        product.image_variants = variants
         product.save()
         return Response({
             "message": "상품이 성공적으로 등록되었습니다.",
@@ -69,46 +89,40 @@ class ProductCreateListView(APIView):
                 description="true: 로그인한 사용자의 피팅 합성 이미지 / false: 상품 기본 이미지",
                 default=False,
             ),
+            IMAGE_SIZE_PARAMETER,
+            LIST_FIELDS_PARAMETER,
+            *PAGINATION_PARAMETERS,
         ],
-        responses={200: "상품 리스트", 401: "로그인 필요"},
+        responses={200: "상품 리스트 (products, 다음 페이지 cursor next)", 400: "잘못된 cursor/limit/fields", 401: "로그인 필요"},
     )
     def get(self, request):
         show_fitting = request.GET.get('show_fitting', 'false').lower() == 'true'
-        result = []
-
-        # product는 항상 기준이 되므로 미리 가져옴
-        products = Product.objects.filter(Q(is_deleted=False) | Q(is_deleted__isnull=True))
+        image_size = request.GET.get('image_size')
+        try:
+            after, limit = page_params(request.GET)
+            fields = select_fields(request.GET, catalogue.PRODUCT_FIELDS, catalogue.LIST_FIELDS, required=("product_id",))
+        except (InvalidCursor, InvalidFields) as exc:
+            return Response({"detail": str(exc)}, status=400)
 
-        if show_fitting:
-            # ✅ 인증 여부 확인
-            if not request.user.is_authenticated:
-                return Response({"detail": "로그인이 필요합니다."}, status=401)
+        # ✅ 인증 여부 확인
+        if show_fitting and not request.user.is_authenticated:
+            return Response({"detail": "로그인이 필요합니다."}, status=401)
 
-            # 현재 사용자 기준으로 fitting result 가져옴
-            fittings = FittingResult.objects.filter(user=request.user, is_deleted=False)
-            fitting_map = {f.product_id: f.image for f in fittings if f.product_id and f.image}
+        # 기본 목록은 캐시 (상품 변경 시 무효화, product/catalogue.py)
+        result, next_cursor = catalogue.page(image_size, after, limit, fields)
 
-            for product in products:
-                image = fitting_map.get(product.id, product.image)  # 피팅 결과가 없으면 기본 이미지 사용
-                result.append({
-                    "product_id": product.id,
-                    "name": product.name,
-                    "price": product.price,
-                    "image": image,
-                    "content": product.content
-                })
-        else:
-            # 🟢 기본 상품 모델 이미지만 보여줌 (비회원도 접근 가능)
-            for product in products:
-                result.append({
-                    "product_id": product.id,
-                    "name": product.name,
-                    "price": product.price,
-                    "image": product.image,
-                    "content": product.content
-                })
+        if show_fitting and 'image' in fields:
+            # 이 페이지 상품의 피팅 결과만 조회해 덮어씀 (피팅 결과가 없으면 기본 이미지 사용)
+            fitting_map = dict(
+                FittingResult.objects.filter(
+                    user=request.user, is_deleted=False, product_id__in=[p["product_id"] for p in result]
+                )
+                .exclude(image__isnull=True).exclude(image='')
+                .values_list('product_id', 'image')
+            )
+            result = catalogue.with_fittings(result, fitting_map)
 
-        return Response({'products': result}, status=200)
+        return Response({'products': result, 'next': next_cursor}, status=200)
     
 # 상품 상세 정보(GET) & 이미지 다중 업로드(POST) - 하나의 클래스
 class ProductDetailImageView(APIView):
@@ -118,6 +132,7 @@ class ProductDetailImageView(APIView):
     @swagger_auto_schema(
         operation_id="retrieveProduct",
         operation_summary="상품 상세 정보",
+        manual_parameters=[IMAGE_SIZE_PARAMETER],
         responses={200: "상품 상세 정보"},
     )
     def get(self, request, product_id):
@@ -125,17 +140,19 @@ class ProductDetailImageView(APIView):
             product = Product.objects.select_related('category').get(pk=product_id)
         except Product.DoesNotExist:
             return Response({'error': '상품이 존재하지 않습니다.'}, status=404)
-        product_images = list(
-            ProductImage.objects.filter(product=product, is_deleted=0)
-            .values_list('image', flat=True)
-        )
+        image_size = request.GET.get('image_size')
+        product_images = [
+            pick_image(image, variants, image_size)
+            for image, variants in ProductImage.objects.filter(product=product, is_deleted=0)
+            .values_list('image', 'image_variants')
+        ]
         response_data = {
             "product_id": product.id,
             "name": product.name,
             "content": product.content,
             "price": product.price,
             "count": product.count,
-            "model_image": product.image,
+            "model_image": pick_image(product.image, product.image_variants, image_size),
             "product_images": product_images,
         }
         return Response(response_data, status=200)
@@ -151,7 +168,7 @@ class ProductDetailImageView(APIView):
                 required=True,
             ),
         ],
-        responses={201: "업로드 성공", 400: "잘못된 요청", 404: "상품 없음"},
+        responses={201: "업로드 성공", 207: "일부 이미지 업로드 실패 (failed_images 참고)", 400: "잘못된 요청", 404: "상품 없음", 502: "모든 이미지 업로드 실패"},
         )
     def post(self, request, product_id):
         product = Product.objects.filter(id=product_id).first()
@@ -160,17 +177,16 @@ class ProductDetailImageView(APIView):
         images = request.FILES.getlist('images')
         if not images:
             return Response({"error": "업로드할 이미지가 없습니다."}, status=400)
-        uploaded_urls = []
-        for image_file in images:
-            image_bytes = image_file.read()
-            s3_url = upload_product_image(product.id, image_bytes)
-            ProductImage.objects.create(
-                product=product,
-                image=s3_url,
-                is_deleted=False
-            )
-            uploaded_urls.append(s3_url)
+        # S3 업로드는 동시에, DB 저장은 한 번에
+        uploaded, failed = upload_product_images(product.id, images)
+        ProductImage.objects.bulk_create(
+            [ProductImage(product=product, image=url, image_variants=variants, is_deleted=False) for url, variants in uploaded]
+        )
+        uploaded_urls = [url for url, _ in uploaded]
+        if failed and not uploaded:
+            return Response({"error": "이미지 업로드에 실패했습니다.", "failed_images": failed}, status=502)
         return Response({
             "product_id": product.id,
-            "uploaded_images": uploaded_urls
-        }, status=201)
\ No newline at end of file
+            "uploaded_images": uploaded_urls,
+            "failed_images": failed,
+        }, status=207 if failed else 201)
\ No newline at end of file
@@ -1,24 +1,11 @@
-import os, io, uuid, boto3
+from config import images
 
-s3 = boto3.client(
-    "s3",
-    aws_access_key_id=os.getenv("AWS_ACCESS_KEY_ID"),
-    aws_secret_access_key=os.getenv("AWS_SECRET_ACCESS_KEY"),
-    region_name=os.getenv("AWS_S3_REGION_NAME"),
-)
 
-BUCKET = os.getenv("AWS_STORAGE_BUCKET_NAME")
-CLOUDFRONT_DOMAIN = os.getenv("AWS_S3_CUSTOM_DOMAIN")
-
-def upload_profile_image_to_s3(user_id: str, data: bytes, ext: str = "jpg") -> str:
-    key = f"profiles/{user_id}/{uuid.uuid4()}.{ext}"
-    s3.upload_fileobj(
-        io.BytesIO(data),
-        BUCKET,
-        key,
-        ExtraArgs={
-            "ContentType": f"image/{ext}",
-            "ContentDisposition": "inline",
-        },
-    )
-    return f"{CLOUDFRONT_DOMAIN}/{key}"
+def upload_profile_image_to_s3(user_id: str, data: bytes | images.ProcessedImage) -> str:
+    """
+    프로필 사진을 정규화(회전·메타데이터 제거·JPEG)해 저장 → URL
+    VTO 입력으로만 쓰이므로 크기별 변형은 만들지 않는다.
+    """
+    processed = data if isinstance(data, images.ProcessedImage) else images.process(data, variants=False)
+    url, _ = images.store(f"profiles/{user_id}/", processed)
+    return url
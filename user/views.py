@@ -15,6 +15,8 @@ from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework_simplejwt.serializers import TokenRefreshSerializer
 from django.conf import settings
 from .utils import upload_profile_image_to_s3
+from config import images
+from config.fields import InvalidFields, select_fields, columns, fields_parameter
 from .models import CartItem
 from product.models import Product
 
@@ -32,11 +34,19 @@ class SignUpAPI(generics.CreateAPIView):
 
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        user = serializer.save() 
 
+        # 가입 전에 이미지부터 확인 (잘못된 파일이면 계정을 만들지 않음)
+        processed = None
         if image_file:
-            image_bytes = image_file.read()
-            profile_image_url = upload_profile_image_to_s3(str(user.id), image_bytes)
+            try:
+                processed = images.process(image_file.read(), variants=False)
+            except images.InvalidImage as exc:
+                return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        user = serializer.save() 
+
+        if processed:
+            profile_image_url = upload_profile_image_to_s3(str(user.id), processed)
 
             user.profile_image = profile_image_url
             user.save() 
@@ -201,18 +211,39 @@ class CartItemCreateAPIView(APIView):
         response_serializer = CartItemSerializer(cart_item)
         return Response(response_serializer.data, status=201)
     
+# 장바구니 응답 필드 → 조회 컬럼 (CartItemSerializer 와 같은 필드)
+CART_FIELDS = {
+    "cart_product_id": ("id",),
+    "product_id":      ("product_id",),
+    "name":            ("product__name",),
+    "price":           ("product__price",),
+    "quantity":        ("quantity",),
+    "image":           ("product__image",),
+}
+
 class CartItemListAPIView(APIView):
     permission_classes = [IsAuthenticated]
     
-    @swagger_auto_schema(operation_summary="장바구니 리스트") 
+    @swagger_auto_schema(
+        operation_summary="장바구니 리스트",
+        manual_parameters=[fields_parameter(CART_FIELDS, CART_FIELDS, required=("cart_product_id",))],
+        responses={200: CartItemSerializer(many=True), 400: "알 수 없는 필드"},
+    )
     def get(self, request):
-        cart_items = CartItem.objects.filter(user=request.user)
-        serializer = CartItemSerializer(cart_items, many=True)
+        try:
+            fields = select_fields(request.GET, CART_FIELDS, CART_FIELDS, required=("cart_product_id",))
+        except InvalidFields as exc:
+            return Response({"error": str(exc)}, status=400)
 
-        total_price = sum(item.product.price * item.quantity for item in cart_items)
+        # 요청한 필드의 컬럼만 조회 (합계 계산용 가격·수량은 항상 포함)
+        rows = CartItem.objects.filter(user=request.user).order_by("id").values(
+            *columns(fields, CART_FIELDS), "product__price", "quantity"
+        )
+        cart_products = [{name: row[CART_FIELDS[name][0]] for name in fields} for row in rows]
+        total_price = sum(row["product__price"] * row["quantity"] for row in rows)
 
         return Response({
-            "cart_product": serializer.data,
+            "cart_product": cart_products,
             "total_price": total_price
         })
         
@@ -293,10 +324,12 @@ class UpdateProfileImageAPI(APIView):
             return Response({"error": "이미지 파일을 제공해주세요."}, status=status.HTTP_400_BAD_REQUEST)
 
         image_bytes = image_file.read()
-        ext = image_file.name.split('.')[-1].lower()
 
         user = request.user
-        profile_image_url = upload_profile_image_to_s3(str(user.id), image_bytes, ext)
+        try:
+            profile_image_url = upload_profile_image_to_s3(str(user.id), image_bytes)
+        except images.InvalidImage as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
         user.profile_image = profile_image_url
         user.is_fitting = False